@@ -0,0 +1,234 @@
+"""
+Micro-benchmark for extract_intent
+
+Compares the compiled single-pass engine in intent.py with the previous
+implementation (kept below verbatim), checks both return identical intents
+for the sample utterances, and prints the per-call cost of each, plus the
+cost of a memoized extract_intent call once the utterances are cached.
+
+Usage (from backend/):
+    python -m bench.bench_intent [--iterations 20000]
+"""
+
+import argparse
+import timeit
+from typing import Any, Dict
+
+from intent import compute_intent, extract_intent, intent_cache
+
+UTTERANCES = [
+    "show me action movies",
+    "I'm hungry",
+    "korean dramas",
+    "movies with Tom Hanks",
+    "Leonardo DiCaprio films",
+    "something funny to watch",
+    "I want pizza",
+    "scary movies from 2019",
+    "show me romantic korean dramas with Lee Min-ho",
+    "japanese anime about magic and dragons",
+    "I'm feeling sad, show me something",
+    "order some sushi for movie night",
+    "bollywood movies",
+    "find me Song Kang-ho",
+    "sci-fi thriller about space and aliens",
+    "relaxing french films",
+    "Korean food near me",
+    "detective mystery series",
+    "I feel happy and excited tonight",
+    "funny tv shows",
+]
+
+
+def legacy_extract_intent(text: str) -> Dict[str, Any]:
+    """extract_intent as it was before the compiled engine (one scan per keyword)"""
+    text_lower = text.lower()
+    
+    # Actor detection - look for patterns like "with [actor]", "starring [actor]", "movies with [actor]"
+    # Skip actor detection if this is clearly a food query
+    actor = None
+    food_indicators = ["food", "restaurant", "dinner", "lunch", "pizza", "burger", "sushi", "taco", "hungry", "eat", "meal", "snack"]
+    is_likely_food = any(indicator in text_lower for indicator in food_indicators)
+    
+    if not is_likely_food:
+        import re
+        # Improved patterns to capture full names including hyphenated names
+        # Pattern 1: "with/starring/featuring [Name Name-Name]"
+        pattern1 = r'(?:with|starring|featuring)\s+([A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z-]+)+)'
+        match = re.search(pattern1, text)
+        if match:
+            potential_actor = match.group(1).strip()
+            # Make sure it's not a food-related phrase
+            if not any(word in potential_actor.lower() for word in ["food", "restaurant", "dinner", "pizza", "burger"]):
+                actor = potential_actor
+        
+        # Pattern 2: "movies/films/shows with [Name Name-Name]"
+        if not actor:
+            pattern2 = r'(?:movies?|films?|shows?|dramas?)\s+(?:with|starring|featuring)\s+([A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z-]+)+)'
+            match = re.search(pattern2, text)
+            if match:
+                potential_actor = match.group(1).strip()
+                if not any(word in potential_actor.lower() for word in ["food", "restaurant", "dinner", "pizza", "burger"]):
+                    actor = potential_actor
+        
+        # Pattern 3: "[Name Name-Name] movies/films/shows"
+        if not actor:
+            pattern3 = r'([A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z-]+)+)\s+(?:movies?|films?|shows?|dramas?)'
+            match = re.search(pattern3, text)
+            if match:
+                potential_actor = match.group(1).strip()
+                if not any(word in potential_actor.lower() for word in ["food", "restaurant", "dinner", "pizza", "burger"]):
+                    actor = potential_actor
+        
+        # Pattern 4: "show me [Name Name-Name]" or "I want [Name Name-Name]" (but not food)
+        if not actor:
+            pattern4 = r'(?:show\s+me|find\s+me)\s+([A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z-]+)+)'
+            match = re.search(pattern4, text, re.IGNORECASE)
+            if match:
+                potential_actor = match.group(1).strip()
+                if not any(word in potential_actor.lower() for word in ["food", "restaurant", "dinner", "pizza", "burger", "tv"]):
+                    actor = potential_actor
+        
+        # If still no match, try to extract capitalized name sequences (but exclude food terms)
+        if not actor:
+            name_pattern = r'\b([A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z-]+){1,2})\b'
+            matches = re.findall(name_pattern, text)
+            
+            common_words = {"I", "The", "A", "An", "Movies", "Movie", "Films", "Film", 
+                           "Shows", "Show", "Dramas", "Drama", "Korean", "Japanese", 
+                           "Chinese", "Action", "Comedy", "Horror", "Sci-fi", "Food",
+                           "Restaurant", "Dinner", "TV", "Tv"}
+            
+            for match in matches:
+                words = match.split()
+                # Skip if all words are common words or food-related
+                if not all(word in common_words for word in words):
+                    if not any(word in match.lower() for word in ["food", "restaurant", "dinner", "pizza", "burger", "tv"]):
+                        if not actor or len(match) > len(actor):
+                            actor = match.strip()
+    
+    # Country/Language detection
+    country = None
+    language = None
+    country_keywords = {
+        "korean": {"country": "KR", "language": "ko", "keywords": ["korean", "korea", "k-drama", "kdrama"]},
+        "japanese": {"country": "JP", "language": "ja", "keywords": ["japanese", "japan", "anime"]},
+        "chinese": {"country": "CN", "language": "zh", "keywords": ["chinese", "china", "mandarin"]},
+        "indian": {"country": "IN", "language": "hi", "keywords": ["indian", "india", "bollywood", "hindi"]},
+        "spanish": {"country": "ES", "language": "es", "keywords": ["spanish", "spain", "mexican"]},
+        "french": {"country": "FR", "language": "fr", "keywords": ["french", "france"]},
+        "german": {"country": "DE", "language": "de", "keywords": ["german", "germany"]},
+    }
+    
+    for country_name, info in country_keywords.items():
+        if any(keyword in text_lower for keyword in info["keywords"]):
+            country = info["country"]
+            language = info["language"]
+            break
+    
+    # Genre detection
+    genres = []
+    genre_keywords = {
+        "action": ["action", "fight", "combat", "thriller", "adventure"],
+        "comedy": ["comedy", "funny", "humor", "laugh"],
+        "drama": ["drama", "emotional", "serious", "deep", "dramas"],
+        "horror": ["horror", "scary", "frightening", "terror"],
+        "sci-fi": ["sci-fi", "science fiction", "space", "future", "alien"],
+        "romance": ["romance", "romantic", "love", "relationship"],
+        "fantasy": ["fantasy", "magic", "wizard", "dragon"],
+        "crime": ["crime", "criminal", "gangster", "mafia"],
+        "mystery": ["mystery", "detective", "investigation", "suspense"]
+    }
+    
+    for genre, keywords in genre_keywords.items():
+        if any(keyword in text_lower for keyword in keywords):
+            genres.append(genre)
+    
+    # Year detection
+    year = None
+    import re
+    year_match = re.search(r'\b(19|20)\d{2}\b', text)
+    if year_match:
+        year = int(year_match.group())
+    
+    # Mood detection
+    mood = None
+    if any(word in text_lower for word in ["sad", "depressed", "down"]):
+        mood = "uplifting"
+    elif any(word in text_lower for word in ["happy", "excited", "energetic"]):
+        mood = "energetic"
+    elif any(word in text_lower for word in ["relax", "calm", "peaceful"]):
+        mood = "calm"
+    
+    # Food/Restaurant detection
+    is_food_query = any(word in text_lower for word in [
+        "food", "restaurant", "restaurants", "dinner", "lunch", "breakfast",
+        "pizza", "burger", "sushi", "taco", "chinese", "italian", "mexican",
+        "delivery", "takeout", "order", "hungry", "eat", "eating", "meal",
+        "snack", "snacks", "tv dinner", "movie night food"
+    ])
+    
+    # Extract food type/cuisine
+    food_type = None
+    cuisine_keywords = {
+        "pizza": ["pizza"],
+        "burger": ["burger", "burgers"],
+        "sushi": ["sushi", "japanese"],
+        "chinese": ["chinese"],
+        "italian": ["italian", "pasta"],
+        "mexican": ["mexican", "taco", "tacos"],
+        "thai": ["thai"],
+        "indian": ["indian", "curry"],
+        "korean": ["korean food", "korean restaurant"],
+        "fast food": ["fast food", "quick bite"]
+    }
+    
+    for cuisine, keywords in cuisine_keywords.items():
+        if any(keyword in text_lower for keyword in keywords):
+            food_type = cuisine
+            break
+    
+    return {
+        "genres": genres if genres else None,
+        "year": year,
+        "mood": mood,
+        "country": country,
+        "language": language,
+        "actor": actor,
+        "is_food_query": is_food_query,
+        "food_type": food_type,
+        "original_text": text
+    }
+
+
+def bench(fn, iterations: int) -> float:
+    """Return the mean cost of one call in microseconds"""
+    def run():
+        for text in UTTERANCES:
+            fn(text)
+    total = timeit.timeit(run, number=max(1, iterations // len(UTTERANCES)))
+    calls = max(1, iterations // len(UTTERANCES)) * len(UTTERANCES)
+    return total / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="extract_intent micro-benchmark")
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    mismatches = [text for text in UTTERANCES if legacy_extract_intent(text) != compute_intent(text)]
+    if mismatches:
+        raise SystemExit(f"Engines disagree on: {mismatches}")
+
+    before = bench(legacy_extract_intent, args.iterations)
+    after = bench(compute_intent, args.iterations)
+    cached = bench(extract_intent, args.iterations)
+    print(f"utterances: {len(UTTERANCES)}, calls per engine: {args.iterations}")
+    print(f"before (keyword loops): {before:8.2f} us/call")
+    print(f"after  (compiled):      {after:8.2f} us/call")
+    print(f"speedup:                {before / after:8.2f}x")
+    print(f"memoized (cache hits):  {cached:8.2f} us/call  {intent_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Micro-benchmark for response encoding and payload size
+
+Encodes a /api/voice/process response and a movie details response the way
+FastAPI does for a returned dict (jsonable_encoder, then json.dumps) and the
+way json_response() does (orjson directly), and reports payload bytes for
+the full TMDB details against format_details() and a `fields` projection,
+raw and gzip-compressed.
+
+Usage (from backend/):
+    python -m bench.bench_serialization [--iterations 2000]
+"""
+
+import argparse
+import gzip
+import json
+import timeit
+from typing import Any, Dict
+
+from fastapi.encoders import jsonable_encoder
+
+from bench.mock_upstream import build_catalog
+from main import format_details, format_results
+from responses import ORJSON_AVAILABLE, parse_fields, project_payload
+
+if ORJSON_AVAILABLE:
+    import orjson
+
+
+def voice_payload(catalog: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "success": True,
+        "intent": {"genres": ["action"], "is_food_query": False},
+        "recommendations": format_results(catalog["movies"][:10]),
+        "count": 10,
+        "partial": False
+    }
+
+
+def details_payload(catalog: Dict[str, Any]) -> Dict[str, Any]:
+    """A details response shaped like TMDB's with videos and credits appended"""
+    movie = dict(catalog["movies"][0])
+    movie.update({
+        "runtime": 128,
+        "tagline": "Every case has a price.",
+        "genres": [{"id": 28, "name": "Action"}, {"id": 80, "name": "Crime"}],
+        "production_companies": [{"id": i, "name": f"Studio {i}", "logo_path": f"/logo{i}.png",
+                                  "origin_country": "US"} for i in range(4)],
+        "videos": {"results": [{"id": f"v{i}", "key": f"key{i}", "name": f"Clip {i}", "site": "YouTube",
+                                "type": "Trailer" if i == 0 else "Featurette", "size": 1080}
+                               for i in range(12)]},
+        "credits": {
+            "cast": [{"id": i, "name": f"Actor {i}", "character": f"Role {i}", "order": i,
+                      "profile_path": f"/p{i}.jpg", "popularity": 10.0 + i, "known_for_department": "Acting"}
+                     for i in range(60)],
+            "crew": [{"id": 1000 + i, "name": f"Crew {i}", "job": "Editor", "department": "Editing",
+                      "profile_path": None, "popularity": 1.0} for i in range(120)]
+        }
+    })
+    return movie
+
+
+def default_encode(payload: Dict[str, Any]) -> bytes:
+    """What a plain dict return costs: jsonable_encoder, then JSONResponse's json.dumps"""
+    return json.dumps(jsonable_encoder(payload), ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def fast_encode(payload: Dict[str, Any]) -> bytes:
+    return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+def bench(fn, payload: Dict[str, Any], iterations: int) -> float:
+    """Return the mean cost of one call in microseconds"""
+    return timeit.timeit(lambda: fn(payload), number=iterations) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Response encoding micro-benchmark")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    if not ORJSON_AVAILABLE:
+        raise SystemExit("orjson is not installed")
+
+    catalog = build_catalog()
+    details = details_payload(catalog)
+    payloads = {
+        "voice": voice_payload(catalog),
+        "details (full)": {"success": True, "movie": details},
+        "details": {"success": True, "movie": format_details(details)},
+    }
+
+    print(f"{'payload':>16} {'default us':>11} {'orjson us':>10} {'speedup':>8}")
+    for name, payload in payloads.items():
+        if json.loads(default_encode(payload)) != json.loads(fast_encode(payload)):
+            raise SystemExit(f"Encodings disagree for {name}")
+        before = bench(default_encode, payload, args.iterations)
+        after = bench(fast_encode, payload, args.iterations)
+        print(f"{name:>16} {before:>11.1f} {after:>10.1f} {before / after:>7.2f}x")
+
+    payloads["voice fields=id,title,poster_path"] = project_payload(
+        payloads["voice"], parse_fields("id,title,poster_path")
+    )
+    print(f"\n{'payload':>34} {'bytes':>7} {'gzip':>7}")
+    for name, payload in payloads.items():
+        body = fast_encode(payload)
+        print(f"{name:>34} {len(body):>7} {len(gzip.compress(body, 5)):>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Micro-benchmark for typeahead suggestions
+
+Builds a SuggestIndex over a synthetic catalog (titles and people with
+random word names and popularities) and times suggest() for every 1-3
+character prefix a user could type, with the prefix memo cleared so each
+lookup does the full bisect and top-k, then once more with the memo warm.
+Reports mean and p99 latency in microseconds.
+
+Usage (from backend/):
+    python -m bench.bench_suggest [--titles 100000] [--people 50000]
+"""
+
+import argparse
+import random
+import string
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from suggest import SuggestIndex, genre_entries
+
+WORDS = ["night", "city", "love", "dark", "last", "king", "summer", "storm", "garden", "road",
+         "detective", "glass", "empire", "ghost", "river", "secret", "blue", "house", "war", "star"]
+
+
+def build_entries(rng: random.Random, titles: int, people: int) -> List[Dict[str, Any]]:
+    entries = []
+    for index in range(titles):
+        name = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))).title()
+        entries.append({"type": rng.choice(["movie", "tv"]), "id": index, "text": name,
+                        "names": [name], "weight": rng.paretovariate(1.5)})
+    for index in range(people):
+        name = f"{''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 8)))} " \
+               f"{''.join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10)))}".title()
+        entries.append({"type": "person", "id": index, "text": name, "names": [name],
+                        "weight": rng.paretovariate(1.5)})
+    return entries + genre_entries(max(entry["weight"] for entry in entries))
+
+
+def time_lookups(index: SuggestIndex, prefixes: List[str], cold: bool) -> np.ndarray:
+    if not cold:
+        for prefix in prefixes:
+            index.suggest(prefix, 10)
+    samples = []
+    for prefix in prefixes:
+        if cold:
+            index._cache.clear()
+        start = time.perf_counter()
+        index.suggest(prefix, 10)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return np.array(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Typeahead suggestion micro-benchmark")
+    parser.add_argument("--titles", type=int, default=100000)
+    parser.add_argument("--people", type=int, default=50000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    start = time.perf_counter()
+    index = SuggestIndex(build_entries(rng, args.titles, args.people))
+    print(f"built {len(index.entries)} entries, {len(index._keys)} keys in {time.perf_counter() - start:.2f}s")
+
+    letters = string.ascii_lowercase
+    prefixes = list(letters) + [a + b for a in letters for b in letters] + \
+        [rng.choice(WORDS)[:3] for _ in range(500)]
+    print(f"{'prefix length':>14} {'lookup':>6} {'mean us':>8} {'p99 us':>8}")
+    for length in (1, 2, 3):
+        subset = [prefix for prefix in prefixes if len(prefix) == length]
+        for label, cold in (("cold", True), ("warm", False)):
+            samples = time_lookups(index, subset, cold)
+            print(f"{length:>14} {label:>6} {samples.mean():>8.1f} {np.percentile(samples, 99):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Load test for the Fex TV API
+
+Drives /api/voice/process, /api/movies/search, /api/restaurants and
+/api/movies/{id} with a weighted, realistic request mix and reports
+throughput, p50/p95/p99 latency per endpoint and upstream calls per request.
+
+By default everything runs in one process: the API app and the mock
+TMDB/Yelp server (bench/mock_upstream.py) are wired together with httpx's
+ASGI transport, so no network or API keys are needed and the numbers measure
+our own overhead plus the simulated upstream latency.
+
+Usage (from backend/):
+    python -m bench.loadtest --requests 2000 --concurrency 32 --latency-ms 80
+
+Against a running server (started with TMDB_BASE_URL/YELP_BASE_URL pointing
+at `python -m bench.mock_upstream`):
+    python -m bench.loadtest --target http://127.0.0.1:8000 --mock-url http://127.0.0.1:9000
+
+Set TMDB_CACHE_SIZE=0 / INTENT_CACHE_SIZE=0 to measure with caching disabled.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from bench.mock_upstream import build_catalog, create_app
+
+VOICE_UTTERANCES = [
+    ("show me action movies", 10),
+    ("korean dramas", 10),
+    ("I'm hungry", 6),
+    ("funny movies", 8),
+    ("movies with Tom Hanks", 6),
+    ("Leonardo DiCaprio films", 4),
+    ("scary movies from 2019", 4),
+    ("romantic korean dramas with Lee Min-ho", 3),
+    ("japanese anime about magic and dragons", 3),
+    ("I want pizza", 6),
+    ("order some sushi for movie night", 3),
+    ("bollywood movies", 3),
+    ("sci-fi thriller about space", 4),
+    ("something cozy and nostalgic", 3),
+    ("detective mystery series", 3),
+    ("french films", 2),
+    ("the midnight signal", 2),
+]
+
+SEARCH_BODIES = [
+    ({"query": "shadow"}, 3),
+    ({"query": "dragon kingdom"}, 2),
+    ({"query": "action", "genres": ["action"]}, 3),
+    ({"query": "comedy", "genres": ["comedy"], "year": 2020}, 2),
+]
+
+RESTAURANT_TERMS = [("restaurant", 4), ("pizza", 3), ("sushi", 2), ("thai", 1), ("indian", 1)]
+
+# Endpoint mix: share of requests per endpoint
+ENDPOINT_WEIGHTS = [("voice", 60), ("search", 15), ("restaurants", 10), ("details", 15)]
+
+
+def _weighted(rng: random.Random, choices: List[Tuple[Any, int]]) -> Any:
+    values, weights = zip(*choices)
+    return rng.choices(values, weights=weights)[0]
+
+
+def build_workload(rng: random.Random, movie_ids: List[int]) -> Callable[[], Tuple[str, str, str, Optional[dict]]]:
+    """Return a factory producing (endpoint, method, path, json body) tuples"""
+    # Popular titles get most of the details traffic (roughly Zipf)
+    detail_weights = [1.0 / (rank + 1) for rank in range(len(movie_ids))]
+
+    def next_request():
+        endpoint = _weighted(rng, ENDPOINT_WEIGHTS)
+        if endpoint == "voice":
+            return endpoint, "POST", "/api/voice/process", {"text": _weighted(rng, VOICE_UTTERANCES)}
+        if endpoint == "search":
+            return endpoint, "POST", "/api/movies/search", _weighted(rng, SEARCH_BODIES)
+        if endpoint == "restaurants":
+            term = _weighted(rng, RESTAURANT_TERMS)
+            return endpoint, "GET", f"/api/restaurants?term={term}", None
+        movie_id = rng.choices(movie_ids, weights=detail_weights)[0]
+        return endpoint, "GET", f"/api/movies/{movie_id}", None
+
+    return next_request
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def drive(client: httpx.AsyncClient, next_request, total: int, concurrency: int) -> Dict[str, Any]:
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Counter = Counter()
+    remaining = total
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            endpoint, method, path, body = next_request()
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                if response.status_code >= 400:
+                    errors[endpoint] += 1
+            except httpx.HTTPError:
+                errors[endpoint] += 1
+            latencies[endpoint].append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return {"latencies": latencies, "errors": errors, "elapsed": time.perf_counter() - started}
+
+
+def report(result: Dict[str, Any], upstream_calls: Dict[str, int]) -> None:
+    latencies, errors, elapsed = result["latencies"], result["errors"], result["elapsed"]
+    total = sum(len(samples) for samples in latencies.values())
+    print(f"\n{total} requests in {elapsed:.2f}s -> {total / elapsed:.1f} req/s\n")
+    print(f"{'endpoint':<12} {'count':>6} {'errors':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    everything = []
+    for endpoint, samples in sorted(latencies.items()):
+        everything.extend(samples)
+        print(f"{endpoint:<12} {len(samples):>6} {errors[endpoint]:>6} "
+              f"{percentile(samples, 50):>9.1f} {percentile(samples, 95):>9.1f} {percentile(samples, 99):>9.1f}")
+    print(f"{'all':<12} {total:>6} {sum(errors.values()):>6} "
+          f"{percentile(everything, 50):>9.1f} {percentile(everything, 95):>9.1f} {percentile(everything, 99):>9.1f}")
+
+    upstream_total = sum(upstream_calls.values())
+    print(f"\nupstream calls: {upstream_total} ({upstream_total / max(total, 1):.2f} per request)")
+    for route, count in sorted(upstream_calls.items(), key=lambda item: -item[1]):
+        print(f"  {route:<40} {count:>6}")
+
+
+async def run_in_process(args) -> None:
+    # The API reads its upstream configuration at import time
+    os.environ.setdefault("TMDB_API_KEY", "mock")
+    os.environ.setdefault("YELP_API_KEY", "mock")
+    os.environ["TMDB_BASE_URL"] = "http://tmdb.mock/3"
+    os.environ["YELP_BASE_URL"] = "http://yelp.mock/v3"
+    import main
+    # Per-request INFO logging would dominate the measurement
+    logging.getLogger().setLevel(args.log_level)
+    logging.getLogger("httpx").setLevel(args.log_level)
+
+    upstream = create_app(args.latency_ms, args.jitter_ms, args.error_rate, args.rate_limit_rate)
+    main.http_pool.transport = httpx.ASGITransport(app=upstream)
+    await main.startup()
+    upstream.state.calls.clear()
+
+    rng = random.Random(args.seed)
+    movie_ids = [movie["id"] for movie in build_catalog()["movies"]]
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app),
+                                     base_url="http://api", timeout=60.0) as client:
+            result = await drive(client, build_workload(rng, movie_ids), args.requests, args.concurrency)
+    finally:
+        await main.shutdown()
+    report(result, dict(upstream.state.calls))
+
+
+async def run_against(args) -> None:
+    rng = random.Random(args.seed)
+    movie_ids = [movie["id"] for movie in build_catalog()["movies"]]
+    async with httpx.AsyncClient(base_url=args.target, timeout=60.0) as client:
+        if args.mock_url:
+            await client.post(f"{args.mock_url}/__reset")
+        result = await drive(client, build_workload(rng, movie_ids), args.requests, args.concurrency)
+        upstream_calls = {}
+        if args.mock_url:
+            upstream_calls = (await client.get(f"{args.mock_url}/__stats")).json()["calls"]
+    report(result, upstream_calls)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Fex TV API load test")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--target", help="Base URL of a running API (default: run in-process)")
+    parser.add_argument("--mock-url", help="Base URL of a running mock upstream, for call counts")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args(argv)
+
+    if args.target:
+        asyncio.run(run_against(args))
+    else:
+        asyncio.run(run_in_process(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+"""
+Local stand-in for the TMDB and Yelp APIs
+
+Serves TMDB- and Yelp-shaped responses from a deterministic in-memory
+catalog, with configurable latency and error injection, and counts every
+upstream call so benchmarks can report calls per request.
+
+Usage (from backend/):
+    python -m bench.mock_upstream --port 9000 --latency-ms 80 --error-rate 0.01
+
+Then point the API at it:
+    TMDB_BASE_URL=http://127.0.0.1:9000/3 YELP_BASE_URL=http://127.0.0.1:9000/v3 \\
+    TMDB_API_KEY=mock YELP_API_KEY=mock uvicorn main:app --port 8000
+"""
+
+import argparse
+import asyncio
+import random
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+MOVIE_GENRES = [
+    {"id": 28, "name": "Action"}, {"id": 12, "name": "Adventure"}, {"id": 16, "name": "Animation"},
+    {"id": 35, "name": "Comedy"}, {"id": 80, "name": "Crime"}, {"id": 99, "name": "Documentary"},
+    {"id": 18, "name": "Drama"}, {"id": 10751, "name": "Family"}, {"id": 14, "name": "Fantasy"},
+    {"id": 36, "name": "History"}, {"id": 27, "name": "Horror"}, {"id": 10402, "name": "Music"},
+    {"id": 9648, "name": "Mystery"}, {"id": 10749, "name": "Romance"}, {"id": 878, "name": "Science Fiction"},
+    {"id": 10770, "name": "TV Movie"}, {"id": 53, "name": "Thriller"}, {"id": 10752, "name": "War"},
+    {"id": 37, "name": "Western"},
+]
+
+TV_GENRES = [
+    {"id": 10759, "name": "Action & Adventure"}, {"id": 16, "name": "Animation"}, {"id": 35, "name": "Comedy"},
+    {"id": 80, "name": "Crime"}, {"id": 99, "name": "Documentary"}, {"id": 18, "name": "Drama"},
+    {"id": 10751, "name": "Family"}, {"id": 10762, "name": "Kids"}, {"id": 9648, "name": "Mystery"},
+    {"id": 10763, "name": "News"}, {"id": 10764, "name": "Reality"}, {"id": 10765, "name": "Sci-Fi & Fantasy"},
+    {"id": 10766, "name": "Soap"}, {"id": 10767, "name": "Talk"}, {"id": 10768, "name": "War & Politics"},
+    {"id": 37, "name": "Western"},
+]
+
+# (origin country, original language), weighted towards US/English like TMDB popularity
+ORIGINS = [("US", "en")] * 6 + [("GB", "en"), ("KR", "ko"), ("KR", "ko"), ("JP", "ja"), ("CN", "zh"),
+                                ("IN", "hi"), ("ES", "es"), ("FR", "fr"), ("DE", "de")]
+
+TITLE_WORDS = ["Midnight", "Shadow", "Last", "Crown", "River", "Signal", "Garden", "Storm", "Silent",
+               "Empire", "Echo", "Winter", "Neon", "Harbor", "Secret", "Moon", "Glass", "Iron",
+               "Crash", "Love", "Hunter", "Kingdom", "Summer", "Detective", "Dragon", "Space", "City"]
+
+PEOPLE = ["Tom Hanks", "Leonardo DiCaprio", "Lee Min-ho", "Song Kang-ho", "Scarlett Johansson",
+          "Shah Rukh Khan", "Penelope Cruz", "Gong Yoo", "Keanu Reeves", "Meryl Streep",
+          "Denzel Washington", "Bae Suzy", "Ken Watanabe", "Marion Cotillard", "Daniel Bruhl"]
+
+CUISINES = [
+    ("Pizza", ["Pizza", "Italian"]), ("Sushi", ["Sushi", "Japanese"]), ("Burger", ["Burgers", "American"]),
+    ("Thai", ["Thai", "Asian"]), ("Taco", ["Mexican", "Tacos"]), ("Curry", ["Indian", "Curry"]),
+    ("Noodle", ["Chinese", "Noodles"]), ("Trattoria", ["Italian", "Pasta"]), ("Bibimbap", ["Korean"]),
+    ("Express", ["Fast Food", "American"]),
+]
+
+
+def build_catalog(seed: int = 7, size: int = 400) -> Dict[str, Any]:
+    """Build a deterministic catalog of movies, TV shows, people and businesses"""
+    rng = random.Random(seed)
+    movies, shows = [], []
+    for index in range(size):
+        country, language = rng.choice(ORIGINS)
+        is_tv = index % 3 == 0
+        genres = TV_GENRES if is_tv else MOVIE_GENRES
+        if country == "KR" and is_tv:
+            genre_ids = [18] + rng.sample([10759, 35, 9648, 10765, 80], rng.randint(0, 2))
+        else:
+            genre_ids = [g["id"] for g in rng.sample(genres, rng.randint(1, 3))]
+        title = " ".join(rng.sample(TITLE_WORDS, rng.randint(1, 3)))
+        year = rng.randint(1985, 2024)
+        date = f"{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        item = {
+            "id": 1000 + index,
+            "overview": f"A {rng.choice(['gripping', 'heartfelt', 'funny', 'dark', 'sweeping'])} story about "
+                        f"{rng.choice(['a family', 'two strangers', 'a detective', 'a crew', 'an unlikely hero'])} "
+                        f"in {rng.choice(['Seoul', 'London', 'Tokyo', 'Mumbai', 'Paris', 'New York', 'space'])}.",
+            "poster_path": f"/mock{1000 + index}.jpg",
+            "backdrop_path": f"/mock{1000 + index}_bg.jpg",
+            "genre_ids": genre_ids,
+            "origin_country": [country],
+            "original_language": language,
+            "popularity": round(rng.uniform(5, 900) * (1.5 if language == "en" else 1.0), 3),
+            "vote_average": round(rng.uniform(4.5, 9.0), 1),
+            "vote_count": rng.randint(20, 30000),
+            "adult": False,
+        }
+        if is_tv:
+            item.update({"name": title, "original_name": title, "first_air_date": date})
+            shows.append(item)
+        else:
+            item.update({"title": title, "original_title": title, "release_date": date, "video": False})
+            movies.append(item)
+
+    people = []
+    for index, name in enumerate(PEOPLE):
+        credits = rng.sample(movies, 18) + rng.sample(shows, 8)
+        cast = []
+        for credit in credits:
+            entry = dict(credit, character=rng.choice(["Self", "Lead", "Detective", "Mother", "Captain"]))
+            entry["media_type"] = "tv" if "name" in credit else "movie"
+            cast.append(entry)
+        people.append({
+            "id": 500 + index,
+            "name": name,
+            "known_for_department": "Acting",
+            "popularity": round(rng.uniform(10, 120), 3),
+            "profile_path": f"/person{500 + index}.jpg",
+            "known_for": cast[:3],
+            "cast": cast,
+        })
+
+    businesses = []
+    for index in range(60):
+        label, categories = CUISINES[index % len(CUISINES)]
+        businesses.append({
+            "id": f"biz{index}",
+            "name": f"{rng.choice(['Golden', 'Little', 'Corner', 'Uptown', 'Lucky'])} {label} {index}",
+            "image_url": f"https://example.com/biz{index}.jpg",
+            "rating": round(rng.uniform(3.5, 5.0) * 2) / 2,
+            "price": rng.choice(["$", "$$", "$$$"]),
+            "categories": [{"alias": c.lower().replace(" ", ""), "title": c} for c in categories],
+            "location": {"display_address": [f"{rng.randint(1, 999)} Broadway", "New York, NY 10001"]},
+            "coordinates": {"latitude": 40.70 + rng.uniform(0, 0.1), "longitude": -74.02 + rng.uniform(0, 0.1)},
+            "distance": round(rng.uniform(100, 8000), 1),
+            "display_phone": f"(555) {rng.randint(100, 999)}-{rng.randint(1000, 9999)}",
+            "url": f"https://example.com/biz{index}",
+            "is_closed": False,
+        })
+
+    return {"movies": movies, "tv": shows, "people": people, "businesses": businesses}
+
+
+def _page(results: List[Dict[str, Any]], page: int) -> Dict[str, Any]:
+    total = len(results)
+    return {
+        "page": page,
+        "results": results[(page - 1) * 20:page * 20],
+        "total_results": total,
+        "total_pages": max(1, (total + 19) // 20),
+    }
+
+
+def _matches_query(title: str, query: str) -> bool:
+    title = title.lower()
+    return any(word in title for word in query.lower().split() if len(word) > 2)
+
+
+def create_app(latency_ms: float = 50.0, jitter_ms: float = 20.0, error_rate: float = 0.0,
+               rate_limit_rate: float = 0.0, seed: int = 7) -> FastAPI:
+    """Build the mock upstream app"""
+    catalog = build_catalog(seed)
+    rng = random.Random(seed)
+    app = FastAPI(title="Mock TMDB/Yelp")
+    app.state.calls = Counter()
+    app.state.config = {
+        "latency_ms": latency_ms,
+        "jitter_ms": jitter_ms,
+        "error_rate": error_rate,
+        "rate_limit_rate": rate_limit_rate,
+    }
+
+    @app.middleware("http")
+    async def simulate_upstream(request: Request, call_next):
+        if request.url.path.startswith("/__"):
+            return await call_next(request)
+        config = app.state.config
+        route = request.scope.get("path", "")
+        app.state.calls[_route_name(route)] += 1
+        delay = max(0.0, rng.gauss(config["latency_ms"], config["jitter_ms"])) / 1000
+        await asyncio.sleep(delay)
+        roll = rng.random()
+        if roll < config["rate_limit_rate"]:
+            return JSONResponse({"status_message": "Rate limited"}, status_code=429, headers={"Retry-After": "1"})
+        if roll < config["rate_limit_rate"] + config["error_rate"]:
+            return JSONResponse({"status_message": "Internal error"}, status_code=500)
+        return await call_next(request)
+
+    def discover(items: List[Dict[str, Any]], params: Dict[str, str], year_field: str) -> Dict[str, Any]:
+        results = items
+        if params.get("with_genres"):
+            wanted = {int(g) for g in params["with_genres"].split(",") if g}
+            results = [i for i in results if wanted.issubset(i["genre_ids"])]
+        if params.get("with_origin_country"):
+            results = [i for i in results if params["with_origin_country"] in i["origin_country"]]
+        if params.get("with_original_language"):
+            results = [i for i in results if i["original_language"] == params["with_original_language"]]
+        year = params.get("year") or params.get("first_air_date_year")
+        if year:
+            results = [i for i in results if i[year_field].startswith(str(year))]
+        results = sorted(results, key=lambda i: i["popularity"], reverse=True)
+        return _page(results, int(params.get("page", 1)))
+
+    @app.get("/3/genre/movie/list")
+    async def movie_genres():
+        return {"genres": MOVIE_GENRES}
+
+    @app.get("/3/genre/tv/list")
+    async def tv_genres():
+        return {"genres": TV_GENRES}
+
+    @app.get("/3/discover/movie")
+    async def discover_movie(request: Request):
+        return discover(catalog["movies"], dict(request.query_params), "release_date")
+
+    @app.get("/3/discover/tv")
+    async def discover_tv(request: Request):
+        return discover(catalog["tv"], dict(request.query_params), "first_air_date")
+
+    @app.get("/3/search/movie")
+    async def search_movie(query: str = "", page: int = 1):
+        return _page([m for m in catalog["movies"] if _matches_query(m["title"], query)], page)
+
+    @app.get("/3/search/tv")
+    async def search_tv(query: str = "", page: int = 1):
+        return _page([s for s in catalog["tv"] if _matches_query(s["name"], query)], page)
+
+    @app.get("/3/search/person")
+    async def search_person(query: str = ""):
+        query = query.lower()
+        results = [
+            {k: v for k, v in p.items() if k != "cast"}
+            for p in catalog["people"] if query and (query in p["name"].lower() or p["name"].lower() in query)
+        ]
+        return _page(results, 1)
+
+    @app.get("/3/person/{person_id}/combined_credits")
+    async def combined_credits(person_id: int):
+        for person in catalog["people"]:
+            if person["id"] == person_id:
+                return {"id": person_id, "cast": person["cast"], "crew": []}
+        return JSONResponse({"status_message": "Not found"}, status_code=404)
+
+    @app.get("/3/movie/{movie_id}")
+    async def movie_details(movie_id: int):
+        return _details(catalog["movies"], movie_id)
+
+    @app.get("/3/tv/{tv_id}")
+    async def tv_details(tv_id: int):
+        return _details(catalog["tv"], tv_id)
+
+    @app.get("/3/person/popular")
+    async def popular_people(page: int = 1):
+        people = sorted(catalog["people"], key=lambda p: p["popularity"], reverse=True)
+        return _page([{k: v for k, v in p.items() if k != "cast"} for p in people], page)
+
+    @app.get("/3/person/{person_id}")
+    async def person_details(person_id: int):
+        for person in catalog["people"]:
+            if person["id"] == person_id:
+                details = {k: v for k, v in person.items() if k not in ("cast", "known_for")}
+                return dict(details, also_known_as=[person["name"].upper()])
+        return JSONResponse({"status_message": "Not found"}, status_code=404)
+
+    @app.get("/v3/businesses/search")
+    async def businesses(term: str = "", limit: int = 20):
+        term = term.lower()
+        results = [
+            b for b in catalog["businesses"]
+            if term in ("", "restaurant", "restaurants") or any(term in c["title"].lower() for c in b["categories"])
+        ]
+        results = sorted(results, key=lambda b: b["rating"], reverse=True)[:limit]
+        return {"businesses": results, "total": len(results)}
+
+    @app.get("/__stats")
+    async def stats():
+        return {"calls": dict(app.state.calls), "total": sum(app.state.calls.values()), "config": app.state.config}
+
+    @app.post("/__reset")
+    async def reset():
+        app.state.calls.clear()
+        return {"reset": True}
+
+    return app
+
+
+def _details(items: List[Dict[str, Any]], item_id: int):
+    for item in items:
+        if item["id"] == item_id:
+            details = dict(item)
+            details.update({
+                "runtime": 100 + item_id % 60,
+                "tagline": "",
+                "status": "Released",
+                "videos": {"results": [{"key": f"mock{item_id}", "site": "YouTube", "type": "Trailer"}]},
+                "credits": {"cast": [{"id": 500, "name": PEOPLE[item_id % len(PEOPLE)], "character": "Lead"}], "crew": []},
+            })
+            return details
+    return JSONResponse({"status_message": "Not found"}, status_code=404)
+
+
+def _route_name(path: str) -> str:
+    """Collapse IDs so calls are counted per endpoint"""
+    version, *rest = path.strip("/").split("/")
+    return "/" + "/".join([version] + ["{id}" if part.isdigit() else part for part in rest])
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Mock TMDB/Yelp upstream server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls answered with HTTP 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of calls answered with HTTP 429")
+    args = parser.parse_args(argv)
+
+    import uvicorn
+    app = create_app(args.latency_ms, args.jitter_ms, args.error_rate, args.rate_limit_rate)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
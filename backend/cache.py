@@ -0,0 +1,238 @@
+"""
+Fex TV Backend - Response caching
+In-process LRU and TTL caches used in front of the upstream API clients
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set
+from urllib.parse import urlencode
+
+from deadline import detached_context
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+def make_cache_key(path: str, params: Dict[str, Any]) -> str:
+    """Build a stable cache key from an endpoint path and its query params.
+
+    The API key is never part of the key, None values are dropped, and string
+    values are stripped and lowercased (TMDB text matching is case-insensitive),
+    so "Korean Drama " and "korean drama" share one entry.
+    """
+    normalized = []
+    for name, value in params.items():
+        if name == "api_key" or value is None:
+            continue
+        if isinstance(value, str):
+            value = " ".join(value.split()).lower()
+        normalized.append((name, value))
+    normalized.sort()
+    return f"{path}?{urlencode(normalized)}" if normalized else path
+
+
+class LRUCache:
+    """Bounded least-recently-used cache with hit/miss/eviction counters"""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self._data.get(key, _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Look up without touching recency or the hit/miss counters"""
+        return self._data.get(key, default)
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if key in self._data:
+            self._data.move_to_end(key)
+        self._data[key] = value
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        return self._data.pop(key, default)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class TTLCache:
+    """LRU cache with per-entry TTLs and stale-while-revalidate.
+
+    An entry is fresh until its TTL passes, then stale for a further
+    `stale_ttl` seconds. Stale entries are still served immediately while a
+    single background task refreshes them; only fully expired entries make the
+    caller wait for the upstream fetch.
+
+    With `refresh_ahead` (a fraction of the TTL), a hit in the last part of an
+    entry's fresh period also starts the background refresh, so entries that
+    keep being read are renewed before anyone sees them stale.
+
+    With a `shared` L2 (shared_cache.SharedCache), L1 misses are looked up
+    there before fetching, and every set() is also written there in the
+    background, so other workers and replicas start warm.
+    """
+
+    def __init__(self, maxsize: int = 1024, default_ttl: float = 300.0, stale_ttl: float = 600.0,
+                 shared=None, refresh_ahead: float = 0.0):
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self.refresh_ahead = refresh_ahead
+        self.shared = shared
+        # key -> (value, fresh_until, stale_until)
+        self._entries = LRUCache(maxsize)
+        self._refreshing: Set[Hashable] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self.stale_hits = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    def get(self, key: Hashable, allow_stale: bool = False, allow_expired: bool = False) -> Any:
+        """Return a cached value without fetching, or None.
+
+        allow_expired returns whatever is still held for key regardless of age,
+        for serving a degraded answer while the upstream is failing.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, fresh_until, stale_until = entry
+        now = time.monotonic()
+        if allow_expired or now < fresh_until or (allow_stale and now < stale_until):
+            return value
+        return None
+
+    def has(self, key: Hashable) -> bool:
+        """Whether get_or_fetch() would answer key without waiting (fresh or stale entry)"""
+        entry = self._entries.peek(key)
+        return entry is not None and time.monotonic() < entry[2]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None,
+            stale_ttl: Optional[float] = None) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        stale_ttl = self.stale_ttl if stale_ttl is None else stale_ttl
+        now = time.monotonic()
+        self._entries.set(key, (value, now + ttl, now + ttl + stale_ttl))
+        if self.shared is not None:
+            self._spawn(self.shared.set(key, value, ttl, stale_ttl))
+
+    async def get_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]],
+                           ttl: Optional[float] = None, stale_ttl: Optional[float] = None) -> Any:
+        """Return the cached value for key, calling fetch() on a miss.
+
+        Exceptions from fetch() propagate and nothing is cached, so callers keep
+        their existing error handling.
+        """
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is not None:
+            value, fresh_until, stale_until = entry
+            if now < fresh_until:
+                if self.refresh_ahead and fresh_until - now < self.refresh_ahead * (self.default_ttl if ttl is None else ttl):
+                    self._schedule_refresh(key, fetch, ttl, stale_ttl)
+                return value
+            if now < stale_until:
+                self.stale_hits += 1
+                self._schedule_refresh(key, fetch, ttl, stale_ttl)
+                return value
+            # Fully expired: count it as a miss, not a hit
+            self._entries.hits -= 1
+            self._entries.misses += 1
+
+        if self.shared is not None:
+            shared_entry = await self.shared.get(key)
+            if shared_entry is not None and shared_entry[2] > 0:
+                value, fresh_for, stale_for = shared_entry
+                now = time.monotonic()
+                self._entries.set(key, (value, now + fresh_for, now + stale_for))
+                if fresh_for <= 0:
+                    self.stale_hits += 1
+                    self._schedule_refresh(key, fetch, ttl, stale_ttl)
+                return value
+
+        value = await fetch()
+        self.set(key, value, ttl, stale_ttl)
+        return value
+
+    def _schedule_refresh(self, key: Hashable, fetch: Callable[[], Awaitable[Any]],
+                          ttl: Optional[float], stale_ttl: Optional[float]) -> None:
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        self._spawn(self._refresh(key, fetch, ttl, stale_ttl))
+
+    def _spawn(self, coro: Awaitable[Any]) -> None:
+        task = detached_context().run(asyncio.create_task, coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refresh(self, key: Hashable, fetch: Callable[[], Awaitable[Any]],
+                       ttl: Optional[float], stale_ttl: Optional[float]) -> None:
+        try:
+            value = await fetch()
+            self.set(key, value, ttl, stale_ttl)
+            self.refreshes += 1
+        except Exception as e:
+            # Keep serving the stale value until it fully expires
+            self.refresh_errors += 1
+            logger.warning(f"Background cache refresh failed for {key}: {e}")
+        finally:
+            self._refreshing.discard(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._entries.stats()
+        stats.update({
+            "stale_hits": self.stale_hits,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "refreshing": len(self._refreshing),
+        })
+        if self.shared is not None:
+            stats["shared"] = self.shared.stats()
+        return stats
+
+    async def close(self) -> None:
+        """Cancel any in-flight background refreshes"""
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
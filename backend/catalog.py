@@ -0,0 +1,301 @@
+"""
+Fex TV Backend - Local catalog snapshot
+Popular titles per genre and country, ingested ahead of time and answered from memory
+
+The snapshot is a directory of NumPy column files (loaded memory-mapped)
+plus a JSON sidecar holding the facet table and the TMDB result payloads:
+
+    catalog.json      version, facets, genre bit assignments, items
+    popularity.npy    float32 per row
+    year.npy          int16 per row (0 when unknown)
+    genre_mask.npy    uint64 per row, one bit per TMDB genre id
+    item.npy          int32 per row, index into the sidecar's items
+
+Each facet is one discover query (media type plus a genre, or a country and
+language) fetched page by page in TMDB's popularity order, so its rows are
+the most popular titles matching it. A query narrower than a facet (extra
+genres, a year) is answered exactly from that facet's rows as long as they
+fill the requested page, or the facet was fetched completely.
+
+Build a snapshot from backend/ with:
+    python -m catalog --pages 5
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from intent import COUNTRY_KEYWORDS, GENRE_KEYWORDS
+from ranking import release_year
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+PAGE_SIZE = 20
+COLUMNS = {
+    "popularity": np.float32,
+    "year": np.int16,
+    "genre_mask": np.uint64,
+    "item": np.int32,
+}
+
+# (media type, genre id, origin country, original language)
+FacetKey = Tuple[str, Optional[int], Optional[str], Optional[str]]
+
+
+class CatalogIndex:
+    """In-memory index over a catalog snapshot answering discover queries"""
+
+    def __init__(self, facets: List[Dict[str, Any]], items: List[Dict[str, Any]],
+                 genre_bits: Dict[int, int], columns: Dict[str, np.ndarray], created_at: float = 0.0):
+        self.facets: Dict[FacetKey, Dict[str, Any]] = {
+            (f["media_type"], f["genre_id"], f["country"], f["language"]): f for f in facets
+        }
+        self.items = items
+        self.genre_bits = genre_bits
+        self.columns = columns
+        self.created_at = created_at
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def load(cls, path: str) -> Optional["CatalogIndex"]:
+        """Load a snapshot directory, or return None if there is no usable snapshot"""
+        sidecar = os.path.join(path, "catalog.json")
+        if not os.path.exists(sidecar):
+            logger.info(f"No catalog snapshot at {path}, discover queries go to TMDB")
+            return None
+        try:
+            with open(sidecar) as f:
+                meta = json.load(f)
+            if meta.get("version") != SNAPSHOT_VERSION:
+                logger.warning(f"Ignoring catalog snapshot version {meta.get('version')}")
+                return None
+            columns = {
+                name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+                for name in COLUMNS
+            }
+            if any(len(column) != meta["rows"] for column in columns.values()):
+                logger.warning("Ignoring catalog snapshot with mismatched columns")
+                return None
+            genre_bits = {int(genre_id): bit for genre_id, bit in meta["genre_bits"].items()}
+            index = cls(meta["facets"], meta["items"], genre_bits, columns, meta.get("created_at", 0.0))
+            logger.info(f"Loaded catalog snapshot: {len(index.facets)} facets, {meta['rows']} rows")
+            return index
+        except Exception as e:
+            logger.error(f"Catalog snapshot load error: {e}")
+            return None
+
+    def discover(self, media_type: str, genre_ids: Optional[List[int]] = None, year: Optional[int] = None,
+                 country: Optional[str] = None, language: Optional[str] = None,
+                 page: int = 1) -> Optional[Dict[str, Any]]:
+        """Answer a discover query from the snapshot, or None if it must go to TMDB"""
+        genre_ids = genre_ids or []
+        candidates = [
+            self.facets[key] for key in
+            [(media_type, genre_id, country, language) for genre_id in [None] + genre_ids]
+            if key in self.facets
+        ]
+        required = 0
+        for genre_id in genre_ids:
+            if genre_id not in self.genre_bits:
+                candidates = []
+                break
+            required |= 1 << self.genre_bits[genre_id]
+        if not candidates:
+            self.misses += 1
+            return None
+
+        # The smallest matching facet has the fewest rows to filter
+        facet = min(candidates, key=lambda f: f["end"] - f["start"])
+        start, end = facet["start"], facet["end"]
+        mask = np.ones(end - start, dtype=bool)
+        if required:
+            mask &= (self.columns["genre_mask"][start:end] & np.uint64(required)) == np.uint64(required)
+        if year:
+            mask &= self.columns["year"][start:end] == year
+        matches = np.flatnonzero(mask)
+
+        first = (page - 1) * PAGE_SIZE
+        if not facet["complete"] and len(matches) < first + PAGE_SIZE:
+            # Titles past the ingested pages could belong on this page
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        rows = self.columns["item"][start:end][matches[first:first + PAGE_SIZE]]
+        filtered = bool(required & ~self._facet_bit(facet)) or bool(year)
+        total = len(matches) if filtered or facet["complete"] else facet["total_results"]
+        return {
+            "page": page,
+            "results": [self.items[row] for row in rows],
+            "total_results": total,
+            "total_pages": max(1, (total + PAGE_SIZE - 1) // PAGE_SIZE)
+        }
+
+    def _facet_bit(self, facet: Dict[str, Any]) -> int:
+        genre_id = facet["genre_id"]
+        return 1 << self.genre_bits[genre_id] if genre_id in self.genre_bits else 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "facets": len(self.facets),
+            "rows": len(self.columns["item"]),
+            "items": len(self.items),
+            "age_seconds": round(time.time() - self.created_at) if self.created_at else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def catalog_facets() -> List[Dict[str, Any]]:
+    """Discover queries extract_intent can lead to: one per genre and per country, for movies and TV"""
+    facets = []
+    for media_type in ("movie", "tv"):
+        for genre in GENRE_KEYWORDS:
+            facets.append({"media_type": media_type, "genre": genre, "country": None, "language": None})
+        for info in COUNTRY_KEYWORDS.values():
+            facets.append({"media_type": media_type, "genre": None,
+                           "country": info["country"], "language": info["language"]})
+    return facets
+
+
+async def ingest(tmdb, pages: int) -> Dict[str, Any]:
+    """Fetch every catalog facet through a TMDBClient, up to `pages` pages each"""
+    facets, items, rows = [], [], []
+    item_index: Dict[Tuple[str, str, int], int] = {}
+    seen: set = set()
+
+    for spec in catalog_facets():
+        media_type = spec["media_type"]
+        discover = tmdb.discover_movies if media_type == "movie" else tmdb.discover_tv_shows
+        genre_id = None
+        if spec["genre"]:
+            genre_ids = await tmdb.resolve_genre_ids([spec["genre"]], media_type)
+            if not genre_ids:
+                continue
+            genre_id = genre_ids[0]
+        key = (media_type, genre_id, spec["country"], spec["language"])
+        if key in seen:
+            # e.g. "sci-fi" and "fantasy" are the same TV genre
+            continue
+        seen.add(key)
+
+        start = len(rows)
+        total_results = 0
+        for page in range(1, pages + 1):
+            data = await discover(
+                genres=[spec["genre"]] if spec["genre"] else None,
+                country=spec["country"],
+                language=spec["language"],
+                page=page,
+                use_catalog=False
+            )
+            results = data.get("results", [])
+            if page == 1:
+                total_results = data.get("total_results", 0)
+            for item in results:
+                # Payloads depend on the display language, which follows the facet's language
+                ident = (media_type, spec["language"] or "en-US", item["id"])
+                if ident not in item_index:
+                    item_index[ident] = len(items)
+                    items.append(item)
+                rows.append(item_index[ident])
+            if len(results) < PAGE_SIZE or page >= data.get("total_pages", page):
+                break
+
+        if len(rows) == start:
+            # Failed or empty facet: leave it out so its queries still go to TMDB
+            logger.warning(f"Catalog facet {key} returned nothing, skipping")
+            continue
+        facets.append({
+            "media_type": media_type,
+            "genre_id": genre_id,
+            "country": spec["country"],
+            "language": spec["language"],
+            "start": start,
+            "end": len(rows),
+            "total_results": total_results,
+            "complete": len(rows) - start >= total_results
+        })
+        logger.info(f"Catalog facet {key}: {len(rows) - start} of {total_results} titles")
+
+    genre_ids = sorted({gid for media_type in ("movie", "tv") for gid in tmdb.genre_maps[media_type].values()})
+    if len(genre_ids) > 64:
+        logger.warning(f"{len(genre_ids)} genres don't fit the 64-bit mask, ignoring the rest")
+    genre_bits = {genre_id: bit for bit, genre_id in enumerate(genre_ids[:64])}
+    return {"facets": facets, "items": items, "rows": rows, "genre_bits": genre_bits}
+
+
+def write_snapshot(path: str, snapshot: Dict[str, Any]) -> None:
+    """Write an ingested snapshot; the sidecar goes last so readers never see half a snapshot"""
+    os.makedirs(path, exist_ok=True)
+    items, rows, genre_bits = snapshot["items"], snapshot["rows"], snapshot["genre_bits"]
+
+    masks = []
+    for item in items:
+        mask = 0
+        for genre_id in item.get("genre_ids", []):
+            if genre_id in genre_bits:
+                mask |= 1 << genre_bits[genre_id]
+        masks.append(mask)
+
+    columns = {
+        "popularity": [items[row].get("popularity") or 0.0 for row in rows],
+        "year": [release_year(items[row]) for row in rows],
+        "genre_mask": [masks[row] for row in rows],
+        "item": rows,
+    }
+    for name, dtype in COLUMNS.items():
+        tmp = os.path.join(path, f"{name}.npy.tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, np.asarray(columns[name], dtype=dtype))
+        os.replace(tmp, os.path.join(path, f"{name}.npy"))
+
+    meta = {
+        "version": SNAPSHOT_VERSION,
+        "created_at": time.time(),
+        "rows": len(rows),
+        "facets": snapshot["facets"],
+        "genre_bits": {str(genre_id): bit for genre_id, bit in genre_bits.items()},
+        "items": items,
+    }
+    tmp = os.path.join(path, "catalog.json.tmp")
+    with open(tmp, "w") as f:
+        json.dump(meta, f, separators=(",", ":"))
+    os.replace(tmp, os.path.join(path, "catalog.json"))
+
+
+async def _run_ingest(args) -> None:
+    # The API module owns the configured TMDB client (keys, rate limit, pool)
+    import main
+    main.http_pool.start()
+    try:
+        await main.tmdb_client.load_genre_maps()
+        snapshot = await ingest(main.tmdb_client, args.pages)
+        write_snapshot(args.out, snapshot)
+        logger.info(f"Wrote {len(snapshot['facets'])} facets, {len(snapshot['rows'])} rows to {args.out}")
+    finally:
+        await main.tmdb_client.close()
+        await main.http_pool.close()
+
+
+def main(argv: Optional[List[str]] = None):
+    from main import CATALOG_PATH
+    parser = argparse.ArgumentParser(description="Build the local catalog snapshot from TMDB")
+    parser.add_argument("--pages", type=int, default=5, help="Pages of 20 titles per facet")
+    parser.add_argument("--out", default=CATALOG_PATH)
+    args = parser.parse_args(argv)
+    asyncio.run(_run_ingest(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Fex TV Backend - Request deadline budgets
+One end-to-end time budget per request, shared by every upstream call it makes
+"""
+
+import contextvars
+import logging
+import time
+from contextvars import ContextVar
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RequestBudget:
+    """Time budget for one request.
+
+    `deadline` is a time.monotonic() timestamp. Upstream calls size their
+    timeouts from what's left, and optional work is skipped once less than
+    `reserve` seconds remain (that time is kept for assembling the response).
+    Anything cut short marks the budget partial so the response can say so.
+    """
+
+    def __init__(self, seconds: float, reserve: float = 0.0):
+        self.deadline = time.monotonic() + seconds
+        self.reserve = reserve
+        self.partial = False
+        self.skipped: List[str] = []
+
+    @classmethod
+    def from_header(cls, value: Optional[str], default: float, maximum: float,
+                    reserve: float = 0.0) -> "RequestBudget":
+        """Budget from a header in milliseconds, falling back to default and capped at maximum"""
+        try:
+            seconds = float(value) / 1000 if value else default
+        except ValueError:
+            seconds = default
+        return cls(max(0.0, min(seconds, maximum)), reserve)
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - time.monotonic())
+
+    def nearly_spent(self) -> bool:
+        return self.remaining() <= self.reserve
+
+    def mark_partial(self, step: str) -> None:
+        self.partial = True
+        if step not in self.skipped:
+            self.skipped.append(step)
+        logger.warning(f"Request budget: {step} cut short")
+
+
+# Budget of the request being served; None means no deadline (e.g. batch jobs)
+current_budget: ContextVar[Optional[RequestBudget]] = ContextVar("current_budget", default=None)
+
+
+def current_deadline() -> Optional[float]:
+    budget = current_budget.get()
+    return budget.deadline if budget is not None else None
+
+
+def mark_partial(step: str) -> None:
+    """Record that a step of the current request was skipped or cut short"""
+    budget = current_budget.get()
+    if budget is not None:
+        budget.mark_partial(step)
+
+
+def detached_context() -> contextvars.Context:
+    """Copy of the current context without the request budget.
+
+    For work that outlives the request starting it or is shared with other
+    requests (background cache refreshes, prefetches, coalesced upstream
+    calls): it keeps the caller's priority, but the caller's deadline must
+    not cut it short for everyone else.
+    """
+    context = contextvars.copy_context()
+    context.run(current_budget.set, None)
+    return context
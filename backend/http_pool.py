@@ -0,0 +1,156 @@
+"""
+Fex TV Backend - Shared HTTP connection pool
+One tuned httpx client shared by the TMDB and restaurant clients
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from ratelimit import DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401  (httpx needs it for HTTP/2)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class HostStats:
+    """Occupancy and wait-time counters for one upstream host"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.semaphore = asyncio.Semaphore(limit)
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.waits = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "requests": self.requests,
+            "waits": self.waits,
+            "wait_time_total_ms": round(self.wait_time_total * 1000, 2),
+            "wait_time_max_ms": round(self.wait_time_max * 1000, 2),
+        }
+
+
+class HTTPPool:
+    """Shared httpx.AsyncClient with per-host connection budgets.
+
+    httpx limits connections for the whole client; each upstream host also
+    gets its own budget so a slow host can't take every pooled connection.
+    The client is created by start() (from the app's startup hook), or on
+    first use by scripts that never run the app.
+    """
+
+    def __init__(self, max_connections: int = 100, max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 30.0, max_connections_per_host: int = 20,
+                 http2: bool = False, connect_timeout: float = 3.0, read_timeout: float = 10.0,
+                 write_timeout: float = 10.0, pool_timeout: float = 2.0,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.timeout = httpx.Timeout(
+            read_timeout,
+            connect=connect_timeout,
+            write=write_timeout,
+            pool=pool_timeout
+        )
+        if http2 and not HTTP2_AVAILABLE:
+            logger.warning("HTTP/2 requested but the h2 package is not installed, using HTTP/1.1")
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.max_connections_per_host = max_connections_per_host
+        self.transport = transport
+        self.client: Optional[httpx.AsyncClient] = None
+        self.hosts: Dict[str, HostStats] = {}
+
+    def start(self) -> None:
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=self.timeout,
+                http2=self.http2,
+                transport=self.transport
+            )
+
+    def _host(self, url: str) -> HostStats:
+        host = urlsplit(url).netloc
+        stats = self.hosts.get(host)
+        if stats is None:
+            stats = self.hosts[host] = HostStats(self.max_connections_per_host)
+        return stats
+
+    def _timeout_until(self, deadline: float) -> httpx.Timeout:
+        """The pool's timeouts, shortened so the request ends by deadline"""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded("Deadline passed before the request was sent")
+        return httpx.Timeout(
+            min(self.timeout.read, remaining),
+            connect=min(self.timeout.connect, remaining),
+            write=min(self.timeout.write, remaining),
+            pool=min(self.timeout.pool, remaining)
+        )
+
+    async def get(self, url: str, deadline: Optional[float] = None, **kwargs) -> httpx.Response:
+        """GET within the host's connection budget.
+
+        With a deadline (time.monotonic() timestamp) the request must finish
+        in the time left, and running out raises DeadlineExceeded rather than
+        a timeout error so it isn't mistaken for a slow upstream.
+        """
+        self.start()
+        if deadline is not None:
+            kwargs["timeout"] = self._timeout_until(deadline)
+        host = self._host(url)
+        started = time.monotonic()
+        async with host.semaphore:
+            waited = time.monotonic() - started
+            if waited > 0.001:
+                host.waits += 1
+                host.wait_time_total += waited
+                host.wait_time_max = max(host.wait_time_max, waited)
+            host.requests += 1
+            host.in_flight += 1
+            host.peak_in_flight = max(host.peak_in_flight, host.in_flight)
+            try:
+                if deadline is None:
+                    return await self.client.get(url, **kwargs)
+                # httpx timeouts apply per operation; also bound the request as a whole
+                return await asyncio.wait_for(self.client.get(url, **kwargs), deadline - time.monotonic())
+            except (httpx.TimeoutException, asyncio.TimeoutError) as e:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise DeadlineExceeded(f"Request budget ran out waiting for {urlsplit(url).netloc}") from e
+                raise
+            finally:
+                host.in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "keepalive_expiry": self.limits.keepalive_expiry,
+            "hosts": {host: stats.to_dict() for host, stats in self.hosts.items()},
+        }
+
+    async def close(self) -> None:
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
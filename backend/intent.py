@@ -0,0 +1,284 @@
+"""
+Fex TV Backend - Intent extraction
+Keyword and name-pattern based intent engine (simplified - will be replaced with Llama 3)
+
+All keyword tables are compiled at import time into one trie-shaped regex, so
+extract_intent classifies country, genre, mood, food and cuisine in a single
+scan of the text instead of one substring scan per keyword. Results are
+memoized in an LRU keyed on the normalized utterance.
+"""
+
+import os
+import re
+from typing import Any, Dict, List, Optional, Set
+
+from cache import LRUCache
+
+# Max number of normalized utterances whose intent is memoized
+INTENT_CACHE_SIZE = int(os.getenv("INTENT_CACHE_SIZE", "4096"))
+
+# Keyword tables. Order matters: the first matching country and cuisine win,
+# genres are reported in table order, and moods are checked top to bottom.
+FOOD_INDICATORS = ["food", "restaurant", "dinner", "lunch", "pizza", "burger", "sushi", "taco", "hungry", "eat", "meal", "snack"]
+
+COUNTRY_KEYWORDS = {
+    "korean": {"country": "KR", "language": "ko", "keywords": ["korean", "korea", "k-drama", "kdrama"]},
+    "japanese": {"country": "JP", "language": "ja", "keywords": ["japanese", "japan", "anime"]},
+    "chinese": {"country": "CN", "language": "zh", "keywords": ["chinese", "china", "mandarin"]},
+    "indian": {"country": "IN", "language": "hi", "keywords": ["indian", "india", "bollywood", "hindi"]},
+    "spanish": {"country": "ES", "language": "es", "keywords": ["spanish", "spain", "mexican"]},
+    "french": {"country": "FR", "language": "fr", "keywords": ["french", "france"]},
+    "german": {"country": "DE", "language": "de", "keywords": ["german", "germany"]},
+}
+
+GENRE_KEYWORDS = {
+    "action": ["action", "fight", "combat", "thriller", "adventure"],
+    "comedy": ["comedy", "funny", "humor", "laugh"],
+    "drama": ["drama", "emotional", "serious", "deep", "dramas"],
+    "horror": ["horror", "scary", "frightening", "terror"],
+    "sci-fi": ["sci-fi", "science fiction", "space", "future", "alien"],
+    "romance": ["romance", "romantic", "love", "relationship"],
+    "fantasy": ["fantasy", "magic", "wizard", "dragon"],
+    "crime": ["crime", "criminal", "gangster", "mafia"],
+    "mystery": ["mystery", "detective", "investigation", "suspense"]
+}
+
+MOOD_KEYWORDS = {
+    "uplifting": ["sad", "depressed", "down"],
+    "energetic": ["happy", "excited", "energetic"],
+    "calm": ["relax", "calm", "peaceful"],
+}
+
+FOOD_QUERY_KEYWORDS = [
+    "food", "restaurant", "restaurants", "dinner", "lunch", "breakfast",
+    "pizza", "burger", "sushi", "taco", "chinese", "italian", "mexican",
+    "delivery", "takeout", "order", "hungry", "eat", "eating", "meal",
+    "snack", "snacks", "tv dinner", "movie night food"
+]
+
+CUISINE_KEYWORDS = {
+    "pizza": ["pizza"],
+    "burger": ["burger", "burgers"],
+    "sushi": ["sushi", "japanese"],
+    "chinese": ["chinese"],
+    "italian": ["italian", "pasta"],
+    "mexican": ["mexican", "taco", "tacos"],
+    "thai": ["thai"],
+    "indian": ["indian", "curry"],
+    "korean": ["korean food", "korean restaurant"],
+    "fast food": ["fast food", "quick bite"]
+}
+
+# Words that disqualify a captured name from being an actor
+ACTOR_EXCLUDED_WORDS = ["food", "restaurant", "dinner", "pizza", "burger"]
+ACTOR_EXCLUDED_WORDS_TV = ACTOR_EXCLUDED_WORDS + ["tv"]
+
+COMMON_WORDS = {"I", "The", "A", "An", "Movies", "Movie", "Films", "Film",
+                "Shows", "Show", "Dramas", "Drama", "Korean", "Japanese",
+                "Chinese", "Action", "Comedy", "Horror", "Sci-fi", "Food",
+                "Restaurant", "Dinner", "TV", "Tv"}
+
+# Actor patterns, tried in order
+# Pattern 1: "with/starring/featuring [Name Name-Name]"
+ACTOR_PATTERN_WITH = re.compile(r'(?:with|starring|featuring)\s+([A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z-]+)+)')
+# Pattern 2: "movies/films/shows with [Name Name-Name]"
+ACTOR_PATTERN_MEDIA_WITH = re.compile(r'(?:movies?|films?|shows?|dramas?)\s+(?:with|starring|featuring)\s+([A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z-]+)+)')
+# Pattern 3: "[Name Name-Name] movies/films/shows"
+ACTOR_PATTERN_NAME_MEDIA = re.compile(r'([A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z-]+)+)\s+(?:movies?|films?|shows?|dramas?)')
+# Pattern 4: "show me [Name Name-Name]" or "find me [Name Name-Name]"
+ACTOR_PATTERN_SHOW_ME = re.compile(r'(?:show\s+me|find\s+me)\s+([A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z-]+)+)', re.IGNORECASE)
+# Fallback: any capitalized name sequence
+NAME_PATTERN = re.compile(r'\b([A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z-]+){1,2})\b')
+
+YEAR_PATTERN = re.compile(r'\b(19|20)\d{2}\b')
+
+# Whitespace and punctuation (other than hyphens and apostrophes) at either end of an utterance
+EDGE_PUNCTUATION_PATTERN = re.compile(r"^[^\w'-]+|[^\w'-]+$")
+# Two capitalized words in a row: the minimum any case-sensitive actor pattern needs
+ADJACENT_CAPITALS_PATTERN = re.compile(r'[A-Z]\w*\s+[A-Z]')
+
+
+def _trie_pattern(words: List[str]) -> str:
+    """Build a regex alternation shaped like a trie over words.
+
+    Shared prefixes are factored out so the regex engine only follows
+    branches that match the current character, and optional suffixes are
+    greedy, so each match is the longest keyword starting at that position.
+    """
+    trie: Dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def emit(node: Dict[str, Any]) -> str:
+        terminal = "" in node
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if terminal:
+            return "(?:" + body + ")?"
+        return body
+
+    return emit(trie)
+
+
+class KeywordAutomaton:
+    """Single-pass multi-keyword matcher over all intent keyword tables.
+
+    Every keyword maps to the (category, rank, label) tags it contributes.
+    scan() finds every keyword occurring anywhere in the text, with the same
+    substring semantics as `keyword in text` (so "drama" also fires inside
+    "dramas"), and returns the per-category matches.
+    """
+
+    def __init__(self, tables: Dict[str, List[tuple]]):
+        # tables: category -> [(label, [keywords]), ...] in priority order
+        self.tags: Dict[str, List[tuple]] = {}
+        for category, entries in tables.items():
+            for rank, (label, keywords) in enumerate(entries):
+                for keyword in keywords:
+                    self.tags.setdefault(keyword, []).append((category, rank, label))
+
+        keywords = sorted(self.tags)
+        # A match reports the longest keyword at a position; keywords that are
+        # prefixes of it start at the same position and must be credited too.
+        self.closure = {
+            keyword: [other for other in keywords if keyword.startswith(other)]
+            for keyword in keywords
+        }
+        self.pattern = re.compile("(?=(" + _trie_pattern(keywords) + "))")
+        self.categories = list(tables)
+
+    def scan(self, text_lower: str) -> Dict[str, Dict[int, str]]:
+        """Return {category: {rank: label}} for every keyword found in the text"""
+        found: Set[str] = set()
+        for match in self.pattern.finditer(text_lower):
+            found.update(self.closure[match.group(1)])
+
+        hits: Dict[str, Dict[int, str]] = {category: {} for category in self.categories}
+        for keyword in found:
+            for category, rank, label in self.tags[keyword]:
+                hits[category][rank] = label
+        return hits
+
+
+INTENT_AUTOMATON = KeywordAutomaton({
+    "food_indicator": [(word, [word]) for word in FOOD_INDICATORS],
+    "country": [(name, info["keywords"]) for name, info in COUNTRY_KEYWORDS.items()],
+    "genre": list(GENRE_KEYWORDS.items()),
+    "mood": list(MOOD_KEYWORDS.items()),
+    "food_query": [(word, [word]) for word in FOOD_QUERY_KEYWORDS],
+    "cuisine": list(CUISINE_KEYWORDS.items()),
+})
+
+
+def _first(ranked: Dict[int, str]) -> Optional[str]:
+    return ranked[min(ranked)] if ranked else None
+
+
+def _is_excluded(name: str, excluded_words: List[str]) -> bool:
+    name_lower = name.lower()
+    return any(word in name_lower for word in excluded_words)
+
+
+def extract_actor(text: str) -> Optional[str]:
+    """Find an actor name in the text using the ordered name patterns"""
+    for pattern, excluded_words in (
+        (ACTOR_PATTERN_WITH, ACTOR_EXCLUDED_WORDS),
+        (ACTOR_PATTERN_MEDIA_WITH, ACTOR_EXCLUDED_WORDS),
+        (ACTOR_PATTERN_NAME_MEDIA, ACTOR_EXCLUDED_WORDS),
+        (ACTOR_PATTERN_SHOW_ME, ACTOR_EXCLUDED_WORDS_TV),
+    ):
+        match = pattern.search(text)
+        if match:
+            potential_actor = match.group(1).strip()
+            # Make sure it's not a food-related phrase
+            if not _is_excluded(potential_actor, excluded_words):
+                return potential_actor
+
+    # If still no match, take the longest capitalized name sequence (but exclude food terms)
+    actor = None
+    for match in NAME_PATTERN.findall(text):
+        words = match.split()
+        # Skip if all words are common words or food-related
+        if not all(word in COMMON_WORDS for word in words):
+            if not _is_excluded(match, ACTOR_EXCLUDED_WORDS_TV):
+                if not actor or len(match) > len(actor):
+                    actor = match.strip()
+    return actor
+
+
+def normalize_utterance(text: str) -> str:
+    """Strip the utterance's ends and (where it can't matter) fold its case.
+
+    Only what can't change the intent is normalized: inner punctuation stays,
+    since the actor patterns must not match across a sentence break ("I
+    watched Parasite. Bong Joon-ho movies"). Case is only folded when no two
+    capitalized words are adjacent, because then none of the case-sensitive
+    actor patterns can match either way.
+    """
+    text = EDGE_PUNCTUATION_PATTERN.sub("", text)
+    if not ADJACENT_CAPITALS_PATTERN.search(text):
+        text = text.lower()
+    return text
+
+
+def compute_intent(text: str) -> Dict[str, Any]:
+    """Extract movie preferences from user text, without memoization"""
+    hits = INTENT_AUTOMATON.scan(text.lower())
+
+    # Actor detection - skip it if this is clearly a food query
+    actor = None
+    if not hits["food_indicator"]:
+        actor = extract_actor(text)
+
+    # Country/Language detection
+    country = None
+    language = None
+    country_name = _first(hits["country"])
+    if country_name:
+        country = COUNTRY_KEYWORDS[country_name]["country"]
+        language = COUNTRY_KEYWORDS[country_name]["language"]
+
+    # Genre detection
+    genres = [hits["genre"][rank] for rank in sorted(hits["genre"])]
+
+    # Year detection
+    year = None
+    year_match = YEAR_PATTERN.search(text)
+    if year_match:
+        year = int(year_match.group())
+
+    return {
+        "genres": genres if genres else None,
+        "year": year,
+        "mood": _first(hits["mood"]),
+        "country": country,
+        "language": language,
+        "actor": actor,
+        "is_food_query": bool(hits["food_query"]),
+        "food_type": _first(hits["cuisine"]),
+        "original_text": text
+    }
+
+
+intent_cache = LRUCache(INTENT_CACHE_SIZE)
+
+
+def extract_intent(text: str) -> Dict[str, Any]:
+    """Extract movie preferences from user text"""
+    key = normalize_utterance(text)
+    intent = intent_cache.get(key)
+    if intent is None:
+        intent = compute_intent(key)
+        intent_cache.set(key, intent)
+
+    # The cached dict is shared, hand each caller its own copy
+    result = dict(intent)
+    if result["genres"]:
+        result["genres"] = list(result["genres"])
+    result["original_text"] = text
+    return result
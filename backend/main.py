@@ -3,16 +3,43 @@ Fex TV Backend - FastAPI Server
 Voice-powered movie recommendation system
 """
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
-import httpx
 import os
 from dotenv import load_dotenv
 import json
 import logging
+import asyncio
+import time
+
+from cache import TTLCache, make_cache_key
+from shared_cache import Codec, SharedCache, create_backend
+from singleflight import SingleFlight
+from http_pool import HTTPPool
+from ratelimit import DeadlineExceeded, OutboundScheduler, Priority, current_priority, parse_retry_after
+from deadline import RequestBudget, current_budget, current_deadline, mark_partial
+from resilience import CircuitBreaker, Hedger, call_with_breaker
+from catalog import CatalogIndex
+from ranking import Candidates
+from people import PersonIndex
+from semantic import SemanticEngine
+from suggest import KINDS as SUGGEST_KINDS, SuggestIndex
+from prefetch import Prefetcher
+from restaurants import (
+    MOCK_RESTAURANTS, RestaurantIndex, format_business, geohash_center, geohash_encode, geohash_neighbors,
+    rank_by_distance
+)
+from planner import Branch, execute_plan, has_results
+from intent import extract_intent, intent_cache, normalize_utterance
+from responses import (
+    BROTLI_AVAILABLE, BrotliMiddleware, FastJSONResponse, SkipCompression, compact, json_response,
+    ndjson_response, parse_fields, project, project_batch, query_flag
+)
+from metrics import REGISTRY, STAGE_DURATION, UPSTREAM_DURATION, UPSTREAM_ERRORS, FALLBACKS, HTTP_DURATION
 
 load_dotenv()
 
@@ -20,7 +47,9 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Fex TV API", version="1.0.0")
+# Plain dict results are encoded with orjson; hot endpoints return
+# json_response() directly to also skip FastAPI's jsonable_encoder pass
+app = FastAPI(title="Fex TV API", version="1.0.0", default_response_class=FastJSONResponse)
 
 # CORS middleware
 app.add_middleware(
@@ -38,15 +67,211 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress responses of at least this many bytes: brotli when brotli-asgi is
+# installed (falling back to gzip for clients without br), otherwise gzip
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+
+def _streams_ndjson(scope: Dict[str, Any]) -> bool:
+    """NDJSON streams go out uncompressed so each line is sent as soon as it's ready"""
+    return scope["path"] == "/api/movies:batch" and query_flag(scope, "stream")
+
+if BROTLI_AVAILABLE:
+    app.add_middleware(SkipCompression, middleware=BrotliMiddleware, skip=_streams_ndjson,
+                       quality=4, minimum_size=RESPONSE_COMPRESSION_MIN_BYTES, gzip_fallback=True)
+else:
+    app.add_middleware(SkipCompression, middleware=GZipMiddleware, skip=_streams_ndjson,
+                       minimum_size=RESPONSE_COMPRESSION_MIN_BYTES, compresslevel=5)
+
+@app.middleware("http")
+async def record_request_duration(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    HTTP_DURATION.observe(
+        time.perf_counter() - started,
+        route=getattr(route, "path", "unmatched"),
+        method=request.method,
+        status=response.status_code
+    )
+    return response
+
 # TMDB API configuration
 TMDB_API_KEY = os.getenv("TMDB_API_KEY", "")
-TMDB_BASE_URL = "https://api.themoviedb.org/3"
+TMDB_BASE_URL = os.getenv("TMDB_BASE_URL", "https://api.themoviedb.org/3")
+
+# TMDB response cache: bounded LRU with per-endpoint TTLs (seconds). Entries
+# past their TTL are served stale for TMDB_CACHE_STALE_TTL more seconds while
+# a background task refreshes them.
+TMDB_CACHE_SIZE = int(os.getenv("TMDB_CACHE_SIZE", "2048"))
+TMDB_CACHE_DEFAULT_TTL = float(os.getenv("TMDB_CACHE_DEFAULT_TTL", "600"))
+TMDB_CACHE_STALE_TTL = float(os.getenv("TMDB_CACHE_STALE_TTL", "3600"))
+TMDB_CACHE_TTLS = {
+    "search_movies": 600,
+    "search_tv_shows": 600,
+    "discover_movies": 900,
+    "discover_tv_shows": 900,
+    "search_person": 3600,
+    "person_credits": 3600,
+    "movie_details": 3600,
+    "tv_details": 3600,
+}
+
+# /api/movies:batch limits
+DETAILS_BATCH_MAX_IDS = int(os.getenv("DETAILS_BATCH_MAX_IDS", "50"))
+DETAILS_BATCH_CONCURRENCY = int(os.getenv("DETAILS_BATCH_CONCURRENCY", "8"))
+
+# Prefetch details for the top PREFETCH_DETAILS_TOP_N recommendations of each
+# voice request into the response cache (0 disables). Prefetches run at the
+# lowest rate-limit priority and are cancelled while other requests queue.
+PREFETCH_DETAILS_TOP_N = int(os.getenv("PREFETCH_DETAILS_TOP_N", "0"))
+PREFETCH_MAX_CONCURRENT = int(os.getenv("PREFETCH_MAX_CONCURRENT", "4"))
+PREFETCH_MAX_PENDING = int(os.getenv("PREFETCH_MAX_PENDING", "32"))
+
+# Shared L2 cache behind the in-process caches, so workers and replicas share
+# upstream responses: "" (off), "memory://" (in-process fake) or a redis:// URL.
+# Values are serialized with CACHE_SERIALIZER (orjson or msgpack) and
+# zlib-compressed from CACHE_COMPRESS_MIN_BYTES up.
+CACHE_L2_URL = os.getenv("CACHE_L2_URL", "")
+CACHE_L2_TIMEOUT = float(os.getenv("CACHE_L2_TIMEOUT", "0.1"))
+CACHE_SERIALIZER = os.getenv("CACHE_SERIALIZER", "orjson")
+CACHE_COMPRESS = os.getenv("CACHE_COMPRESS", "true").lower() in ("1", "true", "yes")
+CACHE_COMPRESS_MIN_BYTES = int(os.getenv("CACHE_COMPRESS_MIN_BYTES", "1024"))
+
+# Yelp search results, cached per cuisine term and per location: the place
+# name, or for coordinates the geohash cell (YELP_GEOHASH_PRECISION 6 is about
+# 1.2 x 0.6 km) searched from its center, so nearby users share entries. A hit
+# in the last YELP_CACHE_REFRESH_AHEAD of the TTL refreshes in the background.
+YELP_CACHE_SIZE = int(os.getenv("YELP_CACHE_SIZE", "512"))
+YELP_CACHE_TTL = float(os.getenv("YELP_CACHE_TTL", "600"))
+YELP_CACHE_STALE_TTL = float(os.getenv("YELP_CACHE_STALE_TTL", "1800"))
+YELP_CACHE_REFRESH_AHEAD = float(os.getenv("YELP_CACHE_REFRESH_AHEAD", "0.2"))
+YELP_GEOHASH_PRECISION = int(os.getenv("YELP_GEOHASH_PRECISION", "6"))
+# Results fetched per cached search (Yelp's maximum), sliced to each request's limit
+YELP_SEARCH_LIMIT = 50
+
+# Outbound TMDB rate limit (requests/second and bucket size) and how long
+# each priority class may wait in line for a token before failing fast
+TMDB_RATE_LIMIT = float(os.getenv("TMDB_RATE_LIMIT", "40"))
+TMDB_RATE_BURST = int(os.getenv("TMDB_RATE_BURST", "40"))
+TMDB_RATE_LIMIT_RETRIES = int(os.getenv("TMDB_RATE_LIMIT_RETRIES", "1"))
+TMDB_QUEUE_TIMEOUT_INTERACTIVE = float(os.getenv("TMDB_QUEUE_TIMEOUT_INTERACTIVE", "2"))
+TMDB_QUEUE_TIMEOUT_BATCH = float(os.getenv("TMDB_QUEUE_TIMEOUT_BATCH", "30"))
+TMDB_QUEUE_TIMEOUT_PREFETCH = float(os.getenv("TMDB_QUEUE_TIMEOUT_PREFETCH", "5"))
+
+# Per-endpoint circuit breakers: an endpoint trips when BREAKER_ERROR_RATE of
+# its last BREAKER_WINDOW calls failed, or BREAKER_SLOW_RATE of them took longer
+# than BREAKER_SLOW_CALL_SECONDS. While open, calls fail immediately and callers
+# serve cached or fallback results; after BREAKER_OPEN_SECONDS one probe is let through.
+BREAKER_WINDOW = int(os.getenv("BREAKER_WINDOW", "20"))
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "10"))
+BREAKER_ERROR_RATE = float(os.getenv("BREAKER_ERROR_RATE", "0.5"))
+BREAKER_SLOW_CALL_SECONDS = float(os.getenv("BREAKER_SLOW_CALL_SECONDS", "3"))
+BREAKER_SLOW_RATE = float(os.getenv("BREAKER_SLOW_RATE", "0.8"))
+BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "30"))
+
+# Hedged TMDB requests: when a call runs past its endpoint's p95 latency, send
+# a duplicate and use whichever answers first (costs extra rate-limit tokens)
+TMDB_HEDGE_ENABLED = os.getenv("TMDB_HEDGE_ENABLED", "false").lower() in ("1", "true", "yes")
+TMDB_HEDGE_MIN_DELAY = float(os.getenv("TMDB_HEDGE_MIN_DELAY", "0.05"))
+
+# Local catalog snapshot (built with `python -m catalog`) answering discover
+# queries without calling TMDB; queries it can't answer exactly still go to TMDB
+CATALOG_PATH = os.getenv("CATALOG_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "catalog"))
+
+# Semantic recommendations for free-text queries (index built with
+# `python -m semantic` from the catalog snapshot). SEMANTIC_MODEL is a
+# sentence-transformers model, or "hashing" for the dependency-free embedder.
+SEMANTIC_INDEX_PATH = os.getenv("SEMANTIC_INDEX_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "semantic"))
+SEMANTIC_MODEL = os.getenv("SEMANTIC_MODEL", "all-MiniLM-L6-v2")
+SEMANTIC_BACKEND = os.getenv("SEMANTIC_BACKEND", "local")
+SEMANTIC_NPROBE = int(os.getenv("SEMANTIC_NPROBE", "8"))
+# Cosine similarity a match needs. Unrelated overviews commonly score 0.2-0.35
+# with all-MiniLM-L6-v2, so lower thresholds return loosely similar titles.
+SEMANTIC_MIN_SCORE = float(os.getenv("SEMANTIC_MIN_SCORE", "0.45"))
+# Utterances with at least this many words are treated as descriptions and
+# matched semantically before title search; shorter ones ("Inception") are
+# looked up as titles, with semantic matches only when search finds nothing.
+SEMANTIC_MIN_WORDS = int(os.getenv("SEMANTIC_MIN_WORDS", "4"))
+QDRANT_URL = os.getenv("QDRANT_URL", "")
+QDRANT_PATH = os.getenv("QDRANT_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "qdrant"))
+
+# Local index of popular people (built with `python -m people` from TMDB's
+# daily person export and /person/popular) that resolves actor names in-process
+# with fuzzy matching; names it doesn't know still go to TMDB's /search/person.
+PEOPLE_PATH = os.getenv("PEOPLE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "people"))
+PEOPLE_MIN_SCORE = float(os.getenv("PEOPLE_MIN_SCORE", "0.6"))
+# Filmographies change slowly; cached long enough that repeat actor queries
+# resolved from the index make no upstream calls at all
+TMDB_CACHE_TTLS["person_credits"] = float(os.getenv("PERSON_CREDITS_TTL", "86400"))
+
+# /api/suggest completions per request (the index is built at startup from the
+# catalog and people snapshots plus the genre keywords)
+SUGGEST_MAX_LIMIT = int(os.getenv("SUGGEST_MAX_LIMIT", "20"))
+
+# Genre lists are loaded once at startup and refreshed in the background
+GENRE_REFRESH_INTERVAL = float(os.getenv("GENRE_REFRESH_INTERVAL", "86400"))
+# Cached for half the refresh interval so each refresh sees a recent list
+TMDB_CACHE_TTLS["genres"] = GENRE_REFRESH_INTERVAL / 2
+
+# extract_intent genre names that don't match a TMDB genre name directly.
+# TV uses combined genres ("Action & Adventure", "Sci-Fi & Fantasy").
+GENRE_ALIASES = {
+    "sci-fi": ["science fiction", "sci-fi & fantasy"],
+    "action": ["action & adventure"],
+    "fantasy": ["sci-fi & fantasy"],
+    "adventure": ["action & adventure"],
+}
 
 # Restaurant/Food API configuration
 YELP_API_KEY = os.getenv("YELP_API_KEY", "")
-YELP_BASE_URL = "https://api.yelp.com/v3"
+YELP_BASE_URL = os.getenv("YELP_BASE_URL", "https://api.yelp.com/v3")
 GOOGLE_PLACES_API_KEY = os.getenv("GOOGLE_PLACES_API_KEY", "")
 
+# Restaurant index: food queries for RESTAURANT_INDEX_LOCATION (or coordinates
+# near it) are answered from an in-memory snapshot of Yelp results, one search
+# per RESTAURANT_INDEX_TERMS term, rebuilt every RESTAURANT_INDEX_REFRESH seconds.
+# Without a Yelp key the mock restaurants are indexed instead.
+RESTAURANT_INDEX_ENABLED = os.getenv("RESTAURANT_INDEX_ENABLED", "true").lower() in ("1", "true", "yes")
+RESTAURANT_INDEX_LOCATION = os.getenv("RESTAURANT_INDEX_LOCATION", "New York")
+RESTAURANT_INDEX_TERMS = [
+    term.strip() for term in os.getenv(
+        "RESTAURANT_INDEX_TERMS", "restaurants,pizza,sushi,burgers,thai,mexican,indian,chinese,italian,wings"
+    ).split(",") if term.strip()
+]
+RESTAURANT_INDEX_REFRESH = float(os.getenv("RESTAURANT_INDEX_REFRESH", "3600"))
+
+# Shared upstream HTTP pool (seconds for timeouts/expiry)
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "40"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "32"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "false").lower() in ("1", "true", "yes")
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+HTTP_WRITE_TIMEOUT = float(os.getenv("HTTP_WRITE_TIMEOUT", "10"))
+HTTP_POOL_TIMEOUT = float(os.getenv("HTTP_POOL_TIMEOUT", "2"))
+
+# Recommendation plans start a fallback branch (e.g. text search behind
+# discover) only when the branch ahead of it fails, comes back empty, or has
+# not answered within this many seconds. Cached answers arrive well inside it.
+PLAN_FALLBACK_DELAY = float(os.getenv("PLAN_FALLBACK_DELAY", "0.3"))
+
+# Batch voice processing
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "16"))
+
+# Streaming voice: speculation starts once this many consecutive partial
+# transcripts produce the same recommendation plan
+WS_STABLE_PARTIALS = int(os.getenv("WS_STABLE_PARTIALS", "2"))
+
+# End-to-end budget for a voice request (milliseconds). Clients may ask for a
+# different budget with the X-Request-Budget-Ms header, capped at the max.
+# Optional fallbacks are skipped once less than the reserve is left.
+REQUEST_BUDGET_HEADER = "X-Request-Budget-Ms"
+REQUEST_BUDGET = float(os.getenv("REQUEST_BUDGET_MS", "8000")) / 1000
+REQUEST_BUDGET_MAX = float(os.getenv("REQUEST_BUDGET_MAX_MS", "30000")) / 1000
+REQUEST_BUDGET_RESERVE = float(os.getenv("REQUEST_BUDGET_RESERVE_MS", "150")) / 1000
+
 # Request models
 class VoiceInput(BaseModel):
     text: str
@@ -58,62 +283,151 @@ class RecommendationRequest(BaseModel):
     year: Optional[int] = None
     limit: int = 10
 
+def new_breaker(name: str) -> CircuitBreaker:
+    return CircuitBreaker(
+        name,
+        window=BREAKER_WINDOW,
+        min_calls=BREAKER_MIN_CALLS,
+        error_rate=BREAKER_ERROR_RATE,
+        slow_call_seconds=BREAKER_SLOW_CALL_SECONDS,
+        slow_rate=BREAKER_SLOW_RATE,
+        open_seconds=BREAKER_OPEN_SECONDS
+    )
+
 # TMDB API client
 class TMDBClient:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, http: HTTPPool, cache: Optional[TTLCache] = None,
+                 shared: Optional[SharedCache] = None):
         self.api_key = api_key
         self.base_url = TMDB_BASE_URL
-        self.session = httpx.AsyncClient(timeout=10.0)
+        self.http = http
+        self.cache = cache if cache is not None else TTLCache(
+            maxsize=TMDB_CACHE_SIZE,
+            default_ttl=TMDB_CACHE_DEFAULT_TTL,
+            stale_ttl=TMDB_CACHE_STALE_TTL,
+            shared=shared
+        )
+        self.flights = SingleFlight()
+        self.scheduler = OutboundScheduler(
+            rate=TMDB_RATE_LIMIT,
+            burst=TMDB_RATE_BURST,
+            max_wait={
+                Priority.INTERACTIVE: TMDB_QUEUE_TIMEOUT_INTERACTIVE,
+                Priority.BATCH: TMDB_QUEUE_TIMEOUT_BATCH,
+                Priority.PREFETCH: TMDB_QUEUE_TIMEOUT_PREFETCH
+            }
+        )
+        # endpoint name -> breaker, created on first use
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.hedger = Hedger()
+        # Loaded at startup when a snapshot exists
+        self.catalog: Optional[CatalogIndex] = None
+        self.people: Optional[PersonIndex] = None
+        # media type -> {genre name: id}, as returned by TMDB
+        self.genre_maps: Dict[str, Dict[str, int]] = {"movie": {}, "tv": {}}
+        # media type -> {lowercase name or alias: id}, used to resolve intent genres
+        self._genre_lookup: Dict[str, Dict[str, int]] = {"movie": {}, "tv": {}}
+        self._genre_lock = asyncio.Lock()
+        self._genre_refresh_task: Optional[asyncio.Task] = None
     
-    async def search_movies(self, query: str, page: int = 1) -> Dict[str, Any]:
-        """Search movies by query"""
+    async def _get(self, endpoint: str, path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """GET a TMDB path through the response cache (results are shared, treat as read-only)"""
+        key = make_cache_key(path, params)
         try:
-            url = f"{self.base_url}/search/movie"
-            params = {
-                "api_key": self.api_key,
-                "query": query,
-                "page": page,
-                "language": "en-US"
-            }
-            response = await self.session.get(url, params=params)
+            return await self.cache.get_or_fetch(
+                key,
+                lambda: self.flights.do(key, lambda: self._fetch(path, params, endpoint)),
+                ttl=TMDB_CACHE_TTLS.get(endpoint)
+            )
+        except Exception as e:
+            if isinstance(e, DeadlineExceeded):
+                mark_partial(endpoint)
+            # Upstream failing or breaker open: an expired answer beats an empty one
+            cached = self.cache.get(key, allow_expired=True)
+            if cached is None:
+                raise
+            FALLBACKS.inc(path="expired_cache")
+            return cached
+    
+    def _breaker(self, endpoint: str) -> CircuitBreaker:
+        breaker = self.breakers.get(endpoint)
+        if breaker is None:
+            breaker = self.breakers[endpoint] = new_breaker(f"tmdb:{endpoint}")
+        return breaker
+    
+    async def _fetch(self, path: str, params: Dict[str, Any], endpoint: str) -> Dict[str, Any]:
+        """GET a TMDB path through the endpoint's circuit breaker, hedging slow calls"""
+        breaker = self._breaker(endpoint)
+        delay = None
+        if TMDB_HEDGE_ENABLED:
+            p95 = breaker.p95()
+            if p95 is not None:
+                delay = max(p95, TMDB_HEDGE_MIN_DELAY)
+        return await call_with_breaker(
+            breaker,
+            lambda: self.hedger.run(lambda: self._send(path, params, endpoint), delay)
+        )
+    
+    async def _send(self, path: str, params: Dict[str, Any], endpoint: str) -> Dict[str, Any]:
+        """GET a TMDB path within the rate limit, raising on HTTP errors"""
+        deadline = current_deadline()
+        for attempt in range(TMDB_RATE_LIMIT_RETRIES + 1):
+            await self.scheduler.acquire(deadline=deadline)
+            with UPSTREAM_DURATION.time(service="tmdb", endpoint=endpoint):
+                response = await self.http.get(
+                    f"{self.base_url}{path}",
+                    deadline=deadline,
+                    params={"api_key": self.api_key, **params}
+                )
+            if response.status_code == 429 and attempt < TMDB_RATE_LIMIT_RETRIES:
+                # Hold every queued request until TMDB's Retry-After, then try again
+                self.scheduler.pause(parse_retry_after(response.headers.get("Retry-After")))
+                continue
             response.raise_for_status()
             return response.json()
-        except Exception as e:
-            logger.error(f"TMDB search error: {e}")
-            return {"results": [], "total_results": 0}
+    
+    def _details_request(self, media_type: str, item_id: int) -> tuple:
+        params = {
+            "language": "en-US",
+            "append_to_response": "videos,credits"
+        }
+        return f"/{media_type}/{item_id}", params
     
     async def get_movie_details(self, movie_id: int) -> Dict[str, Any]:
         """Get detailed movie information"""
+        return await self.get_details("movie", movie_id)
+    
+    async def get_tv_details(self, tv_id: int) -> Dict[str, Any]:
+        """Get detailed TV show information"""
+        return await self.get_details("tv", tv_id)
+    
+    async def get_details(self, media_type: str, item_id: int) -> Dict[str, Any]:
+        """Details with videos and credits for a movie or TV show ({} on failure)"""
+        endpoint = f"{media_type}_details"
         try:
-            url = f"{self.base_url}/movie/{movie_id}"
-            params = {
-                "api_key": self.api_key,
-                "language": "en-US",
-                "append_to_response": "videos,credits"
-            }
-            response = await self.session.get(url, params=params)
-            response.raise_for_status()
-            return response.json()
+            return await self._get(endpoint, *self._details_request(media_type, item_id))
         except Exception as e:
+            UPSTREAM_ERRORS.inc(service="tmdb", endpoint=endpoint)
             logger.error(f"TMDB details error: {e}")
             return {}
     
+    def has_details(self, media_type: str, item_id: int) -> bool:
+        """Whether details can be served from the response cache without waiting"""
+        return self.cache.has(make_cache_key(*self._details_request(media_type, item_id)))
+    
     async def discover_movies(self, genres: List[str] = None, year: int = None, page: int = 1, 
-                             country: str = None, language: str = None) -> Dict[str, Any]:
+                             country: str = None, language: str = None, use_catalog: bool = True) -> Dict[str, Any]:
         """Discover movies by genre, year, country, and language"""
         try:
-            url = f"{self.base_url}/discover/movie"
             params = {
-                "api_key": self.api_key,
                 "language": language if language else "en-US",
                 "sort_by": "popularity.desc",
                 "page": page
             }
             
+            genre_ids = []
             if genres:
-                # Get genre IDs from names
-                genre_map = await self.get_genre_map()
-                genre_ids = [genre_map.get(g.lower(), "") for g in genres if genre_map.get(g.lower())]
+                genre_ids = await self.resolve_genre_ids(genres, "movie")
                 if genre_ids:
                     params["with_genres"] = ",".join(map(str, genre_ids))
             
@@ -127,62 +441,58 @@ class TMDBClient:
             if language:
                 params["with_original_language"] = language
             
-            response = await self.session.get(url, params=params)
-            response.raise_for_status()
-            return response.json()
+            if use_catalog and self.catalog is not None:
+                local = self.catalog.discover("movie", genre_ids, year, country, language, page)
+                if local is not None:
+                    return local
+            
+            return await self._get("discover_movies", "/discover/movie", params)
         except Exception as e:
+            UPSTREAM_ERRORS.inc(service="tmdb", endpoint="discover_movies")
             logger.error(f"TMDB discover error: {e}")
             return {"results": [], "total_results": 0}
     
     async def search_movies(self, query: str, page: int = 1, language: str = None) -> Dict[str, Any]:
         """Search movies by query with optional language filter"""
         try:
-            url = f"{self.base_url}/search/movie"
             params = {
-                "api_key": self.api_key,
                 "query": query,
                 "page": page,
                 "language": language if language else "en-US"
             }
-            response = await self.session.get(url, params=params)
-            response.raise_for_status()
-            return response.json()
+            return await self._get("search_movies", "/search/movie", params)
         except Exception as e:
+            UPSTREAM_ERRORS.inc(service="tmdb", endpoint="search_movies")
             logger.error(f"TMDB search error: {e}")
             return {"results": [], "total_results": 0}
     
     async def search_tv_shows(self, query: str, page: int = 1, language: str = None) -> Dict[str, Any]:
         """Search TV shows by query with optional language filter"""
         try:
-            url = f"{self.base_url}/search/tv"
             params = {
-                "api_key": self.api_key,
                 "query": query,
                 "page": page,
                 "language": language if language else "en-US"
             }
-            response = await self.session.get(url, params=params)
-            response.raise_for_status()
-            return response.json()
+            return await self._get("search_tv_shows", "/search/tv", params)
         except Exception as e:
+            UPSTREAM_ERRORS.inc(service="tmdb", endpoint="search_tv_shows")
             logger.error(f"TMDB TV search error: {e}")
             return {"results": [], "total_results": 0}
     
     async def discover_tv_shows(self, genres: List[str] = None, year: int = None, page: int = 1,
-                               country: str = None, language: str = None) -> Dict[str, Any]:
+                               country: str = None, language: str = None, use_catalog: bool = True) -> Dict[str, Any]:
         """Discover TV shows by genre, year, country, and language"""
         try:
-            url = f"{self.base_url}/discover/tv"
             params = {
-                "api_key": self.api_key,
                 "language": language if language else "en-US",
                 "sort_by": "popularity.desc",
                 "page": page
             }
             
+            genre_ids = []
             if genres:
-                genre_map = await self.get_genre_map()
-                genre_ids = [genre_map.get(g.lower(), "") for g in genres if genre_map.get(g.lower())]
+                genre_ids = await self.resolve_genre_ids(genres, "tv")
                 if genre_ids:
                     params["with_genres"] = ",".join(map(str, genre_ids))
             
@@ -195,431 +505,540 @@ class TMDBClient:
             if language:
                 params["with_original_language"] = language
             
-            response = await self.session.get(url, params=params)
-            response.raise_for_status()
-            return response.json()
+            if use_catalog and self.catalog is not None:
+                local = self.catalog.discover("tv", genre_ids, year, country, language, page)
+                if local is not None:
+                    return local
+            
+            return await self._get("discover_tv_shows", "/discover/tv", params)
         except Exception as e:
+            UPSTREAM_ERRORS.inc(service="tmdb", endpoint="discover_tv_shows")
             logger.error(f"TMDB TV discover error: {e}")
             return {"results": [], "total_results": 0}
     
-    async def get_genre_map(self) -> Dict[str, int]:
+    async def load_genre_maps(self) -> None:
+        """Fetch the movie and TV genre lists and rebuild the in-memory lookups"""
+        for media_type in ("movie", "tv"):
+            try:
+                data = await self._get("genres", f"/genre/{media_type}/list", {"language": "en-US"})
+                genre_map = {genre["name"].lower(): genre["id"] for genre in data.get("genres", [])}
+            except Exception as e:
+                # Keep the previous map (if any) when a refresh fails
+                UPSTREAM_ERRORS.inc(service="tmdb", endpoint="genres")
+                logger.error(f"Genre map error ({media_type}): {e}")
+                continue
+            
+            lookup = dict(genre_map)
+            for name, aliases in GENRE_ALIASES.items():
+                if name in lookup:
+                    continue
+                for alias in aliases:
+                    if alias in genre_map:
+                        lookup[name] = genre_map[alias]
+                        break
+            
+            self.genre_maps[media_type] = genre_map
+            self._genre_lookup[media_type] = lookup
+            logger.info(f"Loaded {len(genre_map)} {media_type} genres")
+    
+    async def _ensure_genre_maps(self, media_type: str) -> None:
+        """Load genre maps on first use if startup loading didn't happen or failed"""
+        if self._genre_lookup[media_type]:
+            return
+        async with self._genre_lock:
+            if not self._genre_lookup[media_type]:
+                await self.load_genre_maps()
+    
+    async def _refresh_genre_maps(self) -> None:
+        while True:
+            await asyncio.sleep(GENRE_REFRESH_INTERVAL)
+            await self.load_genre_maps()
+    
+    def start_genre_refresh(self) -> None:
+        """Start the periodic background refresh of the genre maps"""
+        if self._genre_refresh_task is None or self._genre_refresh_task.done():
+            self._genre_refresh_task = asyncio.create_task(self._refresh_genre_maps())
+    
+    async def resolve_genre_ids(self, genres: List[str], media_type: str = "movie") -> List[int]:
+        """Resolve genre names (e.g. "sci-fi") to TMDB genre IDs for a media type"""
+        await self._ensure_genre_maps(media_type)
+        lookup = self._genre_lookup[media_type]
+        genre_ids = []
+        for genre in genres:
+            genre_id = lookup.get(genre.lower())
+            if genre_id and genre_id not in genre_ids:
+                genre_ids.append(genre_id)
+        return genre_ids
+    
+    async def get_genre_map(self, media_type: str = "movie") -> Dict[str, int]:
         """Get genre name to ID mapping"""
-        try:
-            url = f"{self.base_url}/genre/movie/list"
-            params = {"api_key": self.api_key, "language": "en-US"}
-            response = await self.session.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            return {genre["name"].lower(): genre["id"] for genre in data.get("genres", [])}
-        except Exception as e:
-            logger.error(f"Genre map error: {e}")
-            return {}
+        await self._ensure_genre_maps(media_type)
+        return self.genre_maps[media_type]
     
     async def search_person(self, query: str) -> Dict[str, Any]:
         """Search for actors/people"""
         try:
-            url = f"{self.base_url}/search/person"
             params = {
-                "api_key": self.api_key,
                 "query": query,
                 "language": "en-US"
             }
-            response = await self.session.get(url, params=params)
-            response.raise_for_status()
-            return response.json()
+            return await self._get("search_person", "/search/person", params)
         except Exception as e:
+            UPSTREAM_ERRORS.inc(service="tmdb", endpoint="search_person")
             logger.error(f"Person search error: {e}")
             return {"results": [], "total_results": 0}
     
+    async def resolve_person(self, name: str) -> Optional[Dict[str, Any]]:
+        """Best match for a spoken actor name: the local people index, then TMDB search"""
+        if self.people is not None:
+            person = self.people.resolve(name, PEOPLE_MIN_SCORE)
+            if person is not None:
+                return person
+        results = (await self.search_person(name)).get("results", [])
+        return results[0] if results else None
+    
     async def get_person_movies(self, person_id: int, include_tv: bool = True) -> Dict[str, Any]:
         """Get movies and TV shows for a person"""
         try:
-            url = f"{self.base_url}/person/{person_id}/combined_credits"
-            params = {
-                "api_key": self.api_key,
-                "language": "en-US"
-            }
-            response = await self.session.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            # Combine movies and TV shows, sort by popularity
-            all_credits = []
-            if include_tv:
-                all_credits.extend(data.get("cast", []))
-            else:
-                all_credits.extend([item for item in data.get("cast", []) if item.get("media_type") == "movie"])
+            data = await self._get("person_credits", f"/person/{person_id}/combined_credits", {"language": "en-US"})
             
-            # Sort by popularity
-            all_credits.sort(key=lambda x: x.get("popularity", 0), reverse=True)
+            # Combine movies and TV shows, top 20 by popularity
+            credits = Candidates(data.get("cast", []))
+            mask = None if include_tv else credits.match(media_type="movie")
             
             return {
-                "results": all_credits[:20],  # Top 20
-                "total_results": len(all_credits)
+                "results": credits.top_k(20, mask),
+                "total_results": len(credits) if mask is None else int(mask.sum())
             }
         except Exception as e:
+            UPSTREAM_ERRORS.inc(service="tmdb", endpoint="person_credits")
             logger.error(f"Person movies error: {e}")
             return {"results": [], "total_results": 0}
     
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "cache": self.cache.stats(),
+            "single_flight": self.flights.stats(),
+            "scheduler": self.scheduler.stats(),
+            "breakers": {name: breaker.stats() for name, breaker in self.breakers.items()},
+            "catalog": self.catalog.stats() if self.catalog is not None else None,
+            "people": self.people.stats() if self.people is not None else None,
+            "hedging": self.hedger.stats()
+        }
+    
     async def close(self):
-        await self.session.aclose()
+        if self._genre_refresh_task:
+            self._genre_refresh_task.cancel()
+        await self.cache.close()
+        await self.scheduler.close()
 
 # Restaurant/Food API Client
 class RestaurantClient:
-    def __init__(self, yelp_api_key: str = "", google_api_key: str = ""):
+    def __init__(self, http: HTTPPool, yelp_api_key: str = "", google_api_key: str = "",
+                 shared: Optional[SharedCache] = None):
         self.yelp_api_key = yelp_api_key
         self.google_api_key = google_api_key
-        self.session = httpx.AsyncClient(timeout=10.0)
+        self.http = http
+        self.cache = TTLCache(
+            maxsize=YELP_CACHE_SIZE,
+            default_ttl=YELP_CACHE_TTL,
+            stale_ttl=YELP_CACHE_STALE_TTL,
+            shared=shared,
+            refresh_ahead=YELP_CACHE_REFRESH_AHEAD
+        )
+        self.neighbor_hits = 0
+        self.flights = SingleFlight()
+        self.breaker = new_breaker("yelp:businesses_search")
+        self.mock_index = RestaurantIndex(MOCK_RESTAURANTS, "New York")
+        # Yelp snapshot for RESTAURANT_INDEX_LOCATION, swapped in whole by the refresh task
+        self.index: Optional[RestaurantIndex] = None
+        self._index_task: Optional[asyncio.Task] = None
     
     async def search_restaurants(self, location: str = "New York", term: str = "restaurant", 
-                                 limit: int = 20) -> List[Dict[str, Any]]:
-        """Search for nearby restaurants using Yelp API"""
+                                 limit: int = 20, latitude: Optional[float] = None,
+                                 longitude: Optional[float] = None,
+                                 radius_miles: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Search for nearby restaurants, from the local index when it covers the location.
+        
+        With coordinates, results are the nearest first (within radius_miles if
+        given) and carry their distance from there.
+        """
+        food_term = term if term and term.lower() not in ("restaurant", "restaurants") else None
         if not self.yelp_api_key:
-            # Return mock data if no API key
-            restaurants = self._get_mock_restaurants()
-            # Filter by food type if specified
-            if term and term != "restaurant":
-                filtered = [r for r in restaurants if any(term.lower() in cat.lower() for cat in r.get("categories", []))]
-                return filtered if filtered else restaurants[:6]  # Return filtered or first 6
-            return restaurants
+            # Mock data if no API key; unknown food types still get something to show
+            restaurants = self.mock_index.search(food_term, latitude, longitude, radius_miles, limit)
+            return restaurants or self._get_mock_restaurants()[:6]
+        
+        index = self.index
+        if index is not None and index.covers(location, latitude, longitude):
+            restaurants = index.search(food_term, latitude, longitude, radius_miles, limit)
+            # The index only holds what its own terms' searches returned, so for
+            # other food types it's a full page or nothing
+            if restaurants and (food_term is None or self._indexed(food_term) or len(restaurants) >= limit):
+                return restaurants
         
         try:
-            url = f"{YELP_BASE_URL}/businesses/search"
-            headers = {"Authorization": f"Bearer {self.yelp_api_key}"}
-            params = {
-                "term": term,
-                "location": location,
-                "limit": limit,
-                "sort_by": "rating"
-            }
-            response = await self.session.get(url, headers=headers, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            restaurants = []
-            for business in data.get("businesses", []):
-                # Calculate distance (convert meters to miles)
-                distance_miles = (business.get("distance", 0) / 1609.34) if business.get("distance") else None
-                
-                restaurants.append({
-                    "id": business.get("id"),
-                    "name": business.get("name"),
-                    "image_url": business.get("image_url"),
-                    "rating": business.get("rating"),
-                    "price": business.get("price", "$$"),
-                    "categories": [cat.get("title") for cat in business.get("categories", [])],
-                    "address": ", ".join(business.get("location", {}).get("display_address", [])),
-                    "distance": round(distance_miles, 1) if distance_miles else None,
-                    "delivery_time": self._estimate_delivery_time(distance_miles),
-                    "phone": business.get("display_phone"),
-                    "url": business.get("url"),
-                    "is_closed": business.get("is_closed", False)
-                })
-            
-            return restaurants
+            term = (food_term or "restaurants").strip().lower()
+            if latitude is None or longitude is None:
+                restaurants = await self._cached_search(self._search_params(term, location=location))
+                return restaurants[:limit]
+            restaurants = await self._bucket_search(geohash_encode(latitude, longitude, YELP_GEOHASH_PRECISION), term)
+            return rank_by_distance(restaurants, latitude, longitude, radius_miles, limit)
         except Exception as e:
+            if isinstance(e, DeadlineExceeded):
+                mark_partial("restaurants")
+            UPSTREAM_ERRORS.inc(service="yelp", endpoint="businesses_search")
             logger.error(f"Yelp API error: {e}")
             # Return mock data on error
             return self._get_mock_restaurants()
     
-    def _estimate_delivery_time(self, distance_miles: float = None) -> str:
-        """Estimate delivery time based on distance"""
-        if not distance_miles:
-            return "25-35 min"
-        if distance_miles < 1:
-            return "15-25 min"
-        elif distance_miles < 3:
-            return "25-35 min"
-        elif distance_miles < 5:
-            return "35-45 min"
-        else:
-            return "45-60 min"
+    def _indexed(self, term: str) -> bool:
+        """Whether the index was built with a search for term ("burger" is in "burgers")"""
+        term = term.strip().lower()
+        return any(term in indexed.lower() for indexed in RESTAURANT_INDEX_TERMS)
+    
+    def _search_params(self, term: str, **where: Any) -> Dict[str, Any]:
+        return dict(where, term=term, limit=YELP_SEARCH_LIMIT, sort_by="rating")
+    
+    def _bucket_params(self, bucket: str, term: str) -> Dict[str, Any]:
+        latitude, longitude = geohash_center(bucket)
+        return self._search_params(term, latitude=round(latitude, 5), longitude=round(longitude, 5))
+    
+    async def _cached_search(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Formatted Yelp results for a search, through the cache and single-flight"""
+        key = make_cache_key("/businesses/search", params)
+        
+        async def fetch() -> List[Dict[str, Any]]:
+            data = await call_with_breaker(self.breaker, lambda: self._fetch_businesses(params))
+            return [format_business(business) for business in data.get("businesses", [])]
+        
+        return await self.cache.get_or_fetch(key, lambda: self.flights.do(key, fetch))
+    
+    async def _bucket_search(self, bucket: str, term: str) -> List[Dict[str, Any]]:
+        """Yelp results for a geohash cell, borrowing an adjacent cell's on a miss"""
+        params = self._bucket_params(bucket, term)
+        if not self.cache.has(make_cache_key("/businesses/search", params)):
+            # A cell ~1 km away returns nearly the same businesses and callers
+            # re-rank by distance, which beats spending Yelp quota
+            for neighbor in geohash_neighbors(bucket):
+                neighbor_params = self._bucket_params(neighbor, term)
+                if self.cache.has(make_cache_key("/businesses/search", neighbor_params)):
+                    self.neighbor_hits += 1
+                    return await self._cached_search(neighbor_params)
+        return await self._cached_search(params)
+    
+    async def _fetch_businesses(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Call Yelp /businesses/search, raising on HTTP errors"""
+        url = f"{YELP_BASE_URL}/businesses/search"
+        headers = {"Authorization": f"Bearer {self.yelp_api_key}"}
+        with UPSTREAM_DURATION.time(service="yelp", endpoint="businesses_search"):
+            response = await self.http.get(url, deadline=current_deadline(), headers=headers, params=params)
+        response.raise_for_status()
+        return response.json()
     
     def _get_mock_restaurants(self) -> List[Dict[str, Any]]:
-        """Return mock restaurant data for demo"""
-        return [
-            {
-                "id": "mock1",
-                "name": "Pizza Palace",
-                "image_url": "https://images.unsplash.com/photo-1513104890138-7c749659a591?w=400",
-                "rating": 4.5,
-                "price": "$$",
-                "categories": ["Pizza", "Italian", "Fast Food"],
-                "address": "123 Main St, New York, NY",
-                "distance": 0.8,
-                "delivery_time": "20-30 min",
-                "phone": "(555) 123-4567",
-                "url": "#",
-                "is_closed": False
-            },
-            {
-                "id": "mock2",
-                "name": "Sushi Express",
-                "image_url": "https://images.unsplash.com/photo-1579584425555-c3ce17fd4351?w=400",
-                "rating": 4.7,
-                "price": "$$$",
-                "categories": ["Sushi", "Japanese", "Asian"],
-                "address": "456 Broadway, New York, NY",
-                "distance": 1.2,
-                "delivery_time": "25-35 min",
-                "phone": "(555) 234-5678",
-                "url": "#",
-                "is_closed": False
-            },
-            {
-                "id": "mock3",
-                "name": "Burger House",
-                "image_url": "https://images.unsplash.com/photo-1568901346375-23c9450c58cd?w=400",
-                "rating": 4.3,
-                "price": "$",
-                "categories": ["Burgers", "American", "Fast Food"],
-                "address": "789 5th Ave, New York, NY",
-                "distance": 0.5,
-                "delivery_time": "15-25 min",
-                "phone": "(555) 345-6789",
-                "url": "#",
-                "is_closed": False
-            },
-            {
-                "id": "mock4",
-                "name": "Thai Garden",
-                "image_url": "https://images.unsplash.com/photo-1555939594-58d7cb561ad1?w=400",
-                "rating": 4.6,
-                "price": "$$",
-                "categories": ["Thai", "Asian", "Vegetarian"],
-                "address": "321 Park Ave, New York, NY",
-                "distance": 1.5,
-                "delivery_time": "30-40 min",
-                "phone": "(555) 456-7890",
-                "url": "#",
-                "is_closed": False
-            },
-            {
-                "id": "mock5",
-                "name": "Taco Fiesta",
-                "image_url": "https://images.unsplash.com/photo-1565299585323-38174c2b7c1a?w=400",
-                "rating": 4.4,
-                "price": "$",
-                "categories": ["Mexican", "Tacos", "Fast Food"],
-                "address": "654 Lexington Ave, New York, NY",
-                "distance": 0.9,
-                "delivery_time": "20-30 min",
-                "phone": "(555) 567-8901",
-                "url": "#",
-                "is_closed": False
-            },
-            {
-                "id": "mock6",
-                "name": "Wings & Things",
-                "image_url": "https://images.unsplash.com/photo-1527477396000-e27137b2a0e7?w=400",
-                "rating": 4.2,
-                "price": "$$",
-                "categories": ["Wings", "American", "Sports Bar"],
-                "address": "987 Madison Ave, New York, NY",
-                "distance": 1.8,
-                "delivery_time": "35-45 min",
-                "phone": "(555) 678-9012",
-                "url": "#",
-                "is_closed": False
-            },
-            {
-                "id": "mock7",
-                "name": "Spice Garden",
-                "image_url": "https://images.unsplash.com/photo-1585937421612-70a008356fbe?w=400",
-                "rating": 4.6,
-                "price": "$$",
-                "categories": ["Indian", "Curry", "Vegetarian"],
-                "address": "555 Lexington Ave, New York, NY",
-                "distance": 1.1,
-                "delivery_time": "25-35 min",
-                "phone": "(555) 789-0123",
-                "url": "#",
-                "is_closed": False
-            },
-            {
-                "id": "mock8",
-                "name": "Tandoor Express",
-                "image_url": "https://images.unsplash.com/photo-1563379091339-03246963d29b?w=400",
-                "rating": 4.5,
-                "price": "$$",
-                "categories": ["Indian", "Tandoor", "Halal"],
-                "address": "222 Park Ave, New York, NY",
-                "distance": 0.7,
-                "delivery_time": "20-30 min",
-                "phone": "(555) 890-1234",
-                "url": "#",
-                "is_closed": False
-            }
-        ]
+        """Return mock restaurant data for demo (shared, treat as read-only)"""
+        return MOCK_RESTAURANTS
+    
+    async def build_index(self) -> Optional[RestaurantIndex]:
+        """Snapshot Yelp results for RESTAURANT_INDEX_LOCATION into a new index"""
+        businesses: Dict[str, Dict[str, Any]] = {}
+        for term in RESTAURANT_INDEX_TERMS:
+            params = {"term": term, "location": RESTAURANT_INDEX_LOCATION, "limit": 50, "sort_by": "rating"}
+            try:
+                data = await call_with_breaker(self.breaker, lambda: self._fetch_businesses(params))
+            except Exception as e:
+                logger.warning(f"Restaurant index: Yelp search for '{term}' failed: {e}")
+                continue
+            for business in data.get("businesses", []):
+                businesses.setdefault(business.get("id"), business)
+        if not businesses:
+            return None
+        restaurants = sorted(
+            (format_business(business) for business in businesses.values()),
+            key=lambda r: r.get("rating") or 0,
+            reverse=True
+        )
+        return RestaurantIndex(restaurants, RESTAURANT_INDEX_LOCATION, created_at=time.time())
+    
+    async def _refresh_index(self) -> None:
+        while True:
+            index = await self.build_index()
+            if index is not None:
+                self.index = index
+                logger.info(f"Restaurant index: {len(index)} restaurants for {RESTAURANT_INDEX_LOCATION}")
+            await asyncio.sleep(RESTAURANT_INDEX_REFRESH)
+    
+    def start_index_refresh(self) -> None:
+        """Start building and periodically refreshing the Yelp restaurant index"""
+        if not self.yelp_api_key or not RESTAURANT_INDEX_ENABLED:
+            return
+        if self._index_task is None or self._index_task.done():
+            self._index_task = asyncio.create_task(self._refresh_index())
+    
+    def get_stats(self) -> Dict[str, Any]:
+        index = self.index if self.yelp_api_key else self.mock_index
+        return {
+            "cache": self.cache.stats(),
+            "neighbor_hits": self.neighbor_hits,
+            "single_flight": self.flights.stats(),
+            "breaker": self.breaker.stats(),
+            "index": index.stats() if index is not None else None
+        }
     
     async def close(self):
-        await self.session.aclose()
+        if self._index_task:
+            self._index_task.cancel()
+        await self.cache.close()
 
-# Initialize clients
-tmdb_client = TMDBClient(TMDB_API_KEY)
-restaurant_client = RestaurantClient(YELP_API_KEY, GOOGLE_PLACES_API_KEY)
+# Initialize clients (the shared HTTP client itself is created at startup)
+http_pool = HTTPPool(
+    max_connections=HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    max_connections_per_host=HTTP_MAX_CONNECTIONS_PER_HOST,
+    http2=HTTP2_ENABLED,
+    connect_timeout=HTTP_CONNECT_TIMEOUT,
+    read_timeout=HTTP_READ_TIMEOUT,
+    write_timeout=HTTP_WRITE_TIMEOUT,
+    pool_timeout=HTTP_POOL_TIMEOUT
+)
+# Intent results stay in-process only: recomputing one is cheaper than an L2 round trip
+cache_backend = create_backend(CACHE_L2_URL, CACHE_L2_TIMEOUT)
+cache_codec = Codec(CACHE_SERIALIZER, CACHE_COMPRESS, CACHE_COMPRESS_MIN_BYTES)
 
-# Intent extraction (simplified - will be replaced with Llama 3)
-def extract_intent(text: str) -> Dict[str, Any]:
-    """Extract movie preferences from user text"""
-    text_lower = text.lower()
-    
-    # Actor detection - look for patterns like "with [actor]", "starring [actor]", "movies with [actor]"
-    # Skip actor detection if this is clearly a food query
-    actor = None
-    food_indicators = ["food", "restaurant", "dinner", "lunch", "pizza", "burger", "sushi", "taco", "hungry", "eat", "meal", "snack"]
-    is_likely_food = any(indicator in text_lower for indicator in food_indicators)
-    
-    if not is_likely_food:
-        import re
-        # Improved patterns to capture full names including hyphenated names
-        # Pattern 1: "with/starring/featuring [Name Name-Name]"
-        pattern1 = r'(?:with|starring|featuring)\s+([A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z-]+)+)'
-        match = re.search(pattern1, text)
-        if match:
-            potential_actor = match.group(1).strip()
-            # Make sure it's not a food-related phrase
-            if not any(word in potential_actor.lower() for word in ["food", "restaurant", "dinner", "pizza", "burger"]):
-                actor = potential_actor
-        
-        # Pattern 2: "movies/films/shows with [Name Name-Name]"
-        if not actor:
-            pattern2 = r'(?:movies?|films?|shows?|dramas?)\s+(?:with|starring|featuring)\s+([A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z-]+)+)'
-            match = re.search(pattern2, text)
-            if match:
-                potential_actor = match.group(1).strip()
-                if not any(word in potential_actor.lower() for word in ["food", "restaurant", "dinner", "pizza", "burger"]):
-                    actor = potential_actor
-        
-        # Pattern 3: "[Name Name-Name] movies/films/shows"
-        if not actor:
-            pattern3 = r'([A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z-]+)+)\s+(?:movies?|films?|shows?|dramas?)'
-            match = re.search(pattern3, text)
-            if match:
-                potential_actor = match.group(1).strip()
-                if not any(word in potential_actor.lower() for word in ["food", "restaurant", "dinner", "pizza", "burger"]):
-                    actor = potential_actor
-        
-        # Pattern 4: "show me [Name Name-Name]" or "I want [Name Name-Name]" (but not food)
-        if not actor:
-            pattern4 = r'(?:show\s+me|find\s+me)\s+([A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z-]+)+)'
-            match = re.search(pattern4, text, re.IGNORECASE)
-            if match:
-                potential_actor = match.group(1).strip()
-                if not any(word in potential_actor.lower() for word in ["food", "restaurant", "dinner", "pizza", "burger", "tv"]):
-                    actor = potential_actor
-        
-        # If still no match, try to extract capitalized name sequences (but exclude food terms)
-        if not actor:
-            name_pattern = r'\b([A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z-]+){1,2})\b'
-            matches = re.findall(name_pattern, text)
-            
-            common_words = {"I", "The", "A", "An", "Movies", "Movie", "Films", "Film", 
-                           "Shows", "Show", "Dramas", "Drama", "Korean", "Japanese", 
-                           "Chinese", "Action", "Comedy", "Horror", "Sci-fi", "Food",
-                           "Restaurant", "Dinner", "TV", "Tv"}
-            
-            for match in matches:
-                words = match.split()
-                # Skip if all words are common words or food-related
-                if not all(word in common_words for word in words):
-                    if not any(word in match.lower() for word in ["food", "restaurant", "dinner", "pizza", "burger", "tv"]):
-                        if not actor or len(match) > len(actor):
-                            actor = match.strip()
-    
-    # Country/Language detection
-    country = None
-    language = None
-    country_keywords = {
-        "korean": {"country": "KR", "language": "ko", "keywords": ["korean", "korea", "k-drama", "kdrama"]},
-        "japanese": {"country": "JP", "language": "ja", "keywords": ["japanese", "japan", "anime"]},
-        "chinese": {"country": "CN", "language": "zh", "keywords": ["chinese", "china", "mandarin"]},
-        "indian": {"country": "IN", "language": "hi", "keywords": ["indian", "india", "bollywood", "hindi"]},
-        "spanish": {"country": "ES", "language": "es", "keywords": ["spanish", "spain", "mexican"]},
-        "french": {"country": "FR", "language": "fr", "keywords": ["french", "france"]},
-        "german": {"country": "DE", "language": "de", "keywords": ["german", "germany"]},
+def shared_cache(namespace: str) -> Optional[SharedCache]:
+    return SharedCache(cache_backend, namespace, cache_codec) if cache_backend is not None else None
+
+tmdb_client = TMDBClient(TMDB_API_KEY, http_pool, shared=shared_cache("tmdb"))
+restaurant_client = RestaurantClient(http_pool, YELP_API_KEY, GOOGLE_PLACES_API_KEY, shared=shared_cache("yelp"))
+details_prefetcher = Prefetcher(
+    fetch=lambda key: tmdb_client.get_details(*key),
+    is_cached=lambda key: tmdb_client.has_details(*key),
+    busy=lambda: tmdb_client.scheduler.congested(Priority.PREFETCH),
+    max_concurrent=PREFETCH_MAX_CONCURRENT,
+    max_pending=PREFETCH_MAX_PENDING
+)
+# Loaded at startup when an index exists
+semantic_engine: Optional[SemanticEngine] = None
+# Built at startup by rebuild_suggest_index()
+suggest_index = SuggestIndex([])
+
+# Recommendation planning
+def _poster_url(item: Dict[str, Any]) -> Optional[str]:
+    return f"https://image.tmdb.org/t/p/w500{item.get('poster_path', '')}" if item.get("poster_path") else None
+
+def format_actor_credits(movies: List[Dict[str, Any]], person_name: str) -> List[Dict[str, Any]]:
+    """Format a person's credits (movies and TV) as recommendations"""
+    recommendations = []
+    for item in movies:
+        if item.get("media_type") == "tv" or "name" in item:
+            recommendations.append({
+                "id": item.get("id"),
+                "title": item.get("name") or item.get("title"),
+                "overview": item.get("overview", ""),
+                "poster_path": _poster_url(item),
+                "release_date": item.get("first_air_date") or item.get("release_date"),
+                "vote_average": item.get("vote_average", 0),
+                "genre_ids": item.get("genre_ids", []),
+                "type": "tv" if item.get("media_type") == "tv" else "movie",
+                "actor_name": person_name
+            })
+        else:
+            recommendations.append({
+                "id": item.get("id"),
+                "title": item.get("title"),
+                "overview": item.get("overview", ""),
+                "poster_path": _poster_url(item),
+                "release_date": item.get("release_date"),
+                "vote_average": item.get("vote_average", 0),
+                "genre_ids": item.get("genre_ids", []),
+                "type": "movie",
+                "actor_name": person_name
+            })
+    return recommendations
+
+def format_results(movies: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Format TMDB search/discover results (movies and TV shows) as recommendations"""
+    recommendations = []
+    for item in movies:
+        # TV shows use different field names
+        if "name" in item:  # TV show
+            recommendations.append({
+                "id": item.get("id"),
+                "title": item.get("name"),  # TV shows use "name"
+                "overview": item.get("overview", ""),
+                "poster_path": _poster_url(item),
+                "release_date": item.get("first_air_date"),  # TV shows use "first_air_date"
+                "vote_average": item.get("vote_average"),
+                "genre_ids": item.get("genre_ids", []),
+                "type": "tv"
+            })
+        else:  # Movie
+            recommendations.append({
+                "id": item.get("id"),
+                "title": item.get("title"),
+                "overview": item.get("overview", ""),
+                "poster_path": _poster_url(item),
+                "release_date": item.get("release_date"),
+                "vote_average": item.get("vote_average"),
+                "genre_ids": item.get("genre_ids", []),
+                "type": "movie"
+            })
+    return recommendations
+
+def format_details(details: Dict[str, Any]) -> Dict[str, Any]:
+    """The parts of a TMDB details payload (with videos and credits) the details view renders"""
+    if not details:
+        return {}
+    trailer = next(
+        (video for video in details.get("videos", {}).get("results", [])
+         if video.get("site") == "YouTube" and video.get("type") == "Trailer"),
+        None
+    )
+    return {
+        "id": details.get("id"),
+        "title": details.get("title") or details.get("name"),
+        "overview": details.get("overview", ""),
+        "tagline": details.get("tagline"),
+        "poster_path": _poster_url(details),
+        "release_date": details.get("release_date") or details.get("first_air_date"),
+        "runtime": details.get("runtime") or next(iter(details.get("episode_run_time") or []), None),
+        "genres": [genre.get("name") for genre in details.get("genres", [])],
+        "vote_average": details.get("vote_average"),
+        "vote_count": details.get("vote_count"),
+        "trailer_key": trailer.get("key") if trailer else None,
+        "cast": [
+            {"id": person.get("id"), "name": person.get("name"), "character": person.get("character")}
+            for person in details.get("credits", {}).get("cast", [])[:10]
+        ],
+        "type": "tv" if "name" in details else "movie"
     }
+
+async def _actor_recommendations(intent: Dict[str, Any], is_tv_show: bool) -> Optional[Dict[str, Any]]:
+    """Look up the intent's actor and format their credits, or None if not found"""
+    logger.info(f"Searching for actor: {intent['actor']}")
+    person = await tmdb_client.resolve_person(intent["actor"])
     
-    for country_name, info in country_keywords.items():
-        if any(keyword in text_lower for keyword in info["keywords"]):
-            country = info["country"]
-            language = info["language"]
-            break
-    
-    # Genre detection
-    genres = []
-    genre_keywords = {
-        "action": ["action", "fight", "combat", "thriller", "adventure"],
-        "comedy": ["comedy", "funny", "humor", "laugh"],
-        "drama": ["drama", "emotional", "serious", "deep", "dramas"],
-        "horror": ["horror", "scary", "frightening", "terror"],
-        "sci-fi": ["sci-fi", "science fiction", "space", "future", "alien"],
-        "romance": ["romance", "romantic", "love", "relationship"],
-        "fantasy": ["fantasy", "magic", "wizard", "dragon"],
-        "crime": ["crime", "criminal", "gangster", "mafia"],
-        "mystery": ["mystery", "detective", "investigation", "suspense"]
-    }
+    if person is None:
+        # Actor not found, the plan falls through to regular search
+        FALLBACKS.inc(path="actor_not_found")
+        logger.warning(f"Actor '{intent['actor']}' not found, using regular search")
+        return None
     
-    for genre, keywords in genre_keywords.items():
-        if any(keyword in text_lower for keyword in keywords):
-            genres.append(genre)
-    
-    # Year detection
-    year = None
-    import re
-    year_match = re.search(r'\b(19|20)\d{2}\b', text)
-    if year_match:
-        year = int(year_match.group())
-    
-    # Mood detection
-    mood = None
-    if any(word in text_lower for word in ["sad", "depressed", "down"]):
-        mood = "uplifting"
-    elif any(word in text_lower for word in ["happy", "excited", "energetic"]):
-        mood = "energetic"
-    elif any(word in text_lower for word in ["relax", "calm", "peaceful"]):
-        mood = "calm"
-    
-    # Food/Restaurant detection
-    is_food_query = any(word in text_lower for word in [
-        "food", "restaurant", "restaurants", "dinner", "lunch", "breakfast",
-        "pizza", "burger", "sushi", "taco", "chinese", "italian", "mexican",
-        "delivery", "takeout", "order", "hungry", "eat", "eating", "meal",
-        "snack", "snacks", "tv dinner", "movie night food"
-    ])
-    
-    # Extract food type/cuisine
-    food_type = None
-    cuisine_keywords = {
-        "pizza": ["pizza"],
-        "burger": ["burger", "burgers"],
-        "sushi": ["sushi", "japanese"],
-        "chinese": ["chinese"],
-        "italian": ["italian", "pasta"],
-        "mexican": ["mexican", "taco", "tacos"],
-        "thai": ["thai"],
-        "indian": ["indian", "curry"],
-        "korean": ["korean food", "korean restaurant"],
-        "fast food": ["fast food", "quick bite"]
-    }
+    person_id = person.get("id")
+    person_name = person.get("name")
+    
+    logger.info(f"Found person: {person_name} (ID: {person_id})")
     
-    for cuisine, keywords in cuisine_keywords.items():
-        if any(keyword in text_lower for keyword in keywords):
-            food_type = cuisine
-            break
+    # Get their movies/TV shows
+    credits = await tmdb_client.get_person_movies(person_id, include_tv=is_tv_show or True)
+    movies = credits.get("results", [])
+    
+    # Filter by country/language if specified
+    candidates = Candidates(movies)
+    mask = candidates.match(country=intent.get("country"), language=intent.get("language"))
+    movies = candidates.top_k(10, mask)
     
     return {
-        "genres": genres if genres else None,
-        "year": year,
-        "mood": mood,
-        "country": country,
-        "language": language,
-        "actor": actor,
-        "is_food_query": is_food_query,
-        "food_type": food_type,
-        "original_text": text
+        "recommendations": format_actor_credits(movies, person_name),
+        "actor_found": person_name
     }
 
+async def _semantic_recommendations(text: str, is_tv_show: bool) -> Dict[str, Any]:
+    """Catalog titles whose overview is similar to the utterance"""
+    # Embedding may run a model on the CPU, keep it off the event loop
+    matches = await asyncio.to_thread(semantic_engine.search, text, 10, "tv" if is_tv_show else "movie")
+    results = [item for item, score in matches if score >= SEMANTIC_MIN_SCORE]
+    return {"results": results, "total_results": len(results)}
+
+def is_tv_request(text: str) -> bool:
+    """Whether an utterance asks for TV shows (dramas, series, etc.) rather than movies"""
+    text_lower = text.lower()
+    return any(word in text_lower for word in ["drama", "dramas", "series", "tv show", "tv shows"])
+
+def plan_search_text(text: str, intent: Dict[str, Any], is_tv_show: bool) -> Optional[str]:
+    """The text the recommendation plan searches TMDB with, or None if it doesn't search"""
+    if intent.get("is_food_query"):
+        return None
+    if intent.get("country") or intent.get("language"):
+        if "korean" in text.lower() or "korea" in text.lower():
+            return "Korean drama" if is_tv_show else "Korean"
+        return text
+    return None if intent.get("genres") else text
+
+def build_recommendation_plan(text: str, intent: Dict[str, Any], is_tv_show: bool) -> List[Branch]:
+    """Turn an extracted intent into prioritized branches (the first one is primary, the rest fallbacks).
+    
+    Priority: actor credits, then country/language discover with a text-search
+    fallback, then genre discover, then plain text search with semantic
+    matches from the local index (when built) as its fallback; descriptions
+    (SEMANTIC_MIN_WORDS or more words) try semantic matches first. Fallbacks start
+    when the branch ahead of them fails or is slower than PLAN_FALLBACK_DELAY.
+    """
+    branches = []
+    
+    if intent.get("actor"):
+        branches.append(Branch("actor", lambda: _actor_recommendations(intent, is_tv_show), accept=lambda r: r is not None))
+    
+    search_query = plan_search_text(text, intent, is_tv_show)
+    if intent.get("country") or intent.get("language"):
+        if is_tv_show:
+            branches.append(Branch("discover", lambda: tmdb_client.discover_tv_shows(
+                genres=intent.get("genres"),
+                year=intent.get("year"),
+                country=intent.get("country"),
+                language=intent.get("language")
+            ), accept=has_results))
+            # If no results, use text search
+            branches.append(Branch("search", lambda: tmdb_client.search_tv_shows(
+                search_query,
+                language=intent.get("language")
+            )))
+        else:
+            branches.append(Branch("discover", lambda: tmdb_client.discover_movies(
+                genres=intent.get("genres"),
+                year=intent.get("year"),
+                country=intent.get("country"),
+                language=intent.get("language")
+            ), accept=has_results))
+            # If no results, use text search with language
+            branches.append(Branch("search", lambda: tmdb_client.search_movies(
+                search_query,
+                language=intent.get("language")
+            )))
+    elif intent["genres"]:
+        if is_tv_show:
+            branches.append(Branch("discover", lambda: tmdb_client.discover_tv_shows(
+                genres=intent["genres"],
+                year=intent["year"]
+            )))
+        else:
+            branches.append(Branch("discover", lambda: tmdb_client.discover_movies(
+                genres=intent["genres"],
+                year=intent["year"]
+            )))
+    else:
+        if is_tv_show:
+            search = Branch("search", lambda: tmdb_client.search_tv_shows(search_query), accept=has_results)
+        else:
+            search = Branch("search", lambda: tmdb_client.search_movies(search_query), accept=has_results)
+        branches.append(search)
+        if semantic_engine is not None:
+            semantic = Branch("semantic", lambda: _semantic_recommendations(text, is_tv_show), accept=has_results)
+            # Descriptions ("a heartfelt show about a family in Seoul") match by
+            # meaning; titles ("Inception") only fall back to it
+            if len(text.split()) >= SEMANTIC_MIN_WORDS:
+                branches.insert(0, semantic)
+            else:
+                branches.append(semantic)
+    
+    # Everything after the first branch is a fallback the request budget may skip
+    for branch in branches[1:]:
+        branch.optional = True
+    
+    return branches
+
 @app.get("/")
 async def root():
     return {"message": "Fex TV API", "status": "running"}
@@ -628,214 +1047,277 @@ async def root():
 async def health():
     return {"status": "healthy", "service": "fex-tv-api"}
 
-@app.post("/api/voice/process")
-async def process_voice(input: VoiceInput):
-    """Process voice input and return recommendations"""
+async def recommend(text: str) -> Dict[str, Any]:
+    """Extract intent from an utterance and return recommendations or restaurants"""
+    with STAGE_DURATION.time(stage="total"):
+        return await _recommend(text)
+
+def request_budget(header_value: Optional[str] = None) -> RequestBudget:
+    return RequestBudget.from_header(header_value, REQUEST_BUDGET, REQUEST_BUDGET_MAX, REQUEST_BUDGET_RESERVE)
+
+async def recommend_within(text: str, budget: RequestBudget) -> Dict[str, Any]:
+    """recommend() with every upstream call bounded by the request budget.
+    
+    The response carries "partial": true (and the steps that were cut) when
+    the budget ran short and some results were skipped.
+    """
+    token = current_budget.set(budget)
     try:
-        logger.info(f"Processing voice input: {input.text}")
-        
-        # Extract intent
-        intent = extract_intent(input.text)
-        logger.info(f"Extracted intent: {intent}")
+        result = await recommend(text)
+    finally:
+        current_budget.reset(token)
+    result = dict(result, partial=budget.partial)
+    if budget.partial:
+        result["skipped"] = list(budget.skipped)
+    return result
+
+async def _recommend(text: str) -> Dict[str, Any]:
+    logger.info(f"Processing voice input: {text}")
+    
+    # Extract intent
+    with STAGE_DURATION.time(stage="intent"):
+        intent = extract_intent(text)
+    logger.info(f"Extracted intent: {intent}")
+    
+    # Check if this is a food query
+    if intent.get("is_food_query"):
+        logger.info("Food query detected, searching restaurants...")
+        # Get user location (default to New York for demo, can be enhanced with geolocation)
+        location = "New York"  # TODO: Get from user profile or geolocation
+        term = intent.get("food_type") or "restaurant"
         
-        # Check if this is a food query
-        if intent.get("is_food_query"):
-            logger.info("Food query detected, searching restaurants...")
-            # Get user location (default to New York for demo, can be enhanced with geolocation)
-            location = "New York"  # TODO: Get from user profile or geolocation
-            term = intent.get("food_type") or "restaurant"
-            
+        with STAGE_DURATION.time(stage="restaurants"):
             restaurants = await restaurant_client.search_restaurants(
                 location=location,
                 term=term,
                 limit=20
             )
-            
-            return {
-                "success": True,
-                "intent": intent,
-                "type": "food",
-                "restaurants": restaurants,
-                "count": len(restaurants),
-                "location": location
-            }
-        
-        # Check if user is looking for TV shows (dramas, series, etc.)
-        is_tv_show = any(word in input.text.lower() for word in ["drama", "dramas", "series", "tv show", "tv shows"])
-        
-        # Priority 1: Actor-based search
-        if intent.get("actor"):
-            logger.info(f"Searching for actor: {intent['actor']}")
-            # Search for the actor
-            person_results = await tmdb_client.search_person(intent["actor"])
-            
-            if person_results.get("results"):
-                # Get the first (most relevant) person
-                person = person_results["results"][0]
-                person_id = person.get("id")
-                person_name = person.get("name")
-                
-                logger.info(f"Found person: {person_name} (ID: {person_id})")
-                
-                # Get their movies/TV shows
-                credits = await tmdb_client.get_person_movies(person_id, include_tv=is_tv_show or True)
-                movies = credits.get("results", [])
-                
-                # Filter by country/language if specified
-                if intent.get("country") or intent.get("language"):
-                    filtered_movies = []
-                    for movie in movies:
-                        # Check origin country
-                        if intent.get("country"):
-                            origin_countries = movie.get("origin_country", [])
-                            if intent["country"] not in origin_countries:
-                                continue
-                        # Check original language
-                        if intent.get("language"):
-                            if movie.get("original_language") != intent["language"]:
-                                continue
-                        filtered_movies.append(movie)
-                    movies = filtered_movies[:10]
-                else:
-                    movies = movies[:10]
-                
-                # Format response
-                recommendations = []
-                for item in movies:
-                    if item.get("media_type") == "tv" or "name" in item:
-                        recommendations.append({
-                            "id": item.get("id"),
-                            "title": item.get("name") or item.get("title"),
-                            "overview": item.get("overview", ""),
-                            "poster_path": f"https://image.tmdb.org/t/p/w500{item.get('poster_path', '')}" if item.get("poster_path") else None,
-                            "release_date": item.get("first_air_date") or item.get("release_date"),
-                            "vote_average": item.get("vote_average", 0),
-                            "genre_ids": item.get("genre_ids", []),
-                            "type": "tv" if item.get("media_type") == "tv" else "movie",
-                            "actor_name": person_name
-                        })
-                    else:
-                        recommendations.append({
-                            "id": item.get("id"),
-                            "title": item.get("title"),
-                            "overview": item.get("overview", ""),
-                            "poster_path": f"https://image.tmdb.org/t/p/w500{item.get('poster_path', '')}" if item.get("poster_path") else None,
-                            "release_date": item.get("release_date"),
-                            "vote_average": item.get("vote_average", 0),
-                            "genre_ids": item.get("genre_ids", []),
-                            "type": "movie",
-                            "actor_name": person_name
-                        })
-                
-                return {
-                    "success": True,
-                    "intent": intent,
-                    "recommendations": recommendations,
-                    "count": len(recommendations),
-                    "actor_found": person_name
-                }
-            else:
-                # Actor not found, fall through to regular search
-                logger.warning(f"Actor '{intent['actor']}' not found, using regular search")
-        
-        # Get recommendations
-        # Priority: If country/language specified, use discover with filters
-        # Otherwise, try genre-based discovery or text search
-        if intent.get("country") or intent.get("language"):
-            if is_tv_show:
-                # Search for TV shows
-                tv_data = await tmdb_client.discover_tv_shows(
-                    genres=intent.get("genres"),
-                    year=intent.get("year"),
-                    country=intent.get("country"),
-                    language=intent.get("language")
-                )
-                # If no results, try text search
-                if not tv_data.get("results"):
-                    search_query = input.text
-                    if "korean" in input.text.lower() or "korea" in input.text.lower():
-                        search_query = "Korean drama"
-                    tv_data = await tmdb_client.search_tv_shows(
-                        search_query,
-                        language=intent.get("language")
-                    )
-                movies_data = tv_data
-            else:
-                # Search for movies
-                movies_data = await tmdb_client.discover_movies(
-                    genres=intent.get("genres"),
-                    year=intent.get("year"),
-                    country=intent.get("country"),
-                    language=intent.get("language")
-                )
-                # If no results, try text search with language
-                if not movies_data.get("results"):
-                    search_query = input.text
-                    if "korean" in input.text.lower() or "korea" in input.text.lower():
-                        search_query = "Korean"
-                    movies_data = await tmdb_client.search_movies(
-                        search_query,
-                        language=intent.get("language")
-                    )
-        elif intent["genres"]:
-            if is_tv_show:
-                movies_data = await tmdb_client.discover_tv_shows(
-                    genres=intent["genres"],
-                    year=intent["year"]
-                )
-            else:
-                movies_data = await tmdb_client.discover_movies(
-                    genres=intent["genres"],
-                    year=intent["year"]
-                )
-        else:
-            if is_tv_show:
-                movies_data = await tmdb_client.search_tv_shows(input.text)
-            else:
-                movies_data = await tmdb_client.search_movies(input.text)
-        
-        movies = movies_data.get("results", [])[:10]
-        
-        # Format response (handle both movies and TV shows)
-        recommendations = []
-        for item in movies:
-            # TV shows use different field names
-            if "name" in item:  # TV show
-                recommendations.append({
-                    "id": item.get("id"),
-                    "title": item.get("name"),  # TV shows use "name"
-                    "overview": item.get("overview", ""),
-                    "poster_path": f"https://image.tmdb.org/t/p/w500{item.get('poster_path', '')}" if item.get("poster_path") else None,
-                    "release_date": item.get("first_air_date"),  # TV shows use "first_air_date"
-                    "vote_average": item.get("vote_average"),
-                    "genre_ids": item.get("genre_ids", []),
-                    "type": "tv"
-                })
-            else:  # Movie
-                recommendations.append({
-                    "id": item.get("id"),
-                    "title": item.get("title"),
-                    "overview": item.get("overview", ""),
-                    "poster_path": f"https://image.tmdb.org/t/p/w500{item.get('poster_path', '')}" if item.get("poster_path") else None,
-                    "release_date": item.get("release_date"),
-                    "vote_average": item.get("vote_average"),
-                    "genre_ids": item.get("genre_ids", []),
-                    "type": "movie"
-                })
         
+        return {
+            "success": True,
+            "intent": intent,
+            "type": "food",
+            "restaurants": restaurants,
+            "count": len(restaurants),
+            "location": location
+        }
+    
+    is_tv_show = is_tv_request(text)
+    
+    # Actor lookup, discover and search fallbacks, each started only if needed
+    plan = build_recommendation_plan(text, intent, is_tv_show)
+    with STAGE_DURATION.time(stage="plan"):
+        winner, result = await execute_plan(plan, PLAN_FALLBACK_DELAY)
+    logger.info(f"Plan {[b.name for b in plan]} answered by {winner}")
+    if winner == "search" and any(branch.name == "discover" for branch in plan):
+        FALLBACKS.inc(path="discover_empty_search")
+    
+    if winner == "actor":
+        recommendations = result["recommendations"]
         return {
             "success": True,
             "intent": intent,
             "recommendations": recommendations,
-            "count": len(recommendations)
+            "count": len(recommendations),
+            "actor_found": result["actor_found"]
         }
     
+    movies = (result or {}).get("results", [])[:10]
+    
+    # Format response (handle both movies and TV shows)
+    with STAGE_DURATION.time(stage="format"):
+        recommendations = format_results(movies)
+    
+    return {
+        "success": True,
+        "intent": intent,
+        "recommendations": recommendations,
+        "count": len(recommendations)
+    }
+
+def voice_payload(result: Dict[str, Any]) -> Dict[str, Any]:
+    """A recommend() result as /api/voice/process returns it"""
+    # The client already has its own text; only the fields that were set are echoed
+    return dict(result, intent=compact(result["intent"], drop=("original_text",)))
+
+def prefetch_details(result: Dict[str, Any]) -> None:
+    """Warm the details cache for the top recommendations, if enabled"""
+    if PREFETCH_DETAILS_TOP_N <= 0 or result.get("partial"):
+        # A request that ran out of budget means upstreams are slow; don't add to it
+        return
+    details_prefetcher.schedule(
+        (item.get("type", "movie"), item["id"])
+        for item in result.get("recommendations", [])[:PREFETCH_DETAILS_TOP_N]
+        if item.get("id") is not None
+    )
+
+@app.post("/api/voice/process")
+async def process_voice(input: VoiceInput, request: Request, fields: Optional[str] = None):
+    """Process voice input and return recommendations.
+    
+    `fields` (e.g. "id,title,poster_path") limits each recommendation or
+    restaurant to the fields the client renders.
+    """
+    try:
+        result = await recommend_within(input.text, request_budget(request.headers.get(REQUEST_BUDGET_HEADER)))
+        prefetch_details(result)
+        return json_response(voice_payload(result), parse_fields(fields))
     except Exception as e:
         logger.error(f"Error processing voice input: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/voice/process:batch")
+async def process_voice_batch(inputs: List[VoiceInput], fields: Optional[str] = None):
+    """Process a batch of voice inputs, returning per-item results in order"""
+    if len(inputs) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch too large (max {BATCH_MAX_ITEMS} items)")
+    
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    
+    async def run(text: str) -> Dict[str, Any]:
+        # Batch work queues behind interactive requests for TMDB rate-limit tokens
+        current_priority.set(Priority.BATCH)
+        async with semaphore:
+            return await recommend(text)
+    
+    # Utterances that normalize the same share one pipeline run; identical
+    # upstream calls across different utterances are shared by the TMDB/Yelp
+    # response caches and single-flight layers.
+    keys = [normalize_utterance(item.text) for item in inputs]
+    tasks: Dict[str, asyncio.Future] = {}
+    for key, item in zip(keys, inputs):
+        if key not in tasks:
+            tasks[key] = asyncio.ensure_future(run(item.text))
+    await asyncio.gather(*tasks.values(), return_exceptions=True)
+    
+    results = []
+    for key, item in zip(keys, inputs):
+        task = tasks[key]
+        if task.exception() is not None:
+            logger.error(f"Error processing batch item '{item.text}': {task.exception()}")
+            results.append({"success": False, "error": str(task.exception())})
+            continue
+        # Shaped like /api/voice/process; batch work has no deadline, so nothing is cut short
+        results.append(dict(voice_payload(task.result()), partial=False))
+    
+    return json_response({
+        "success": True,
+        "results": project_batch(results, parse_fields(fields)),
+        "count": len(results),
+        "unique": len(tasks)
+    })
+
+def plan_signature(text: str, intent: Dict[str, Any]) -> tuple:
+    """Everything recommend() reads from an utterance; equal signatures give equal results"""
+    fields = tuple(
+        (key, tuple(value) if isinstance(value, list) else value)
+        for key, value in sorted(intent.items()) if key != "original_text"
+    )
+    is_tv_show = is_tv_request(text)
+    # The raw text only matters when the plan searches with it
+    query = plan_search_text(text, intent, is_tv_show)
+    return fields, is_tv_show, normalize_utterance(query) if query == text else query
+
+class SpeculativeSession:
+    """Speculative recommendation work for one streaming voice connection"""
+    
+    def __init__(self):
+        self.signature: Optional[tuple] = None
+        self.stable_count = 0
+        self.task: Optional[asyncio.Task] = None
+    
+    def on_partial(self, text: str) -> Dict[str, Any]:
+        """Track a partial transcript, starting speculative work once its plan is stable"""
+        intent = extract_intent(text)
+        signature = plan_signature(text, intent)
+        if signature == self.signature:
+            self.stable_count += 1
+        else:
+            # The plan changed, anything started for the old one is stale
+            self.cancel()
+            self.signature = signature
+            self.stable_count = 1
+        
+        if self.task is None and self.stable_count >= WS_STABLE_PARTIALS:
+            logger.info(f"Speculatively processing partial transcript: {text}")
+            self.task = asyncio.ensure_future(recommend_within(text, request_budget()))
+        return intent
+    
+    async def on_final(self, text: str) -> Dict[str, Any]:
+        """Return recommendations for the final transcript, reusing matching speculative work"""
+        task = self.task if self.signature == plan_signature(text, extract_intent(text)) else None
+        if task is None:
+            self.cancel()
+        self.task = None
+        self.signature = None
+        self.stable_count = 0
+        
+        if task is not None:
+            try:
+                result = await task
+                return dict(result, intent=dict(result["intent"], original_text=text))
+            except Exception as e:
+                logger.warning(f"Speculative processing failed, retrying: {e}")
+        return await recommend_within(text, request_budget())
+    
+    def cancel(self) -> None:
+        if self.task is not None:
+            if not self.task.done():
+                self.task.cancel()
+            elif not self.task.cancelled():
+                self.task.exception()
+        self.task = None
+
+@app.websocket("/ws/voice")
+async def voice_stream(websocket: WebSocket):
+    """Stream transcripts as the user speaks.
+    
+    Clients send {"type": "partial" | "final", "text": "..."}. Partials are
+    answered with {"type": "intent", ...}; the final transcript with
+    {"type": "result", "data": ...}, data being the /api/voice/process payload.
+    """
+    await websocket.accept()
+    session = SpeculativeSession()
+    try:
+        while True:
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+            try:
+                message = json.loads(frame.get("text") or frame.get("bytes") or b"")
+            except ValueError:
+                message = None
+            if not isinstance(message, dict):
+                # A malformed frame gets an error, not a dropped session
+                await websocket.send_json({"type": "error", "detail": "Messages must be JSON objects"})
+                continue
+            text = message.get("text")
+            text = text.strip() if isinstance(text, str) else ""
+            if not text:
+                continue
+            
+            if message.get("type") == "final":
+                try:
+                    result = await session.on_final(text)
+                    prefetch_details(result)
+                    await websocket.send_json({"type": "result", "data": voice_payload(result)})
+                except Exception as e:
+                    logger.error(f"Error processing streamed voice input: {e}", exc_info=True)
+                    await websocket.send_json({"type": "error", "detail": str(e)})
+            else:
+                intent = session.on_partial(text)
+                await websocket.send_json({
+                    "type": "intent",
+                    "intent": intent,
+                    "speculating": session.task is not None
+                })
+    except WebSocketDisconnect:
+        pass
+    finally:
+        session.cancel()
+
 @app.post("/api/movies/search")
-async def search_movies(request: RecommendationRequest):
+async def search_movies(request: RecommendationRequest, fields: Optional[str] = None):
     """Search movies with filters"""
     try:
         if request.genres:
@@ -854,70 +1336,248 @@ async def search_movies(request: RecommendationRequest):
                 "id": movie.get("id"),
                 "title": movie.get("title"),
                 "overview": movie.get("overview", ""),
-                "poster_path": f"https://image.tmdb.org/t/p/w500{movie.get('poster_path', '')}" if movie.get("poster_path") else None,
+                "poster_path": _poster_url(movie),
                 "release_date": movie.get("release_date"),
                 "vote_average": movie.get("vote_average"),
             })
         
-        return {
+        return json_response({
             "success": True,
             "recommendations": recommendations,
             "count": len(recommendations)
-        }
+        }, parse_fields(fields))
     
     except Exception as e:
         logger.error(f"Error searching movies: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/suggest")
+async def suggest(q: str = "", limit: int = 10, types: Optional[str] = None):
+    """Typeahead completions for titles, people and genres, answered from memory.
+    
+    types narrows the kinds returned (comma-separated: movie, tv, person, genre).
+    """
+    kinds = [kind.strip() for kind in types.split(",") if kind.strip()] if types else None
+    if kinds and not set(kinds) <= set(SUGGEST_KINDS):
+        raise HTTPException(status_code=400, detail=f"types must be among {', '.join(SUGGEST_KINDS)}")
+    suggestions = suggest_index.suggest(q, max(1, min(limit, SUGGEST_MAX_LIMIT)), kinds)
+    return json_response({
+        "success": True,
+        "query": q,
+        "suggestions": suggestions,
+        "count": len(suggestions)
+    })
+
 @app.get("/api/movies/{movie_id}")
-async def get_movie_details(movie_id: int):
-    """Get detailed movie information"""
+async def get_movie_details(movie_id: int, fields: Optional[str] = None, full: bool = False):
+    """Get detailed movie information.
+    
+    Returns the fields the details view renders (see format_details); pass
+    full=true for the complete TMDB payload with videos and credits.
+    """
     try:
         movie = await tmdb_client.get_movie_details(movie_id)
-        return {
+        return json_response({
             "success": True,
-            "movie": movie
-        }
+            "movie": movie if full else format_details(movie)
+        }, parse_fields(fields))
     except Exception as e:
         logger.error(f"Error getting movie details: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/tv/{tv_id}")
+async def get_tv_details(tv_id: int, fields: Optional[str] = None, full: bool = False):
+    """Get detailed TV show information (same shape as /api/movies/{movie_id})"""
+    try:
+        show = await tmdb_client.get_tv_details(tv_id)
+        return json_response({
+            "success": True,
+            "movie": show if full else format_details(show)
+        }, parse_fields(fields))
+    except Exception as e:
+        logger.error(f"Error getting TV details: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+def parse_detail_ids(value: str) -> List[tuple]:
+    """Parse "550,603,tv:1399" into unique (media_type, id) pairs, in order"""
+    requested = []
+    for token in value.split(","):
+        token = token.strip()
+        if not token:
+            continue
+        media_type, _, item_id = token.rpartition(":")
+        media_type = media_type or "movie"
+        if media_type not in ("movie", "tv") or not item_id.isdigit():
+            raise HTTPException(status_code=400, detail=f"Invalid id '{token}' (use 550 or tv:1399)")
+        pair = (media_type, int(item_id))
+        if pair not in requested:
+            requested.append(pair)
+    return requested
+
+@app.get("/api/movies:batch")
+async def get_details_batch(ids: str, stream: bool = False, fields: Optional[str] = None, full: bool = False):
+    """Details for several movies and TV shows, e.g. ids=550,603,tv:1399.
+    
+    IDs already in the response cache are answered without waiting; the rest
+    are fetched concurrently, DETAILS_BATCH_CONCURRENCY at a time. Items come
+    back in request order, or with stream=true as NDJSON lines in the order
+    they become ready (cached ones first). Unknown IDs come back as
+    {"id", "type", "found": false}.
+    """
+    requested = parse_detail_ids(ids)
+    if len(requested) > DETAILS_BATCH_MAX_IDS:
+        raise HTTPException(status_code=413, detail=f"Too many ids (max {DETAILS_BATCH_MAX_IDS})")
+    selected = parse_fields(fields)
+    semaphore = asyncio.Semaphore(DETAILS_BATCH_CONCURRENCY)
+    
+    async def load(media_type: str, item_id: int) -> Dict[str, Any]:
+        if tmdb_client.has_details(media_type, item_id):
+            details = await tmdb_client.get_details(media_type, item_id)
+        else:
+            async with semaphore:
+                details = await tmdb_client.get_details(media_type, item_id)
+        if not details:
+            return {"id": item_id, "type": media_type, "found": False}
+        return project(dict(details, type=media_type) if full else format_details(details), selected)
+    
+    tasks = [asyncio.ensure_future(load(media_type, item_id)) for media_type, item_id in requested]
+    if not stream:
+        items = await asyncio.gather(*tasks)
+        return json_response({"success": True, "items": items, "count": len(items)})
+    
+    async def ready():
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            # Client went away mid-stream
+            for task in tasks:
+                task.cancel()
+    
+    return ndjson_response(ready())
+
+@app.get("/api/stats")
+async def get_stats():
+    """Get cache and upstream client statistics"""
+    return {
+        "success": True,
+        "tmdb": tmdb_client.get_stats(),
+        "restaurants": restaurant_client.get_stats(),
+        "intent_cache": intent_cache.stats(),
+        "prefetch": details_prefetcher.stats(),
+        "semantic": semantic_engine.stats() if semantic_engine is not None else None,
+        "suggest": suggest_index.stats(),
+        "http_pool": http_pool.stats()
+    }
+
+def _cache_samples() -> List[tuple]:
+    samples = []
+    caches = [
+        ("tmdb", tmdb_client.cache.stats()),
+        ("yelp", restaurant_client.cache.stats()),
+        ("intent", intent_cache.stats())
+    ]
+    for cache_name, stats in caches[:2]:
+        if "shared" in stats:
+            caches.append((f"{cache_name}_l2", stats["shared"]))
+    if tmdb_client.catalog is not None:
+        caches.append(("catalog", tmdb_client.catalog.stats()))
+    for cache_name, stats in caches:
+        for event in ("hits", "misses", "evictions", "stale_hits"):
+            if event in stats:
+                samples.append(({"cache": cache_name, "event": event}, stats[event]))
+    return samples
+
+def _single_flight_samples() -> List[tuple]:
+    return [
+        ({"service": "tmdb"}, tmdb_client.flights.coalesced),
+        ({"service": "yelp"}, restaurant_client.flights.coalesced)
+    ]
+
+REGISTRY.callback("fextv_cache_events_total", "Cache lookups by cache and outcome", "counter", _cache_samples)
+REGISTRY.callback("fextv_coalesced_requests_total", "Upstream calls answered by an identical in-flight call", "counter", _single_flight_samples)
+
+def _breaker_samples() -> List[tuple]:
+    breakers = list(tmdb_client.breakers.values()) + [restaurant_client.breaker]
+    return [({"breaker": breaker.name}, 1 if breaker.state != "closed" else 0) for breaker in breakers]
+
+REGISTRY.callback("fextv_circuit_open", "1 while an upstream endpoint's circuit breaker is open or half-open", "gauge", _breaker_samples)
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/api/genres")
 async def get_genres():
     """Get list of available genres"""
     try:
         genre_map = await tmdb_client.get_genre_map()
+        tv_genre_map = await tmdb_client.get_genre_map("tv")
         return {
             "success": True,
-            "genres": genre_map
+            "genres": genre_map,
+            "tv_genres": tv_genre_map
         }
     except Exception as e:
         logger.error(f"Error getting genres: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/restaurants")
-async def get_restaurants(location: str = "New York", term: str = "restaurant", limit: int = 20):
+async def get_restaurants(location: str = "New York", term: str = "restaurant", limit: int = 20,
+                          latitude: Optional[float] = None, longitude: Optional[float] = None,
+                          radius: Optional[float] = None, fields: Optional[str] = None):
     """Get nearby restaurants"""
     try:
         restaurants = await restaurant_client.search_restaurants(
             location=location,
             term=term,
-            limit=limit
+            limit=max(1, limit),
+            latitude=latitude,
+            longitude=longitude,
+            radius_miles=radius
         )
-        return {
+        return json_response({
             "success": True,
             "restaurants": restaurants,
             "count": len(restaurants),
             "location": location
-        }
+        }, parse_fields(fields))
     except Exception as e:
         logger.error(f"Error getting restaurants: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+async def rebuild_suggest_index() -> None:
+    """Rebuild the typeahead index from the loaded catalog and people snapshots"""
+    global suggest_index
+    try:
+        suggest_index = await asyncio.to_thread(SuggestIndex.build, tmdb_client.catalog, tmdb_client.people)
+    except Exception as e:
+        logger.error(f"Suggest index build error: {e}")
+
+@app.on_event("startup")
+async def startup():
+    http_pool.start()
+    await tmdb_client.load_genre_maps()
+    tmdb_client.start_genre_refresh()
+    restaurant_client.start_index_refresh()
+    tmdb_client.catalog = CatalogIndex.load(CATALOG_PATH)
+    tmdb_client.people = await asyncio.to_thread(PersonIndex.load, PEOPLE_PATH)
+    await rebuild_suggest_index()
+    global semantic_engine
+    semantic_engine = await asyncio.to_thread(
+        SemanticEngine.load, SEMANTIC_INDEX_PATH, SEMANTIC_MODEL, SEMANTIC_BACKEND,
+        SEMANTIC_NPROBE, QDRANT_URL, QDRANT_PATH
+    )
+
 @app.on_event("shutdown")
 async def shutdown():
     await tmdb_client.close()
+    await details_prefetcher.close()
     await restaurant_client.close()
+    await http_pool.close()
+    if cache_backend is not None:
+        await cache_backend.close()
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,167 @@
+"""
+Fex TV Backend - Metrics
+Minimal Prometheus-style counters and histograms, rendered in the text exposition format
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[Tuple[str, str], ...]
+
+
+def _labels_key(labels: Dict[str, Any]) -> LabelValues:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(labels: LabelValues, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (
+        name + '="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = _labels_key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_labels_key(labels), 0.0)
+
+    def samples(self) -> Iterator[str]:
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(labels)} {_format_value(value)}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels"""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # labels -> [bucket counts..., sum, count]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = _labels_key(labels)
+        series = self._values.get(key)
+        if series is None:
+            series = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe the duration of the with-block in seconds"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        series = self._values.get(_labels_key(labels))
+        return series[-1] if series else 0
+
+    def samples(self) -> Iterator[str]:
+        for labels, series in sorted(self._values.items()):
+            for bound, count in zip(self.buckets, series):
+                yield f"{self.name}_bucket{_format_labels(labels, ('le', _format_value(bound)))} {count}"
+            yield f"{self.name}_sum{_format_labels(labels)} {_format_value(series[-2])}"
+            yield f"{self.name}_count{_format_labels(labels)} {series[-1]}"
+
+
+class CallbackMetric:
+    """Metric whose samples are read from a callback at scrape time (e.g. cache stats)"""
+
+    def __init__(self, name: str, documentation: str, metric_type: str,
+                 callback: Callable[[], List[Tuple[Dict[str, Any], float]]]):
+        self.name = name
+        self.documentation = documentation
+        self.type = metric_type
+        self.callback = callback
+
+    def samples(self) -> Iterator[str]:
+        for labels, value in self.callback():
+            yield f"{self.name}{_format_labels(_labels_key(labels))} {_format_value(value)}"
+
+
+class Registry:
+    """Collection of metrics rendered together for /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        return self.register(Counter(name, documentation))
+
+    def histogram(self, name: str, documentation: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, buckets))
+
+    def callback(self, name: str, documentation: str, metric_type: str,
+                 callback: Callable[[], List[Tuple[Dict[str, Any], float]]]) -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, metric_type, callback))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_DURATION = REGISTRY.histogram(
+    "fextv_stage_duration_seconds",
+    "Time spent in each stage of the voice pipeline (intent, plan, format, total)"
+)
+UPSTREAM_DURATION = REGISTRY.histogram(
+    "fextv_upstream_request_duration_seconds",
+    "Latency of upstream TMDB/Yelp HTTP calls by endpoint"
+)
+UPSTREAM_ERRORS = REGISTRY.counter(
+    "fextv_upstream_errors_total",
+    "Upstream failures swallowed by the API clients and turned into empty or fallback results"
+)
+FALLBACKS = REGISTRY.counter(
+    "fextv_fallbacks_total",
+    "Fallback paths taken while answering voice queries"
+)
+HTTP_DURATION = REGISTRY.histogram(
+    "fextv_http_request_duration_seconds",
+    "Latency of API requests by route"
+)
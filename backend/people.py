@@ -0,0 +1,283 @@
+"""
+Fex TV Backend - Local person index
+Popular people resolved in-process with fuzzy (trigram) and prefix name matching
+
+The snapshot is a JSON file of people (id, name, aliases, popularity,
+known_for titles) built from TMDB's daily person export
+(person_ids_MM_DD_YYYY.json.gz) and/or the /person/popular pages, with
+aliases (also_known_as) fetched for the most popular. Names and aliases are
+normalized (case, accents, punctuation) and indexed by their character
+trigrams, so near-miss names from speech ("tom hank", "leonardo di caprio")
+still resolve without a /search/person round trip.
+
+Build it from backend/ with:
+    python -m people --popular-pages 50
+    python -m people --dump person_ids_10_16_2026.json.gz --min-popularity 2
+"""
+
+import argparse
+import asyncio
+import bisect
+import gzip
+import json
+import logging
+import os
+import re
+import time
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+# Similarity (Dice coefficient over trigrams) a name needs to resolve
+MIN_SCORE = 0.6
+# Matches this close to the best are ranked by popularity instead, like TMDB search
+TIE_MARGIN = 0.05
+# Candidates with the most shared trigrams that get an exact similarity
+CANDIDATES = 64
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase, accents stripped, punctuation collapsed to single spaces"""
+    text = unicodedata.normalize("NFKD", name)
+    text = "".join(char for char in text if not unicodedata.combining(char)).lower()
+    return " ".join(re.sub(r"[\W_]+", " ", text).split())
+
+
+def trigrams(normalized: str) -> Set[str]:
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class PersonIndex:
+    """Fuzzy and prefix lookup over a list of people"""
+
+    def __init__(self, people: List[Dict[str, Any]], created_at: float = 0.0):
+        self.people = people
+        self.created_at = created_at
+
+        # One entry per distinct normalized name or alias of a person
+        entry_names: List[str] = []
+        entry_people: List[int] = []
+        exact: Dict[str, int] = {}
+        for row, person in enumerate(people):
+            seen = set()
+            for name in [person.get("name", "")] + list(person.get("aliases") or []):
+                normalized = normalize_name(name)
+                if not normalized or normalized in seen:
+                    continue
+                seen.add(normalized)
+                entry_names.append(normalized)
+                entry_people.append(row)
+                # Most popular person wins an exact name (people arrive sorted by popularity)
+                exact.setdefault(normalized, row)
+        self._exact = exact
+        self._entry_people = np.array(entry_people, dtype=np.int32)
+        self._popularity = np.array([p.get("popularity") or 0.0 for p in people], dtype=np.float32)
+
+        postings: Dict[str, List[int]] = {}
+        sizes = []
+        for entry, normalized in enumerate(entry_names):
+            grams = trigrams(normalized)
+            sizes.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(entry)
+        self._postings = {gram: np.array(entries, dtype=np.int32) for gram, entries in postings.items()}
+        self._gram_counts = np.array(sizes, dtype=np.int32)
+
+        # Sorted (name, entry) pairs for prefix completion
+        order = sorted(range(len(entry_names)), key=lambda entry: entry_names[entry])
+        self._sorted_names = [entry_names[entry] for entry in order]
+        self._sorted_entries = np.array(order, dtype=np.int32)
+
+        self.lookups = 0
+        self.resolved = 0
+
+    @classmethod
+    def load(cls, path: str) -> Optional["PersonIndex"]:
+        """Load a people snapshot, or return None if there is no usable snapshot"""
+        snapshot = os.path.join(path, "people.json")
+        if not os.path.exists(snapshot):
+            logger.info(f"No people snapshot at {path}, actors are resolved with TMDB search")
+            return None
+        try:
+            with open(snapshot) as f:
+                meta = json.load(f)
+            if meta.get("version") != SNAPSHOT_VERSION:
+                logger.warning(f"Ignoring people snapshot version {meta.get('version')}")
+                return None
+            index = cls(meta["people"], meta.get("created_at", 0.0))
+            logger.info(f"Loaded people snapshot: {len(index.people)} people")
+            return index
+        except Exception as e:
+            logger.error(f"People snapshot load error: {e}")
+            return None
+
+    def __len__(self) -> int:
+        return len(self.people)
+
+    def match(self, name: str, limit: int = 5) -> List[Tuple[Dict[str, Any], float]]:
+        """People whose name or an alias is similar to name, best first, with their similarity"""
+        normalized = normalize_name(name)
+        if not normalized:
+            return []
+        grams = trigrams(normalized)
+        postings = [self._postings[gram] for gram in grams if gram in self._postings]
+        if not postings:
+            return []
+        shared = np.bincount(np.concatenate(postings), minlength=len(self._gram_counts))
+        candidates = np.flatnonzero(shared)
+        if len(candidates) > CANDIDATES:
+            candidates = candidates[np.argpartition(-shared[candidates], CANDIDATES - 1)[:CANDIDATES]]
+        scores = 2.0 * shared[candidates] / (len(grams) + self._gram_counts[candidates])
+
+        # Best entry per person
+        best: Dict[int, float] = {}
+        for entry, score in zip(candidates, scores):
+            row = int(self._entry_people[entry])
+            if score > best.get(row, 0.0):
+                best[row] = float(score)
+        exact = self._exact.get(normalized)
+        if exact is not None:
+            best[exact] = 1.0
+        ranked = sorted(best.items(), key=lambda item: (-item[1], -self._popularity[item[0]]))
+        return [(self.people[row], round(score, 4)) for row, score in ranked[:limit]]
+
+    def resolve(self, name: str, min_score: float = MIN_SCORE) -> Optional[Dict[str, Any]]:
+        """The person a spoken name most likely refers to, or None if nobody is close enough"""
+        self.lookups += 1
+        matches = [(person, score) for person, score in self.match(name, CANDIDATES) if score >= min_score]
+        if not matches:
+            return None
+        best = matches[0][1]
+        if best < 1.0:
+            # Near-equal matches: prefer the more popular person, as TMDB's search does
+            close = [person for person, score in matches if score >= best - TIE_MARGIN]
+            person = max(close, key=lambda p: p.get("popularity") or 0.0)
+        else:
+            person = matches[0][0]
+        self.resolved += 1
+        return person
+
+    def complete(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """People with a name or alias starting with prefix, most popular first"""
+        normalized = normalize_name(prefix)
+        if not normalized:
+            return []
+        start = bisect.bisect_left(self._sorted_names, normalized)
+        end = bisect.bisect_left(self._sorted_names, normalized + "￿", start)
+        rows = np.unique(self._entry_people[self._sorted_entries[start:end]])
+        if len(rows) > limit:
+            rows = rows[np.argpartition(-self._popularity[rows], limit - 1)[:limit]]
+        rows = rows[np.argsort(-self._popularity[rows], kind="stable")]
+        return [self.people[row] for row in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "people": len(self.people),
+            "names": len(self._gram_counts),
+            "trigrams": len(self._postings),
+            "age_seconds": round(time.time() - self.created_at) if self.created_at else None,
+            "lookups": self.lookups,
+            "resolved": self.resolved,
+        }
+
+
+def read_dump(path: str, min_popularity: float = 0.0) -> Iterable[Dict[str, Any]]:
+    """People from a TMDB daily export file (gzipped JSON lines), adult entries skipped"""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            person = json.loads(line)
+            if person.get("adult") or (person.get("popularity") or 0.0) < min_popularity:
+                continue
+            yield {"id": person["id"], "name": person["name"], "popularity": person.get("popularity") or 0.0}
+
+
+def _known_for_titles(person: Dict[str, Any]) -> List[str]:
+    return [item.get("title") or item.get("name") for item in person.get("known_for", [])
+            if item.get("title") or item.get("name")]
+
+
+async def collect(tmdb, dump: Optional[str], min_popularity: float, popular_pages: int,
+                  limit: int, aliases: int) -> List[Dict[str, Any]]:
+    """People from the dump and /person/popular, most popular first, aliases for the top `aliases`"""
+    people: Dict[int, Dict[str, Any]] = {}
+    if dump:
+        for person in read_dump(dump, min_popularity):
+            people[person["id"]] = person
+        logger.info(f"Read {len(people)} people from {dump}")
+
+    for page in range(1, popular_pages + 1):
+        try:
+            data = await tmdb._get("person_popular", "/person/popular", {"language": "en-US", "page": page})
+        except Exception as e:
+            logger.warning(f"/person/popular page {page} failed: {e}")
+            break
+        for person in data.get("results", []):
+            if person.get("adult"):
+                continue
+            entry = people.setdefault(person["id"], {"id": person["id"], "name": person["name"]})
+            entry.update({
+                "popularity": max(entry.get("popularity") or 0.0, person.get("popularity") or 0.0),
+                "known_for": _known_for_titles(person),
+                "department": person.get("known_for_department"),
+                "profile_path": person.get("profile_path"),
+            })
+        if page >= data.get("total_pages", page):
+            break
+
+    ranked = sorted(people.values(), key=lambda p: p.get("popularity") or 0.0, reverse=True)[:limit]
+    for person in ranked[:aliases]:
+        try:
+            details = await tmdb._get("person_details", f"/person/{person['id']}", {"language": "en-US"})
+            person["aliases"] = [alias for alias in details.get("also_known_as", []) if alias != person["name"]]
+        except Exception as e:
+            logger.warning(f"Aliases for {person['name']} failed: {e}")
+    return ranked
+
+
+def write_snapshot(path: str, people: List[Dict[str, Any]]) -> None:
+    os.makedirs(path, exist_ok=True)
+    meta = {"version": SNAPSHOT_VERSION, "created_at": time.time(), "people": people}
+    tmp = os.path.join(path, "people.json.tmp")
+    with open(tmp, "w") as f:
+        json.dump(meta, f, separators=(",", ":"), ensure_ascii=False)
+    os.replace(tmp, os.path.join(path, "people.json"))
+
+
+async def _run_build(args) -> None:
+    # Same setup as catalog._run_ingest
+    import main
+    main.http_pool.start()
+    try:
+        people = await collect(main.tmdb_client, args.dump, args.min_popularity, args.popular_pages,
+                               args.limit, args.aliases)
+        write_snapshot(args.out, people)
+        logger.info(f"Wrote {len(people)} people to {args.out}")
+    finally:
+        await main.tmdb_client.close()
+        await main.http_pool.close()
+
+
+def main(argv: Optional[List[str]] = None):
+    from main import PEOPLE_PATH
+    parser = argparse.ArgumentParser(description="Build the local people snapshot")
+    parser.add_argument("--dump", help="TMDB daily person export (person_ids_*.json.gz)")
+    parser.add_argument("--min-popularity", type=float, default=1.0, help="Skip dump entries below this popularity")
+    parser.add_argument("--popular-pages", type=int, default=25, help="Pages of 20 from /person/popular")
+    parser.add_argument("--limit", type=int, default=100000, help="Keep this many most popular people")
+    parser.add_argument("--aliases", type=int, default=500, help="Fetch also_known_as for this many top people")
+    parser.add_argument("--out", default=PEOPLE_PATH)
+    args = parser.parse_args(argv)
+    asyncio.run(_run_build(args))
+
+
+if __name__ == "__main__":
+    main()
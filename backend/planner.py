@@ -0,0 +1,128 @@
+"""
+Fex TV Backend - Execution plans with staggered fallbacks
+Ways of answering a query, tried in priority order with fallbacks hedged after a delay
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from deadline import current_budget
+
+logger = logging.getLogger(__name__)
+
+
+def has_results(data: Any) -> bool:
+    """Accept TMDB-style payloads with a non-empty "results" list"""
+    return bool(data and data.get("results"))
+
+
+def always(data: Any) -> bool:
+    return True
+
+
+class Branch:
+    """One independent way of answering a query.
+
+    `run` may chain dependent upstream calls (e.g. person search, then their
+    credits); branches themselves don't depend on each other. `accept`
+    decides whether the branch's result is good enough to be the answer.
+    Optional branches (fallbacks) are dropped when the request budget is
+    nearly spent.
+    """
+
+    def __init__(self, name: str, run: Callable[[], Awaitable[Any]],
+                 accept: Callable[[Any], bool] = always, optional: bool = False):
+        self.name = name
+        self.run = run
+        self.accept = accept
+        self.optional = optional
+
+    def __repr__(self) -> str:
+        return f"Branch({self.name!r})"
+
+
+async def execute_plan(branches: List[Branch], fallback_delay: Optional[float] = None) -> Tuple[Optional[str], Any]:
+    """Run branches in priority order, starting fallbacks only when needed; return (name, result) of the winner"""
+    budget = current_budget.get()
+    # Nearly out of time: only the required branches are worth starting
+    if budget is not None and budget.nearly_spent():
+        required = [branch for branch in branches if not branch.optional]
+        for branch in branches:
+            if branch.optional and required:
+                budget.mark_partial(f"plan:{branch.name}")
+        branches = required or branches
+    if not branches:
+        return None, None
+
+    # Stop waiting `reserve` seconds before the deadline to leave time for the response
+    cutoff = budget.deadline - budget.reserve if budget is not None else None
+    tasks: List[asyncio.Future] = []
+    outcomes: List[Optional[Tuple[bool, Any]]] = [None] * len(branches)
+    next_start: Optional[float] = None
+
+    def start_next() -> None:
+        nonlocal next_start
+        tasks.append(asyncio.ensure_future(branches[len(tasks)].run()))
+        next_start = time.monotonic() + fallback_delay if fallback_delay is not None else None
+
+    try:
+        start_next()
+        while True:
+            # A fallback starts once the branch before it fails, comes back empty or
+            # runs past fallback_delay; cached answers beat the delay, so they never start one
+            latest = outcomes[len(tasks) - 1]
+            timer = next_start if len(tasks) < len(branches) and latest is None else None
+            if len(tasks) < len(branches) and (
+                (latest is not None and not latest[0]) or (timer is not None and time.monotonic() >= timer)
+            ):
+                # The latest branch came back empty or failed, or is taking too long
+                start_next()
+                continue
+            pending = {task for task in tasks if not task.done()}
+            if not pending:
+                break
+
+            now = time.monotonic()
+            waits = [deadline - now for deadline in (cutoff, timer) if deadline is not None]
+            timeout = max(0.0, min(waits)) if waits else None
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done and cutoff is not None and time.monotonic() >= cutoff:
+                # Out of time: take the best finished branch, even if one ahead of it is still running
+                budget.mark_partial("plan")
+                for index, outcome in enumerate(outcomes):
+                    if outcome is not None and outcome[0]:
+                        return branches[index].name, outcome[1]
+                break
+            for task in done:
+                index = tasks.index(task)
+                branch = branches[index]
+                if task.cancelled():
+                    outcomes[index] = (False, None)
+                elif task.exception() is not None:
+                    logger.error(f"Plan branch {branch.name} failed: {task.exception()}")
+                    outcomes[index] = (False, None)
+                else:
+                    result = task.result()
+                    outcomes[index] = (branch.accept(result), result)
+
+            # A branch wins once accepted with every branch ahead of it rejected,
+            # the same answer a sequential fallback chain would give; the rest are cancelled
+            for index, outcome in enumerate(outcomes):
+                if outcome is None:
+                    break
+                accepted, result = outcome
+                if accepted:
+                    return branches[index].name, result
+
+        # Nothing accepted: the lowest-priority result there is
+        for index in range(len(branches) - 1, -1, -1):
+            outcome = outcomes[index]
+            if outcome is not None and outcome[1] is not None:
+                return branches[index].name, outcome[1]
+        return None, None
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
@@ -0,0 +1,98 @@
+"""
+Fex TV Backend - Details prefetch
+Warm the details cache for the recommendations a client is likely to open next
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable
+
+from deadline import detached_context
+from ratelimit import Priority, current_priority
+
+logger = logging.getLogger(__name__)
+
+
+class Prefetcher:
+    """Background, best-effort fetches at Priority.PREFETCH.
+
+    At most max_concurrent fetches run at once and at most max_pending keys
+    are queued; anything past that is dropped rather than queued. Keys that
+    are already cached or already scheduled are skipped. While `busy()`
+    reports load (more urgent requests waiting for upstream tokens), new
+    work is refused and everything pending is cancelled, so prefetching
+    never competes with the requests it is meant to speed up.
+    """
+
+    def __init__(self, fetch: Callable[[Hashable], Awaitable[Any]], is_cached: Callable[[Hashable], bool],
+                 busy: Callable[[], bool], max_concurrent: int = 4, max_pending: int = 32):
+        self.fetch = fetch
+        self.is_cached = is_cached
+        self.busy = busy
+        self.max_pending = max_pending
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+        self.scheduled = 0
+        self.completed = 0
+        self.skipped = 0
+        self.dropped = 0
+        self.shed = 0
+
+    def schedule(self, keys: Iterable[Hashable]) -> int:
+        """Start prefetching keys in the background; returns how many were scheduled"""
+        if self.busy():
+            self.cancel()
+            return 0
+        started = 0
+        for key in keys:
+            if key in self._tasks or self.is_cached(key):
+                self.skipped += 1
+                continue
+            if len(self._tasks) >= self.max_pending:
+                self.dropped += 1
+                continue
+            task = detached_context().run(asyncio.create_task, self._run(key))
+            self._tasks[key] = task
+            task.add_done_callback(lambda t, key=key: self._tasks.pop(key, None))
+            self.scheduled += 1
+            started += 1
+        return started
+
+    async def _run(self, key: Hashable) -> None:
+        current_priority.set(Priority.PREFETCH)
+        async with self._semaphore:
+            if self.busy():
+                self.shed += 1
+                self.cancel()
+                return
+            try:
+                await self.fetch(key)
+                self.completed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.debug(f"Prefetch of {key} failed: {e}")
+
+    def cancel(self) -> None:
+        """Cancel every pending prefetch (shedding load)"""
+        current = asyncio.current_task()
+        for task in list(self._tasks.values()):
+            if task is not current and not task.done():
+                task.cancel()
+                self.shed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._tasks),
+            "scheduled": self.scheduled,
+            "completed": self.completed,
+            "skipped": self.skipped,
+            "dropped": self.dropped,
+            "shed": self.shed,
+        }
+
+    async def close(self) -> None:
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,167 @@
+"""
+Fex TV Backend - Candidate ranking
+TMDB result lists as NumPy columns for vectorized filtering, scoring and top-k selection
+"""
+
+import datetime
+from functools import cached_property
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Bits available in the genre mask
+MASK_BITS = 64
+
+
+def release_year(item: Dict[str, Any]) -> int:
+    """Year of a movie's release_date or a show's first_air_date, 0 when unknown"""
+    date = item.get("release_date") or item.get("first_air_date") or ""
+    return int(date[:4]) if date[:4].isdigit() else 0
+
+
+def _bit_masks(values_per_item: List[List[Any]]) -> Tuple[np.ndarray, Dict[Any, int]]:
+    """Assign one bit per distinct value (first 64 seen) and build a mask per item"""
+    bits: Dict[Any, int] = {}
+    masks = []
+    for values in values_per_item:
+        mask = 0
+        for value in values:
+            bit = bits.get(value)
+            if bit is None:
+                if len(bits) >= MASK_BITS:
+                    continue
+                bit = bits[value] = len(bits)
+            mask |= 1 << bit
+        masks.append(mask)
+    return np.array(masks, dtype=np.uint64), bits
+
+
+class Candidates:
+    """A list of TMDB results (movies, TV shows or credits) loaded into columns.
+
+    Columns are built on first use, one pass over the dicts each; filters,
+    scores and top-k selection after that are array operations. A single
+    filter-and-sort over a short list is no faster than a plain loop (see
+    bench/bench_ranking.py); the columns pay off once a request blends
+    several signals or re-ranks hundreds of merged candidates.
+    """
+
+    def __init__(self, items: List[Dict[str, Any]]):
+        self.items = items
+        self._country_rows: Dict[str, np.ndarray] = {}
+
+    def _column(self, field: str, dtype) -> np.ndarray:
+        return np.array([item.get(field) or 0 for item in self.items], dtype=dtype)
+
+    @cached_property
+    def popularity(self) -> np.ndarray:
+        return self._column("popularity", np.float64)
+
+    @cached_property
+    def vote_average(self) -> np.ndarray:
+        return self._column("vote_average", np.float64)
+
+    @cached_property
+    def vote_count(self) -> np.ndarray:
+        return self._column("vote_count", np.int64)
+
+    @cached_property
+    def year(self) -> np.ndarray:
+        # First four bytes of each ISO date, decoded as digits without a per-item int()
+        dates = np.array(
+            [item.get("release_date") or item.get("first_air_date") or "" for item in self.items], dtype="S4"
+        )
+        digits = dates.view(np.uint8).reshape(len(dates), 4).astype(np.int32) - ord("0")
+        known = ((digits >= 0) & (digits <= 9)).all(axis=1)
+        return np.where(known, digits @ np.array([1000, 100, 10, 1], dtype=np.int32), 0)
+
+    @cached_property
+    def language(self) -> np.ndarray:
+        return np.array([item.get("original_language") for item in self.items], dtype=object)
+
+    @cached_property
+    def media_type(self) -> np.ndarray:
+        return np.array([item.get("media_type") for item in self.items], dtype=object)
+
+    @cached_property
+    def _genres(self) -> Tuple[np.ndarray, Dict[Any, int]]:
+        return _bit_masks([item.get("genre_ids") or [] for item in self.items])
+
+    def _in_country(self, country: str) -> np.ndarray:
+        rows = self._country_rows.get(country)
+        if rows is None:
+            rows = self._country_rows[country] = np.fromiter(
+                (country in (item.get("origin_country") or ()) for item in self.items), bool, len(self.items)
+            )
+        return rows
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def _has_bits(self, columns: Tuple[np.ndarray, Dict[Any, int]], values: List[Any]) -> np.ndarray:
+        masks, bits = columns
+        required = 0
+        for value in values:
+            if value not in bits:
+                return np.zeros(len(self.items), dtype=bool)
+            required |= 1 << bits[value]
+        return (masks & np.uint64(required)) == np.uint64(required)
+
+    def match(self, country: Optional[str] = None, language: Optional[str] = None,
+              media_type: Optional[str] = None, genre_ids: Optional[List[int]] = None,
+              year: Optional[int] = None) -> np.ndarray:
+        """Boolean mask of candidates matching every given filter"""
+        mask = np.ones(len(self.items), dtype=bool)
+        if country:
+            mask &= self._in_country(country)
+        if language:
+            mask &= self.language == language
+        if media_type:
+            mask &= self.media_type == media_type
+        if genre_ids:
+            mask &= self._has_bits(self._genres, genre_ids)
+        if year:
+            mask &= self.year == year
+        return mask
+
+    def score(self, popularity: float = 1.0, rating: float = 0.0, recency: float = 0.0,
+              min_votes: int = 50, half_life_years: float = 5.0) -> np.ndarray:
+        """Blend of popularity, vote-count-weighted rating and recency.
+
+        With the defaults this is raw popularity, i.e. TMDB's own order.
+        Otherwise each component is scaled to [0, 1]: log popularity relative
+        to the most popular candidate, the average rating shrunk towards the
+        list mean when there are few votes, and a half-life decay by age.
+        """
+        if rating == 0 and recency == 0:
+            return self.popularity * popularity
+        scores = np.zeros(len(self.items))
+        if popularity and len(self.items):
+            log_popularity = np.log1p(self.popularity)
+            scores += popularity * log_popularity / max(log_popularity.max(), 1e-9)
+        if rating and len(self.items):
+            mean = self.vote_average.mean()
+            weighted = (self.vote_count * self.vote_average + min_votes * mean) / (self.vote_count + min_votes)
+            scores += rating * weighted / 10.0
+        if recency:
+            age = np.maximum(datetime.date.today().year - self.year, 0)
+            scores += recency * np.where(self.year > 0, 0.5 ** (age / half_life_years), 0.0)
+        return scores
+
+    def top_k(self, k: int, mask: Optional[np.ndarray] = None,
+              scores: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """The k best candidates by score (popularity by default), highest first.
+
+        Ties keep their input order, so the result is the same as a stable
+        sort of the filtered list truncated to k.
+        """
+        scores = self.popularity if scores is None else scores
+        rows = np.arange(len(self.items)) if mask is None else np.flatnonzero(mask)
+        if k <= 0 or not len(rows):
+            return []
+        if len(rows) > k:
+            # Everything scoring at least the k-th best; ties at the boundary are settled below
+            kth = scores[rows[np.argpartition(-scores[rows], k - 1)[k - 1]]]
+            rows = rows[scores[rows] >= kth]
+        order = rows[np.lexsort((rows, -scores[rows]))][:k]
+        return [self.items[row] for row in order]
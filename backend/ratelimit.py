@@ -0,0 +1,169 @@
+"""
+Fex TV Backend - Outbound rate limiting
+Token bucket with a priority queue so interactive requests go ahead of batch and prefetch work
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Outbound request priority classes, lower values are served first"""
+    INTERACTIVE = 0
+    BATCH = 1
+    PREFETCH = 2
+
+
+# Priority of the request being served; batch and prefetch code paths override it
+current_priority: ContextVar[Priority] = ContextVar("current_priority", default=Priority.INTERACTIVE)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when an outbound request can't be sent before its deadline"""
+
+
+def parse_retry_after(value: Optional[str], default: float = 1.0) -> float:
+    """Seconds to wait from a Retry-After header (delta-seconds form)"""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return default
+
+
+class OutboundScheduler:
+    """Token bucket sized to the upstream quota, with prioritized, deadline-aware waiting.
+
+    Requests that find a token and an empty queue go straight through. Others
+    wait in a heap ordered by priority then arrival; a single dispatcher hands
+    out tokens as they refill. Waiters whose deadline passes fail fast with
+    DeadlineExceeded instead of holding their place in line. pause() stops
+    dispatching entirely, e.g. until a 429's Retry-After has elapsed.
+    """
+
+    def __init__(self, rate: float, burst: int, max_wait: Optional[Dict[Priority, float]] = None):
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait or {}
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._queue: List[list] = []
+        self._sequence = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self.granted = 0
+        self.queued = 0
+        self.expired = 0
+        self.pauses = 0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _deadline(self, priority: Priority, deadline: Optional[float]) -> Optional[float]:
+        max_wait = self.max_wait.get(priority)
+        if max_wait is None:
+            return deadline
+        queue_deadline = time.monotonic() + max_wait
+        return queue_deadline if deadline is None else min(deadline, queue_deadline)
+
+    async def acquire(self, priority: Optional[Priority] = None, deadline: Optional[float] = None) -> None:
+        """Wait for a token; deadline is a time.monotonic() timestamp"""
+        priority = current_priority.get() if priority is None else priority
+        now = time.monotonic()
+        deadline = self._deadline(priority, deadline)
+        if deadline is not None and now >= deadline:
+            self.expired += 1
+            raise DeadlineExceeded("Deadline passed before the request was sent")
+
+        self._refill(now)
+        if not self._queue and now >= self.paused_until and self.tokens >= 1:
+            self.tokens -= 1
+            self.granted += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        entry = [priority, next(self._sequence), future]
+        heapq.heappush(self._queue, entry)
+        self.queued += 1
+        self._wake()
+        try:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                # Granted at the last moment, use the token rather than waste it
+                return
+            future.cancel()
+            self.expired += 1
+            raise DeadlineExceeded(f"Waited {timeout:.2f}s for an upstream rate-limit token")
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+
+    def congested(self, priority: Priority) -> bool:
+        """Whether requests more urgent than priority are waiting for tokens, or dispatch is paused"""
+        if time.monotonic() < self.paused_until:
+            return True
+        return any(entry[0] < priority and not entry[2].done() for entry in self._queue)
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out tokens for the given number of seconds"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.pauses += 1
+        logger.warning(f"Outbound requests paused for {seconds:.1f}s")
+
+    def _wake(self) -> None:
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def _dispatch(self) -> None:
+        while self._queue:
+            # Drop waiters that gave up (deadline passed or caller cancelled)
+            while self._queue and self._queue[0][2].done():
+                heapq.heappop(self._queue)
+            if not self._queue:
+                break
+
+            now = time.monotonic()
+            if now < self.paused_until:
+                await asyncio.sleep(self.paused_until - now)
+                continue
+
+            self._refill(now)
+            if self.tokens >= 1:
+                _, _, future = heapq.heappop(self._queue)
+                self.tokens -= 1
+                self.granted += 1
+                future.set_result(None)
+            else:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def stats(self) -> Dict[str, Any]:
+        waiting: Dict[str, int] = {}
+        for priority, _, future in self._queue:
+            if not future.done():
+                name = Priority(priority).name.lower()
+                waiting[name] = waiting.get(name, 0) + 1
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "tokens": round(self.tokens, 2),
+            "waiting": waiting,
+            "granted": self.granted,
+            "queued": self.queued,
+            "expired": self.expired,
+            "pauses": self.pauses,
+            "paused_for": round(max(0.0, self.paused_until - time.monotonic()), 2),
+        }
+
+    async def close(self) -> None:
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
@@ -0,0 +1,185 @@
+"""
+Fex TV Backend - Upstream resilience
+Per-endpoint circuit breakers and hedged requests
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+import httpx
+
+from ratelimit import DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling an upstream endpoint whose breaker is open"""
+
+
+def is_upstream_failure(error: BaseException) -> Optional[bool]:
+    """Classify an exception for the breaker.
+
+    Returns None for errors that say nothing about upstream health (our own
+    deadline), False for client errors the upstream answered correctly
+    (404 etc.), True for timeouts, connection errors, 5xx and 429.
+    """
+    if isinstance(error, (DeadlineExceeded, CircuitOpen, asyncio.CancelledError)):
+        return None
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status >= 500 or status == 429
+    return True
+
+
+class CircuitBreaker:
+    """Trips on error rate or slow-call rate over a sliding window of calls.
+
+    While open, calls are rejected immediately for `open_seconds`; then one
+    probe is let through (half-open) and its outcome closes or re-opens the
+    breaker. Recent latencies are kept so callers can hedge at the p95.
+    """
+
+    def __init__(self, name: str, window: int = 20, min_calls: int = 10,
+                 error_rate: float = 0.5, slow_call_seconds: float = 3.0,
+                 slow_rate: float = 0.8, open_seconds: float = 30.0):
+        self.name = name
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        self.state = CLOSED
+        self.opened_until = 0.0
+        self.probe_in_flight = False
+        # (failed, slow) per call
+        self.outcomes: Deque[Tuple[bool, bool]] = deque(maxlen=window)
+        self.latencies: Deque[float] = deque(maxlen=200)
+        self.rejected = 0
+        self.trips = 0
+
+    def allow(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.monotonic() >= self.opened_until:
+            self.state = HALF_OPEN
+            self.probe_in_flight = False
+        if self.state == HALF_OPEN and not self.probe_in_flight:
+            self.probe_in_flight = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record(self, failed: bool, duration: float) -> None:
+        slow = duration >= self.slow_call_seconds
+        if not failed:
+            self.latencies.append(duration)
+
+        if self.state == HALF_OPEN:
+            self.probe_in_flight = False
+            if failed or slow:
+                self._trip()
+            else:
+                logger.info(f"Circuit {self.name} closed")
+                self.state = CLOSED
+                self.outcomes.clear()
+            return
+
+        self.outcomes.append((failed, slow))
+        calls = len(self.outcomes)
+        if self.state == CLOSED and calls >= self.min_calls:
+            failures = sum(1 for failed, _ in self.outcomes if failed)
+            slow_calls = sum(1 for _, slow in self.outcomes if slow)
+            if failures / calls >= self.error_rate or slow_calls / calls >= self.slow_rate:
+                self._trip()
+
+    def release_probe(self) -> None:
+        """Give the half-open probe back when it ended without an outcome"""
+        if self.state == HALF_OPEN:
+            self.probe_in_flight = False
+
+    def _trip(self) -> None:
+        self.state = OPEN
+        self.opened_until = time.monotonic() + self.open_seconds
+        self.outcomes.clear()
+        self.trips += 1
+        logger.warning(f"Circuit {self.name} opened for {self.open_seconds:.0f}s")
+
+    def p95(self, min_samples: int = 20) -> Optional[float]:
+        if len(self.latencies) < min_samples:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def stats(self) -> Dict[str, Any]:
+        p95 = self.p95()
+        return {
+            "state": self.state,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "window_calls": len(self.outcomes),
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+
+
+async def call_with_breaker(breaker: CircuitBreaker, fn: Callable[[], Awaitable[Any]]) -> Any:
+    """Run fn() if the breaker allows it, recording the outcome"""
+    if not breaker.allow():
+        raise CircuitOpen(f"Circuit {breaker.name} is open")
+    started = time.monotonic()
+    try:
+        result = await fn()
+    except BaseException as e:
+        failed = is_upstream_failure(e)
+        if failed is None:
+            breaker.release_probe()
+        else:
+            breaker.record(failed, time.monotonic() - started)
+        raise
+    breaker.record(False, time.monotonic() - started)
+    return result
+
+
+class Hedger:
+    """Fire a duplicate request when the first is slower than the hedge delay"""
+
+    def __init__(self):
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    async def run(self, fn: Callable[[], Awaitable[Any]], delay: Optional[float]) -> Any:
+        """Return the first successful result of fn(), hedging after `delay` seconds"""
+        if delay is None:
+            return await fn()
+
+        first = asyncio.ensure_future(fn())
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result()
+
+        self.hedged += 1
+        second = asyncio.ensure_future(fn())
+        pending = {first, second}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.hedge_wins += 1
+                        return task.result()
+                    if not pending:
+                        raise task.exception()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hedged": self.hedged, "hedge_wins": self.hedge_wins}
@@ -0,0 +1,121 @@
+"""
+Fex TV Backend - Response encoding
+orjson-encoded JSON responses and client-selected field projection
+"""
+
+import json
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Set
+from urllib.parse import parse_qs
+
+from fastapi.responses import JSONResponse, StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse as FastJSONResponse
+    ORJSON_AVAILABLE = True
+except ImportError:
+    FastJSONResponse = JSONResponse
+    ORJSON_AVAILABLE = False
+
+try:
+    from brotli_asgi import BrotliMiddleware
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BrotliMiddleware = None
+    BROTLI_AVAILABLE = False
+
+# Lists of result items that a `fields` projection applies to
+ITEM_LISTS = ("recommendations", "restaurants")
+# Kept in every projected item so clients can still key their cards
+ALWAYS_FIELDS = ("id", "type")
+
+
+def parse_fields(value: Optional[str]) -> Optional[Set[str]]:
+    """Parse a `fields=id,title,poster_path` query value; None means all fields"""
+    if not value:
+        return None
+    fields = {name.strip() for name in value.split(",") if name.strip()}
+    return fields | set(ALWAYS_FIELDS) if fields else None
+
+
+def project(item: Dict[str, Any], fields: Optional[Set[str]]) -> Dict[str, Any]:
+    """Keep only the selected top-level fields of one item"""
+    if fields is None:
+        return item
+    return {key: value for key, value in item.items() if key in fields}
+
+
+def project_payload(payload: Dict[str, Any], fields: Optional[Set[str]]) -> Dict[str, Any]:
+    """Apply a projection to a response's result items, leaving the envelope intact"""
+    if fields is None:
+        return payload
+    payload = dict(payload)
+    for key in ITEM_LISTS:
+        if isinstance(payload.get(key), list):
+            payload[key] = [project(item, fields) for item in payload[key]]
+    if isinstance(payload.get("movie"), dict):
+        payload["movie"] = project(payload["movie"], fields)
+    return payload
+
+
+def compact(mapping: Dict[str, Any], drop: Iterable[str] = ()) -> Dict[str, Any]:
+    """Copy of a dict without None values and the `drop` keys"""
+    drop = set(drop)
+    return {key: value for key, value in mapping.items() if value is not None and key not in drop}
+
+
+def json_response(payload: Any, fields: Optional[Set[str]] = None, status_code: int = 200):
+    """Encode a payload of plain JSON types directly with orjson.
+
+    Returning a Response skips FastAPI's jsonable_encoder pass, which walks
+    every nested value in Python before the encoder runs again.
+    """
+    if isinstance(payload, dict):
+        payload = project_payload(payload, fields)
+    return FastJSONResponse(payload, status_code=status_code)
+
+
+def project_batch(results: List[Dict[str, Any]], fields: Optional[Set[str]]) -> List[Dict[str, Any]]:
+    return [project_payload(result, fields) for result in results]
+
+
+def dumps(payload: Any) -> bytes:
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+
+def ndjson_response(items: AsyncIterator[Dict[str, Any]]) -> StreamingResponse:
+    """Stream one JSON object per line as each becomes available"""
+    async def lines():
+        async for item in items:
+            yield dumps(item) + b"\n"
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+class SkipCompression:
+    """Wrap a compression middleware, bypassing it for requests `skip(scope)` selects.
+
+    Used for streamed responses: the compressor would hold lines in its
+    buffer until enough bytes arrive, defeating the point of streaming.
+    """
+
+    def __init__(self, app, middleware, skip: Callable[[Dict[str, Any]], bool], **options):
+        self.app = app
+        self.compressed = middleware(app, **options)
+        self.skip = skip
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and self.skip(scope):
+            await self.app(scope, receive, send)
+        else:
+            await self.compressed(scope, receive, send)
+
+
+def query_flag(scope: Dict[str, Any], name: str) -> bool:
+    """Whether a boolean query parameter is set to true in an ASGI scope"""
+    values = parse_qs(scope.get("query_string", b"").decode("latin-1")).get(name, [])
+    return bool(values) and values[-1].lower() in ("1", "true", "yes", "on")
@@ -0,0 +1,482 @@
+"""
+Fex TV Backend - Restaurant index
+Restaurants held in memory with a category index and a lat/lon grid, so food
+queries are answered without a Yelp round trip
+
+An index is built once from formatted restaurants (the mock set, or a Yelp
+snapshot refreshed in the background). Category lookups go through an
+inverted index, position lookups through a uniform grid of
+GRID_CELL_DEGREES cells searched ring by ring outward from the query point.
+Distance and delivery estimates are formatted once when the index is built
+(relative to the indexed location); queries with their own coordinates
+recompute them only for the rows they return.
+"""
+
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE = 69.0
+# ~1.1 km of latitude per cell
+GRID_CELL_DEGREES = 0.01
+# How far outside its restaurants an index still answers coordinate queries
+COVERAGE_MARGIN_DEGREES = 0.05
+# Distinct search terms whose matches are memoized per index
+MAX_CACHED_TERMS = 1024
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Delivery estimate by distance: below each bound (miles), the label
+DELIVERY_BANDS = [(1, "15-25 min"), (3, "25-35 min"), (5, "35-45 min")]
+
+
+def estimate_delivery_time(distance_miles: Optional[float] = None) -> str:
+    """Estimate delivery time based on distance"""
+    if not distance_miles:
+        return "25-35 min"
+    for bound, label in DELIVERY_BANDS:
+        if distance_miles < bound:
+            return label
+    return "45-60 min"
+
+
+def distances_miles(latitude: float, longitude: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distance in miles from one point to arrays of points"""
+    lat1, lon1 = math.radians(latitude), math.radians(longitude)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def geohash_encode(latitude: float, longitude: float, precision: int = 6) -> str:
+    """Geohash of a point; nearby points share prefixes (precision 6 is ~1.2 x 0.6 km)"""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        span, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (span[0] + span[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            span[0] = middle
+        else:
+            span[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def geohash_bounds(geohash: str) -> Tuple[float, float, float, float]:
+    """(lat_min, lat_max, lon_min, lon_max) of a geohash cell"""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = GEOHASH_ALPHABET.index(char)
+        for shift in range(4, -1, -1):
+            span = lon_range if even else lat_range
+            middle = (span[0] + span[1]) / 2
+            if value >> shift & 1:
+                span[0] = middle
+            else:
+                span[1] = middle
+            even = not even
+    return lat_range[0], lat_range[1], lon_range[0], lon_range[1]
+
+
+def geohash_center(geohash: str) -> Tuple[float, float]:
+    lat_min, lat_max, lon_min, lon_max = geohash_bounds(geohash)
+    return (lat_min + lat_max) / 2, (lon_min + lon_max) / 2
+
+
+def geohash_neighbors(geohash: str) -> List[str]:
+    """The 8 cells around a geohash cell, nearest (edge-sharing) first"""
+    lat_min, lat_max, lon_min, lon_max = geohash_bounds(geohash)
+    latitude, longitude = (lat_min + lat_max) / 2, (lon_min + lon_max) / 2
+    lat_step, lon_step = lat_max - lat_min, lon_max - lon_min
+    neighbors = []
+    for dlat, dlon in [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1)]:
+        lat = latitude + dlat * lat_step
+        if not -90 <= lat <= 90:
+            continue
+        lon = (longitude + dlon * lon_step + 180) % 360 - 180
+        neighbors.append(geohash_encode(lat, lon, len(geohash)))
+    return neighbors
+
+
+def format_business(business: Dict[str, Any]) -> Dict[str, Any]:
+    """Format a Yelp /businesses/search result as a restaurant"""
+    # Yelp reports distance in meters from the searched location
+    distance = (business.get("distance", 0) / 1609.34) if business.get("distance") else None
+    coordinates = business.get("coordinates") or {}
+    return {
+        "id": business.get("id"),
+        "name": business.get("name"),
+        "image_url": business.get("image_url"),
+        "rating": business.get("rating"),
+        "price": business.get("price", "$$"),
+        "categories": [cat.get("title") for cat in business.get("categories", [])],
+        "address": ", ".join(business.get("location", {}).get("display_address", [])),
+        "distance": round(distance, 1) if distance else None,
+        "delivery_time": estimate_delivery_time(distance),
+        "phone": business.get("display_phone"),
+        "url": business.get("url"),
+        "is_closed": business.get("is_closed", False),
+        "latitude": coordinates.get("latitude"),
+        "longitude": coordinates.get("longitude"),
+    }
+
+
+def rank_by_distance(restaurants: List[Dict[str, Any]], latitude: float, longitude: float,
+                     radius_miles: Optional[float] = None, limit: int = 20) -> List[Dict[str, Any]]:
+    """Copies of the located restaurants, nearest first, with distance and delivery estimate from a point"""
+    located = [r for r in restaurants if r.get("latitude") is not None and r.get("longitude") is not None]
+    if not located:
+        return restaurants[:limit]
+    distances = distances_miles(
+        latitude, longitude,
+        np.array([r["latitude"] for r in located]), np.array([r["longitude"] for r in located])
+    )
+    ranked = []
+    for row in np.argsort(distances, kind="stable"):
+        distance = float(distances[row])
+        if radius_miles and distance > radius_miles:
+            break
+        ranked.append(dict(located[row], distance=round(distance, 1), delivery_time=estimate_delivery_time(distance)))
+        if len(ranked) >= limit:
+            break
+    return ranked
+
+
+class RestaurantIndex:
+    """Formatted restaurants with category and position lookups.
+
+    Restaurants are served as-is (shared, treat as read-only) unless a query
+    passes coordinates, in which case copies carry the distance from there.
+    """
+
+    def __init__(self, restaurants: List[Dict[str, Any]], location: str, created_at: float = 0.0):
+        self.restaurants = restaurants
+        self.location = location.strip().lower()
+        self.created_at = created_at
+
+        # Category name -> rows, in list order
+        categories: Dict[str, List[int]] = {}
+        for row, restaurant in enumerate(restaurants):
+            for category in restaurant.get("categories", []):
+                rows = categories.setdefault(category.lower(), [])
+                if not rows or rows[-1] != row:
+                    rows.append(row)
+        self.categories = {name: np.array(rows, dtype=np.int32) for name, rows in categories.items()}
+        self._term_rows: Dict[str, np.ndarray] = {}
+        self._term_masks: Dict[str, np.ndarray] = {}
+
+        located = [
+            row for row, r in enumerate(restaurants)
+            if r.get("latitude") is not None and r.get("longitude") is not None
+        ]
+        self.located = np.array(located, dtype=np.int32)
+        self.lats = np.array([restaurants[row]["latitude"] for row in located], dtype=np.float64)
+        self.lons = np.array([restaurants[row]["longitude"] for row in located], dtype=np.float64)
+        cells: Dict[Tuple[int, int], List[int]] = {}
+        for position, (lat, lon) in enumerate(zip(self.lats, self.lons)):
+            cells.setdefault(self._cell(lat, lon), []).append(position)
+        self.cells = {cell: np.array(positions, dtype=np.int32) for cell, positions in cells.items()}
+        if located:
+            self.bounds = (self.lats.min(), self.lats.max(), self.lons.min(), self.lons.max())
+        else:
+            self.bounds = None
+
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _cell(latitude: float, longitude: float) -> Tuple[int, int]:
+        return math.floor(latitude / GRID_CELL_DEGREES), math.floor(longitude / GRID_CELL_DEGREES)
+
+    def __len__(self) -> int:
+        return len(self.restaurants)
+
+    def covers(self, location: Optional[str] = None, latitude: Optional[float] = None,
+               longitude: Optional[float] = None) -> bool:
+        """Whether a query for this location or point can be answered from the index"""
+        if latitude is not None and longitude is not None:
+            if self.bounds is None:
+                return False
+            lat_min, lat_max, lon_min, lon_max = self.bounds
+            return (lat_min - COVERAGE_MARGIN_DEGREES <= latitude <= lat_max + COVERAGE_MARGIN_DEGREES
+                    and lon_min - COVERAGE_MARGIN_DEGREES <= longitude <= lon_max + COVERAGE_MARGIN_DEGREES)
+        return bool(location) and location.strip().lower() == self.location
+
+    def term_rows(self, term: str) -> np.ndarray:
+        """Rows with a category containing term (case-insensitive), in list order"""
+        term = term.strip().lower()
+        rows = self._term_rows.get(term)
+        if rows is None:
+            # Substring match over the category vocabulary, not every restaurant
+            matched = [rows for name, rows in self.categories.items() if term in name]
+            rows = np.unique(np.concatenate(matched)) if matched else np.zeros(0, dtype=np.int32)
+            if len(self._term_rows) < MAX_CACHED_TERMS:
+                self._term_rows[term] = rows
+        return rows
+
+    def _allowed(self, term: Optional[str]) -> Optional[np.ndarray]:
+        """Boolean mask over located positions allowed by the term, or None for all"""
+        if not term:
+            return None
+        mask = self._term_masks.get(term)
+        if mask is None:
+            rows = np.zeros(len(self.restaurants), dtype=bool)
+            rows[self.term_rows(term)] = True
+            mask = rows[self.located]
+            if len(self._term_masks) < MAX_CACHED_TERMS:
+                self._term_masks[term] = mask
+        return mask
+
+    def nearest(self, latitude: float, longitude: float, k: int,
+                allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Located positions of the k nearest restaurants and their distances, nearest first"""
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        ci, cj = self._cell(latitude, longitude)
+        # Anything outside ring r is at least r cells away along one axis
+        miles_per_ring = GRID_CELL_DEGREES * MILES_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01)
+        found: List[np.ndarray] = []
+        count = 0
+        ring = 0
+        while True:
+            if (2 * ring + 1) ** 2 > len(self.cells):
+                # The ring search would visit more cells than exist: check every restaurant
+                positions = np.arange(len(self.located))
+                if allowed is not None:
+                    positions = positions[allowed]
+                return self._closest(latitude, longitude, positions, k)
+            cells = [self.cells[cell] for cell in self._ring(ci, cj, ring) if cell in self.cells]
+            if cells:
+                positions = np.concatenate(cells)
+                if allowed is not None:
+                    positions = positions[allowed[positions]]
+                found.append(positions)
+                count += len(positions)
+            if count >= k:
+                positions, distances = self._closest(latitude, longitude, np.concatenate(found), k)
+                if distances[-1] <= ring * miles_per_ring:
+                    return positions, distances
+            ring += 1
+
+    def within(self, latitude: float, longitude: float, radius_miles: float,
+               allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Located positions within radius_miles and their distances, nearest first"""
+        lat_span = radius_miles / MILES_PER_DEGREE
+        lon_span = radius_miles / (MILES_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+        i0, j0 = self._cell(latitude - lat_span, longitude - lon_span)
+        i1, j1 = self._cell(latitude + lat_span, longitude + lon_span)
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(self.cells):
+            cells = [positions for (i, j), positions in self.cells.items() if i0 <= i <= i1 and j0 <= j <= j1]
+        else:
+            cells = [self.cells[(i, j)] for i in range(i0, i1 + 1) for j in range(j0, j1 + 1) if (i, j) in self.cells]
+        if not cells:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        positions = np.concatenate(cells)
+        if allowed is not None:
+            positions = positions[allowed[positions]]
+        positions, distances = self._closest(latitude, longitude, positions, len(positions))
+        keep = distances <= radius_miles
+        return positions[keep], distances[keep]
+
+    def _closest(self, latitude: float, longitude: float, positions: np.ndarray,
+                 k: int) -> Tuple[np.ndarray, np.ndarray]:
+        distances = distances_miles(latitude, longitude, self.lats[positions], self.lons[positions])
+        order = np.argsort(distances, kind="stable")[:k]
+        return positions[order], distances[order]
+
+    @staticmethod
+    def _ring(ci: int, cj: int, ring: int):
+        if ring == 0:
+            yield ci, cj
+            return
+        for j in range(cj - ring, cj + ring + 1):
+            yield ci - ring, j
+            yield ci + ring, j
+        for i in range(ci - ring + 1, ci + ring):
+            yield i, cj - ring
+            yield i, cj + ring
+
+    def search(self, term: Optional[str] = None, latitude: Optional[float] = None,
+               longitude: Optional[float] = None, radius_miles: Optional[float] = None,
+               limit: int = 20) -> List[Dict[str, Any]]:
+        """Restaurants matching term; nearest first when coordinates are given, else in index order"""
+        if latitude is None or longitude is None:
+            rows = self.term_rows(term) if term else np.arange(len(self.restaurants))
+            results = [self.restaurants[row] for row in rows[:limit]]
+        else:
+            allowed = self._allowed(term)
+            if radius_miles:
+                positions, distances = self.within(latitude, longitude, radius_miles, allowed)
+                positions, distances = positions[:limit], distances[:limit]
+            else:
+                positions, distances = self.nearest(latitude, longitude, limit, allowed)
+            results = [
+                dict(self.restaurants[self.located[position]], distance=round(float(distance), 1),
+                     delivery_time=estimate_delivery_time(float(distance)))
+                for position, distance in zip(positions, distances)
+            ]
+        if results:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "location": self.location,
+            "restaurants": len(self.restaurants),
+            "categories": len(self.categories),
+            "cells": len(self.cells),
+            "created_at": self.created_at or None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Demo restaurants served when no Yelp key is configured, around Times Square
+MOCK_RESTAURANTS = [
+    {
+        "id": "mock1",
+        "name": "Pizza Palace",
+        "image_url": "https://images.unsplash.com/photo-1513104890138-7c749659a591?w=400",
+        "rating": 4.5,
+        "price": "$$",
+        "categories": ["Pizza", "Italian", "Fast Food"],
+        "address": "123 Main St, New York, NY",
+        "distance": 0.8,
+        "delivery_time": "20-30 min",
+        "phone": "(555) 123-4567",
+        "url": "#",
+        "is_closed": False,
+        "latitude": 40.7689,
+        "longitude": -73.9803
+    },
+    {
+        "id": "mock2",
+        "name": "Sushi Express",
+        "image_url": "https://images.unsplash.com/photo-1579584425555-c3ce17fd4351?w=400",
+        "rating": 4.7,
+        "price": "$$$",
+        "categories": ["Sushi", "Japanese", "Asian"],
+        "address": "456 Broadway, New York, NY",
+        "distance": 1.2,
+        "delivery_time": "25-35 min",
+        "phone": "(555) 234-5678",
+        "url": "#",
+        "is_closed": False,
+        "latitude": 40.7417,
+        "longitude": -73.9934
+    },
+    {
+        "id": "mock3",
+        "name": "Burger House",
+        "image_url": "https://images.unsplash.com/photo-1568901346375-23c9450c58cd?w=400",
+        "rating": 4.3,
+        "price": "$",
+        "categories": ["Burgers", "American", "Fast Food"],
+        "address": "789 5th Ave, New York, NY",
+        "distance": 0.5,
+        "delivery_time": "15-25 min",
+        "phone": "(555) 345-6789",
+        "url": "#",
+        "is_closed": False,
+        "latitude": 40.7593,
+        "longitude": -73.9761
+    },
+    {
+        "id": "mock4",
+        "name": "Thai Garden",
+        "image_url": "https://images.unsplash.com/photo-1555939594-58d7cb561ad1?w=400",
+        "rating": 4.6,
+        "price": "$$",
+        "categories": ["Thai", "Asian", "Vegetarian"],
+        "address": "321 Park Ave, New York, NY",
+        "distance": 1.5,
+        "delivery_time": "30-40 min",
+        "phone": "(555) 456-7890",
+        "url": "#",
+        "is_closed": False,
+        "latitude": 40.7689,
+        "longitude": -74.0104
+    },
+    {
+        "id": "mock5",
+        "name": "Taco Fiesta",
+        "image_url": "https://images.unsplash.com/photo-1565299585323-38174c2b7c1a?w=400",
+        "rating": 4.4,
+        "price": "$",
+        "categories": ["Mexican", "Tacos", "Fast Food"],
+        "address": "654 Lexington Ave, New York, NY",
+        "distance": 0.9,
+        "delivery_time": "20-30 min",
+        "phone": "(555) 567-8901",
+        "url": "#",
+        "is_closed": False,
+        "latitude": 40.7467,
+        "longitude": -73.9769
+    },
+    {
+        "id": "mock6",
+        "name": "Wings & Things",
+        "image_url": "https://images.unsplash.com/photo-1527477396000-e27137b2a0e7?w=400",
+        "rating": 4.2,
+        "price": "$$",
+        "categories": ["Wings", "American", "Sports Bar"],
+        "address": "987 Madison Ave, New York, NY",
+        "distance": 1.8,
+        "delivery_time": "35-45 min",
+        "phone": "(555) 678-9012",
+        "url": "#",
+        "is_closed": False,
+        "latitude": 40.7837,
+        "longitude": -73.9795
+    },
+    {
+        "id": "mock7",
+        "name": "Spice Garden",
+        "image_url": "https://images.unsplash.com/photo-1585937421612-70a008356fbe?w=400",
+        "rating": 4.6,
+        "price": "$$",
+        "categories": ["Indian", "Curry", "Vegetarian"],
+        "address": "555 Lexington Ave, New York, NY",
+        "distance": 1.1,
+        "delivery_time": "25-35 min",
+        "phone": "(555) 789-0123",
+        "url": "#",
+        "is_closed": False,
+        "latitude": 40.7500,
+        "longitude": -73.9673
+    },
+    {
+        "id": "mock8",
+        "name": "Tandoor Express",
+        "image_url": "https://images.unsplash.com/photo-1563379091339-03246963d29b?w=400",
+        "rating": 4.5,
+        "price": "$$",
+        "categories": ["Indian", "Tandoor", "Halal"],
+        "address": "222 Park Ave, New York, NY",
+        "distance": 0.7,
+        "delivery_time": "20-30 min",
+        "phone": "(555) 890-1234",
+        "url": "#",
+        "is_closed": False,
+        "latitude": 40.7545,
+        "longitude": -73.9981
+    }
+]
@@ -0,0 +1,315 @@
+"""
+Fex TV Backend - Semantic recommendations
+Embeds catalog overviews and answers description/mood queries by vector similarity
+
+Titles come from the local catalog snapshot (see catalog.py). Each title's
+name and overview is embedded and stored in an inverted-file (IVF) index:
+vectors are clustered with spherical k-means, and a query only scores the
+vectors in its `nprobe` nearest clusters. The index is saved as NumPy files
+plus a JSON sidecar and loaded memory-mapped.
+
+Embeddings use sentence-transformers when it is installed; otherwise a
+feature-hashing bag of words, which needs nothing beyond NumPy and matches
+on shared words rather than meaning. Qdrant can hold the vectors instead of
+the local index (SEMANTIC_BACKEND=qdrant, with QDRANT_URL for a server or
+QDRANT_PATH for its on-disk local mode).
+
+Build the index from backend/ after building the catalog snapshot:
+    python -m semantic
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+
+try:
+    from qdrant_client import QdrantClient
+    from qdrant_client.models import Distance, FieldCondition, Filter, MatchValue, PointStruct, VectorParams
+    QDRANT_AVAILABLE = True
+except ImportError:
+    QDRANT_AVAILABLE = False
+
+INDEX_VERSION = 1
+MEDIA_CODES = {"movie": 0, "tv": 1}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+STOPWORDS = frozenset(
+    "a an the and or of to in on at for with about from by is are be it its this that "
+    "something some me i i'm want show watch find movie movies film films".split()
+)
+
+
+def _media_type(item: Dict[str, Any]) -> str:
+    return item.get("media_type") or ("tv" if "name" in item else "movie")
+
+
+def document_text(item: Dict[str, Any]) -> str:
+    """Text embedded for a title: its name and overview"""
+    return f"{item.get('title') or item.get('name') or ''}. {item.get('overview') or ''}"
+
+
+class HashingEmbedder:
+    """Signed feature hashing of words and word pairs, L2-normalized"""
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text: str) -> List[str]:
+        words = [word for word in TOKEN_PATTERN.findall(text.lower()) if word not in STOPWORDS]
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                code = zlib.crc32(feature.encode())
+                vectors[row, code % self.dim] += 1.0 if code & 0x80000000 else -1.0
+        # Sublinear term frequency, then unit length for cosine similarity
+        vectors = np.sign(vectors) * np.log1p(np.abs(vectors))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-9)
+
+
+class SentenceEmbedder:
+    """sentence-transformers model producing normalized embeddings"""
+
+    def __init__(self, model_name: str):
+        self.model = SentenceTransformer(model_name)
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = model_name
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(texts, normalize_embeddings=True, convert_to_numpy=True).astype(np.float32)
+
+
+def make_embedder(model_name: str):
+    """The configured sentence-transformers model, or the hashing embedder without it"""
+    if model_name.startswith("hashing") or not SENTENCE_TRANSFORMERS_AVAILABLE:
+        if not model_name.startswith("hashing"):
+            logger.warning("sentence-transformers is not installed, using hashed word embeddings")
+        return HashingEmbedder()
+    return SentenceEmbedder(model_name)
+
+
+def spherical_kmeans(vectors: np.ndarray, clusters: int, iterations: int = 12,
+                     seed: int = 7) -> Tuple[np.ndarray, np.ndarray]:
+    """Cluster unit vectors by cosine similarity, returning (centroids, assignment)"""
+    rng = np.random.default_rng(seed)
+    clusters = max(1, min(clusters, len(vectors)))
+    centroids = vectors[rng.choice(len(vectors), clusters, replace=False)].copy()
+    assignment = np.zeros(len(vectors), dtype=np.int64)
+    for _ in range(iterations):
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        for cluster in range(clusters):
+            members = vectors[assignment == cluster]
+            if len(members):
+                centroid = members.sum(axis=0)
+            else:
+                # Re-seed an empty cluster with a random vector
+                centroid = vectors[rng.integers(len(vectors))].copy()
+            centroids[cluster] = centroid / max(np.linalg.norm(centroid), 1e-9)
+    return centroids, assignment
+
+
+class IVFIndex:
+    """Inverted-file index over unit vectors, rows grouped by cluster"""
+
+    def __init__(self, centroids: np.ndarray, vectors: np.ndarray, rows: np.ndarray,
+                 offsets: np.ndarray, media: np.ndarray):
+        self.centroids = centroids
+        self.vectors = vectors   # grouped by cluster
+        self.rows = rows         # item row of each vector
+        self.offsets = offsets   # cluster c is vectors[offsets[c]:offsets[c + 1]]
+        self.media = media       # media code of each vector
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, media: np.ndarray, clusters: Optional[int] = None) -> "IVFIndex":
+        clusters = clusters or max(1, int(np.sqrt(len(vectors))))
+        centroids, assignment = spherical_kmeans(vectors, clusters)
+        order = np.argsort(assignment, kind="stable")
+        offsets = np.searchsorted(assignment[order], np.arange(len(centroids) + 1))
+        return cls(centroids, vectors[order], order.astype(np.int32), offsets, media[order])
+
+    def search(self, query: np.ndarray, k: int, nprobe: int = 8,
+               media: Optional[int] = None) -> List[Tuple[int, float]]:
+        """(item row, cosine similarity) of the k nearest vectors in the nprobe nearest clusters"""
+        nprobe = min(nprobe, len(self.centroids))
+        nearest = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        candidates = np.concatenate([np.arange(self.offsets[c], self.offsets[c + 1]) for c in nearest])
+        if media is not None:
+            candidates = candidates[self.media[candidates] == media]
+        if not len(candidates):
+            return []
+        scores = self.vectors[candidates] @ query
+        top = np.argpartition(-scores, min(k, len(scores)) - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(self.rows[candidates[i]]), float(scores[i])) for i in top]
+
+    def save(self, path: str) -> None:
+        for name in ("centroids", "vectors", "rows", "offsets", "media"):
+            tmp = os.path.join(path, f"{name}.npy.tmp")
+            with open(tmp, "wb") as f:
+                np.save(f, getattr(self, name))
+            os.replace(tmp, os.path.join(path, f"{name}.npy"))
+
+    @classmethod
+    def load(cls, path: str) -> "IVFIndex":
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+            for name in ("centroids", "vectors", "rows", "offsets", "media")
+        }
+        return cls(**arrays)
+
+
+class QdrantIndex:
+    """Vectors held in a Qdrant collection (a server, or local mode on disk)"""
+
+    def __init__(self, collection: str, url: str = "", path: str = ""):
+        if not QDRANT_AVAILABLE:
+            raise RuntimeError("SEMANTIC_BACKEND=qdrant needs `pip install qdrant-client`")
+        self.client = QdrantClient(url=url) if url else QdrantClient(path=path)
+        self.collection = collection
+
+    def upload(self, vectors: np.ndarray, media: np.ndarray) -> None:
+        self.client.recreate_collection(
+            self.collection,
+            vectors_config=VectorParams(size=vectors.shape[1], distance=Distance.COSINE)
+        )
+        points = [
+            PointStruct(id=row, vector=vector.tolist(), payload={"media": int(code)})
+            for row, (vector, code) in enumerate(zip(vectors, media))
+        ]
+        for start in range(0, len(points), 256):
+            self.client.upsert(self.collection, points=points[start:start + 256])
+
+    def search(self, query: np.ndarray, k: int, nprobe: int = 8,
+               media: Optional[int] = None) -> List[Tuple[int, float]]:
+        query_filter = None
+        if media is not None:
+            query_filter = Filter(must=[FieldCondition(key="media", match=MatchValue(value=media))])
+        hits = self.client.search(self.collection, query_vector=query.tolist(), limit=k, query_filter=query_filter)
+        return [(int(hit.id), float(hit.score)) for hit in hits]
+
+
+class SemanticEngine:
+    """Embedder plus vector index over catalog titles"""
+
+    def __init__(self, embedder, index, items: List[Dict[str, Any]], nprobe: int = 8):
+        self.embedder = embedder
+        self.index = index
+        self.items = items
+        self.nprobe = nprobe
+        self.queries = 0
+
+    @classmethod
+    def load(cls, path: str, model_name: str, backend: str = "local", nprobe: int = 8,
+             qdrant_url: str = "", qdrant_path: str = "") -> Optional["SemanticEngine"]:
+        """Load a saved index, or return None if there is none or it doesn't match the embedder"""
+        sidecar = os.path.join(path, "semantic.json")
+        if not os.path.exists(sidecar):
+            logger.info(f"No semantic index at {path}, semantic recommendations disabled")
+            return None
+        try:
+            with open(sidecar) as f:
+                meta = json.load(f)
+            if meta.get("version") != INDEX_VERSION:
+                logger.warning(f"Ignoring semantic index version {meta.get('version')}")
+                return None
+            embedder = make_embedder(model_name)
+            if embedder.name != meta["embedder"]:
+                logger.error(f"Semantic index was built with {meta['embedder']}, not {embedder.name}; rebuild it")
+                return None
+            if backend == "qdrant":
+                index = QdrantIndex(meta["collection"], qdrant_url, qdrant_path)
+            else:
+                index = IVFIndex.load(path)
+            logger.info(f"Loaded semantic index: {len(meta['items'])} titles ({embedder.name}, {backend})")
+            return cls(embedder, index, meta["items"], nprobe)
+        except Exception as e:
+            logger.error(f"Semantic index load error: {e}")
+            return None
+
+    def search(self, text: str, k: int = 10, media_type: Optional[str] = None) -> List[Tuple[Dict[str, Any], float]]:
+        """Titles most similar to a description, with their cosine similarity"""
+        self.queries += 1
+        query = self.embedder.encode([text])[0]
+        media = MEDIA_CODES.get(media_type) if media_type else None
+        return [(self.items[row], score) for row, score in self.index.search(query, k, self.nprobe, media)]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "titles": len(self.items),
+            "embedder": self.embedder.name,
+            "backend": type(self.index).__name__,
+            "queries": self.queries,
+        }
+
+
+def catalog_titles(catalog_path: str) -> List[Dict[str, Any]]:
+    """Unique titles with an overview from the catalog snapshot, first (English) payload wins"""
+    with open(os.path.join(catalog_path, "catalog.json")) as f:
+        items = json.load(f)["items"]
+    seen, titles = set(), []
+    for item in items:
+        key = (_media_type(item), item.get("id"))
+        if key not in seen and item.get("overview"):
+            seen.add(key)
+            titles.append(item)
+    return titles
+
+
+def build_index(items: List[Dict[str, Any]], embedder, path: str, backend: str = "local",
+                qdrant_url: str = "", qdrant_path: str = "", collection: str = "fextv_titles") -> None:
+    """Embed titles and write the index, sidecar last as in catalog.write_snapshot"""
+    os.makedirs(path, exist_ok=True)
+    vectors = embedder.encode([document_text(item) for item in items])
+    media = np.array([MEDIA_CODES[_media_type(item)] for item in items], dtype=np.uint8)
+    if backend == "qdrant":
+        QdrantIndex(collection, qdrant_url, qdrant_path).upload(vectors, media)
+    else:
+        IVFIndex.build(vectors, media).save(path)
+
+    meta = {
+        "version": INDEX_VERSION,
+        "embedder": embedder.name,
+        "dim": int(vectors.shape[1]),
+        "collection": collection,
+        "items": items,
+    }
+    tmp = os.path.join(path, "semantic.json.tmp")
+    with open(tmp, "w") as f:
+        json.dump(meta, f, separators=(",", ":"))
+    os.replace(tmp, os.path.join(path, "semantic.json"))
+
+
+def main(argv: Optional[List[str]] = None):
+    from main import CATALOG_PATH, SEMANTIC_BACKEND, SEMANTIC_INDEX_PATH, SEMANTIC_MODEL, QDRANT_PATH, QDRANT_URL
+    parser = argparse.ArgumentParser(description="Build the semantic index from the catalog snapshot")
+    parser.add_argument("--catalog", default=CATALOG_PATH)
+    parser.add_argument("--out", default=SEMANTIC_INDEX_PATH)
+    parser.add_argument("--model", default=SEMANTIC_MODEL)
+    parser.add_argument("--backend", default=SEMANTIC_BACKEND, choices=["local", "qdrant"])
+    args = parser.parse_args(argv)
+
+    items = catalog_titles(args.catalog)
+    build_index(items, make_embedder(args.model), args.out, args.backend, QDRANT_URL, QDRANT_PATH)
+    logger.info(f"Indexed {len(items)} titles into {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Fex TV Backend - Shared cache backends
+L2 cache shared by every worker and replica (Redis), behind the in-process TTLCache
+
+Values are serialized with orjson (or msgpack, or the json module when
+neither is installed) and zlib-compressed above a size threshold. Each
+stored value carries its fresh/stale deadlines as wall-clock times so any
+worker can apply the same stale-while-revalidate rules as the L1 cache.
+
+L2 failures never fail a request: errors count as misses, and a circuit
+breaker stops calling a down Redis until it recovers.
+"""
+
+import json
+import logging
+import time
+import zlib
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from resilience import CircuitBreaker, CircuitOpen, call_with_breaker
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+RAW = b"0"
+ZLIB = b"z"
+
+
+class Codec:
+    """Serialize values to bytes, compressing payloads above min_compress_bytes"""
+
+    def __init__(self, serializer: str = "orjson", compress: bool = True, min_compress_bytes: int = 1024):
+        if serializer == "msgpack" and not MSGPACK_AVAILABLE:
+            logger.warning("msgpack is not installed, serializing cache values as JSON")
+            serializer = "orjson"
+        if serializer == "orjson" and not ORJSON_AVAILABLE:
+            serializer = "json"
+        self.serializer = serializer
+        self.compress = compress
+        self.min_compress_bytes = min_compress_bytes
+
+    def dumps(self, value: Any) -> bytes:
+        if self.serializer == "msgpack":
+            data = msgpack.packb(value, use_bin_type=True)
+        elif self.serializer == "orjson":
+            data = orjson.dumps(value)
+        else:
+            data = json.dumps(value, separators=(",", ":")).encode()
+        if self.compress and len(data) >= self.min_compress_bytes:
+            return ZLIB + zlib.compress(data, 1)
+        return RAW + data
+
+    def loads(self, data: bytes) -> Any:
+        flag, data = data[:1], data[1:]
+        if flag == ZLIB:
+            data = zlib.decompress(data)
+        if self.serializer == "msgpack":
+            return msgpack.unpackb(data, raw=False)
+        if self.serializer == "orjson":
+            return orjson.loads(data)
+        return json.loads(data)
+
+
+class MemoryBackend:
+    """In-process stand-in for Redis (tests, single-worker development)"""
+
+    def __init__(self):
+        # key -> (bytes, expires_at)
+        self._data: Dict[str, Tuple[bytes, float]] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() >= entry[1]:
+            del self._data[key]
+            return None
+        return entry[0]
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._data[key] = (value, time.monotonic() + ttl)
+
+    async def close(self) -> None:
+        self._data.clear()
+
+
+class RedisBackend:
+    """Redis via redis.asyncio, with short timeouts so a slow Redis can't stall requests"""
+
+    def __init__(self, url: str, timeout: float = 0.1):
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("CACHE_L2_URL=redis://... needs `pip install redis`")
+        self.client = aioredis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self.client.set(key, value, px=max(1, int(ttl * 1000)))
+
+    async def close(self) -> None:
+        await self.client.close()
+
+
+def create_backend(url: str, timeout: float = 0.1):
+    """Backend for CACHE_L2_URL: "" (none), "memory://" or "redis://..." """
+    if not url:
+        return None
+    if url.startswith("memory://"):
+        return MemoryBackend()
+    return RedisBackend(url, timeout)
+
+
+class SharedCache:
+    """One namespace of the shared L2 cache, used by a TTLCache"""
+
+    def __init__(self, backend, namespace: str, codec: Optional[Codec] = None,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.backend = backend
+        self.prefix = f"fextv:v1:{namespace}:"
+        self.codec = codec or Codec()
+        self.breaker = breaker or CircuitBreaker(f"cache:{namespace}", open_seconds=10.0)
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.errors = 0
+
+    async def get(self, key: Hashable) -> Optional[Tuple[Any, float, float]]:
+        """(value, seconds fresh, seconds until expiry) or None"""
+        try:
+            data = await call_with_breaker(self.breaker, lambda: self.backend.get(self.prefix + str(key)))
+            if data is None:
+                self.misses += 1
+                return None
+            value, fresh_at, stale_at = self.codec.loads(data)
+        except CircuitOpen:
+            self.misses += 1
+            return None
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Shared cache read failed: {e}")
+            return None
+        now = time.time()
+        self.hits += 1
+        return value, fresh_at - now, stale_at - now
+
+    async def set(self, key: Hashable, value: Any, ttl: float, stale_ttl: float) -> None:
+        now = time.time()
+        try:
+            data = self.codec.dumps([value, now + ttl, now + ttl + stale_ttl])
+            await call_with_breaker(self.breaker, lambda: self.backend.set(self.prefix + str(key), data, ttl + stale_ttl))
+            self.writes += 1
+        except CircuitOpen:
+            pass
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Shared cache write failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "serializer": self.codec.serializer,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "writes": self.writes,
+            "errors": self.errors,
+            "breaker": self.breaker.state,
+        }
@@ -0,0 +1,67 @@
+"""
+Fex TV Backend - Request coalescing
+Concurrent callers asking for the same upstream request share one in-flight call
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from deadline import current_deadline, detached_context
+from ratelimit import DeadlineExceeded, Priority, current_priority
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key onto one in-flight task.
+
+    The first caller for a key starts the upstream call; everyone arriving while
+    it is still running awaits the same task. The task is shielded, so a caller
+    that is cancelled (e.g. a client disconnect) doesn't cancel it for others.
+
+    The task runs in a detached_context() at its first caller's priority;
+    each caller stops waiting at its own deadline. A caller more urgent than
+    the in-flight call starts its own instead of queueing behind it, and
+    later callers join that one.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, Tuple[asyncio.Future, Priority]] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        priority = current_priority.get()
+        flight = self._inflight.get(key)
+        if flight is None or priority < flight[1]:
+            task = detached_context().run(asyncio.create_task, fn())
+            self._inflight[key] = (task, priority)
+            task.add_done_callback(lambda t: self._forget(key, t))
+            self.leaders += 1
+        else:
+            task = flight[0]
+            self.coalesced += 1
+        deadline = current_deadline()
+        if deadline is None:
+            return await asyncio.shield(task)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded("Deadline passed waiting for a shared upstream call") from None
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        flight = self._inflight.get(key)
+        if flight is not None and flight[0] is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved in case every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._inflight),
+            "upstream_calls": self.leaders,
+            "coalesced": self.coalesced,
+        }
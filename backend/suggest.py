@@ -0,0 +1,184 @@
+"""
+Fex TV Backend - Typeahead suggestions
+Sorted-array prefix index over catalog titles, people and genre keywords
+
+Every title, person name, alias and genre keyword is normalized (case,
+accents, punctuation) and stored once per word it can be typed from, so
+"knig" finds "The Dark Knight". The keys live in one sorted array: a prefix
+is a bisect range, and the completions are the heaviest entries in it.
+Weights are TMDB popularity, halved for matches that start past the first
+word; genres weigh as much as the most popular entry so "hor" offers
+horror first.
+
+The index is built in-process from the catalog and people snapshots (see
+catalog.py and people.py), so a suggestion never calls TMDB.
+"""
+
+import bisect
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from intent import GENRE_KEYWORDS
+from people import normalize_name
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("movie", "tv", "person", "genre")
+# Weight of a match on a later word ("knight" in "the dark knight") relative to the start
+WORD_MATCH_WEIGHT = 0.5
+# Completions of short prefixes span most of the index; their results are memoized
+MAX_CACHED_PREFIXES = 4096
+
+
+def _keys(names: Iterable[str]) -> List[Tuple[str, bool]]:
+    """(key, starts the name) for every word start of every distinct normalized name"""
+    keys = {}
+    for name in names:
+        words = normalize_name(name or "").split()
+        for start in range(len(words)):
+            key = " ".join(words[start:])
+            keys[key] = keys.get(key, False) or start == 0
+    return list(keys.items())
+
+
+def title_entries(catalog) -> List[Dict[str, Any]]:
+    """One entry per (media type, id) in a CatalogIndex, from the facets' rows"""
+    entries: Dict[Tuple[str, int], Dict[str, Any]] = {}
+    items = catalog.columns["item"]
+    for (media_type, _genre, _country, _language), facet in catalog.facets.items():
+        for row in items[facet["start"]:facet["end"]]:
+            item = catalog.items[row]
+            title = item.get("title") or item.get("name")
+            if not title:
+                continue
+            entry = entries.get((media_type, item["id"]))
+            if entry is None:
+                date = item.get("release_date") or item.get("first_air_date") or ""
+                entries[(media_type, item["id"])] = entry = {
+                    "type": media_type,
+                    "id": item["id"],
+                    "text": title,
+                    "year": int(date[:4]) if date[:4].isdigit() else None,
+                    "poster_path": item.get("poster_path"),
+                    "names": set(),
+                    "weight": 0.0,
+                }
+            # Localized payloads of the same title add their titles as names
+            entry["names"].update([title, item.get("original_title") or item.get("original_name")])
+            entry["weight"] = max(entry["weight"], item.get("popularity") or 0.0)
+    return list(entries.values())
+
+
+def person_entries(people) -> List[Dict[str, Any]]:
+    """One entry per person in a PersonIndex"""
+    return [
+        {
+            "type": "person",
+            "id": person["id"],
+            "text": person["name"],
+            "known_for": (person.get("known_for") or [])[:2],
+            "profile_path": person.get("profile_path"),
+            "names": [person["name"]] + list(person.get("aliases") or []),
+            "weight": person.get("popularity") or 0.0,
+        }
+        for person in people.people
+    ]
+
+
+def genre_entries(weight: float) -> List[Dict[str, Any]]:
+    """One entry per extract_intent genre, typed as any of its keywords ("scary" completes to horror)"""
+    return [
+        {"type": "genre", "id": genre, "text": genre, "names": [genre] + keywords, "weight": weight}
+        for genre, keywords in GENRE_KEYWORDS.items()
+    ]
+
+
+class SuggestIndex:
+    """Top-k weighted prefix completions over a fixed list of entries"""
+
+    def __init__(self, entries: List[Dict[str, Any]], created_at: float = 0.0):
+        self.created_at = created_at
+        keys: List[Tuple[str, int, float]] = []
+        self.entries = []
+        for entry in entries:
+            row = len(self.entries)
+            for key, leading in _keys(entry["names"]):
+                keys.append((key, row, entry["weight"] * (1.0 if leading else WORD_MATCH_WEIGHT)))
+            self.entries.append({k: v for k, v in entry.items() if k not in ("names", "weight")})
+        keys.sort()
+        self._keys = [key for key, _, _ in keys]
+        self._rows = np.array([row for _, row, _ in keys], dtype=np.int32)
+        self._weights = np.array([weight for _, _, weight in keys], dtype=np.float32)
+        kind_codes = np.array([KINDS.index(entry["type"]) for entry in self.entries], dtype=np.int8)
+        self._kinds = kind_codes[self._rows] if len(self._rows) else np.zeros(0, dtype=np.int8)
+        self._cache: Dict[Tuple[str, int, Tuple[str, ...]], List[Dict[str, Any]]] = {}
+        self.lookups = 0
+        self.cache_hits = 0
+
+    @classmethod
+    def build(cls, catalog=None, people=None) -> "SuggestIndex":
+        """Index the catalog's titles, the people index and the genre keywords"""
+        entries = title_entries(catalog) if catalog is not None else []
+        if people is not None:
+            entries += person_entries(people)
+        top = max((entry["weight"] for entry in entries), default=1.0)
+        entries += genre_entries(top)
+        index = cls(entries, time.time())
+        logger.info(f"Built suggest index: {len(index.entries)} entries, {len(index._keys)} keys")
+        return index
+
+    def suggest(self, prefix: str, limit: int = 10, kinds: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """The `limit` heaviest entries with a name or word starting with prefix"""
+        self.lookups += 1
+        normalized = normalize_name(prefix)
+        if not normalized or limit <= 0:
+            return []
+        kinds = tuple(sorted(set(kinds) & set(KINDS))) if kinds else KINDS
+        cache_key = (normalized, limit, kinds)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            self.cache_hits += 1
+            return cached
+
+        start = bisect.bisect_left(self._keys, normalized)
+        end = bisect.bisect_left(self._keys, normalized + "￿", start)
+        rows, weights = self._rows[start:end], self._weights[start:end]
+        if kinds != KINDS:
+            codes = [KINDS.index(kind) for kind in kinds]
+            selected = np.isin(self._kinds[start:end], codes)
+            rows, weights = rows[selected], weights[selected]
+
+        # Each entry can match on several keys; take enough of the heaviest
+        # to fill `limit` distinct entries, widening if duplicates crowd them out
+        take = limit * 4
+        while True:
+            if len(weights) > take:
+                top = np.argpartition(-weights, take - 1)[:take]
+            else:
+                top = np.arange(len(weights))
+            top = top[np.argsort(-weights[top], kind="stable")]
+            matched = list(dict.fromkeys(rows[top].tolist()))
+            if len(matched) >= limit or len(top) == len(weights):
+                break
+            take *= 4
+        results = [self.entries[row] for row in matched[:limit]]
+
+        if len(self._cache) < MAX_CACHED_PREFIXES:
+            self._cache[cache_key] = results
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        counts = {kind: 0 for kind in KINDS}
+        for entry in self.entries:
+            counts[entry["type"]] += 1
+        return {
+            "entries": counts,
+            "keys": len(self._keys),
+            "age_seconds": round(time.time() - self.created_at) if self.created_at else None,
+            "lookups": self.lookups,
+            "cache_hits": self.cache_hits,
+            "cached_prefixes": len(self._cache),
+        }